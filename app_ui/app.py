@@ -1,5 +1,6 @@
 # --- Bootstrap: path + .env (works from any CWD) ------------------------------
 from pathlib import Path
+import asyncio
 import sys, os, uuid
 
 # repo root:   chainlit/app.py -> parents[2]
@@ -37,7 +38,7 @@ def auth_callback(username: str, password: str):
     return None
 
 # Core types & infra
-from agentic_bank.core.messages import TurnInput, UserIdentity
+from agentic_bank.core.messages import TurnInput, TurnOutcome, UserIdentity
 from agentic_bank.core.memory import InMemoryStore
 from agentic_bank.core.tooling import ToolRegistry, ToolExecutor
 
@@ -45,11 +46,14 @@ from agentic_bank.core.tooling import ToolRegistry, ToolExecutor
 from agentic_bank.core.profile import ProfileStore
 from agentic_bank.core.conv_memory import ConversationMemory
 from agentic_bank.core.utterance import is_acknowledgement
+from agentic_bank.core.llm.embeddings import turn_embeddings
+from agentic_bank.core.llm.resilience import upstream_failed
 
 # Routers (standardized ensemble)
 from agentic_bank.router.router import KeywordRouter, EnsembleRouter, EnsembleConfig
 from agentic_bank.router.semantic_intents import SemanticIntents
 from agentic_bank.router.llm_intent import LLMIntentClassifier
+from agentic_bank.router.local_intent import with_local_fast_path
 from agentic_bank.router.topic_shift import TopicShiftDetector
 from agentic_bank.router.super_router_llm import SuperRouterLLM  # optional fallback
 
@@ -65,8 +69,8 @@ from agentic_bank.agents.faq.tools import register_faq_tools
 # Stores & registries
 memory = InMemoryStore()
 
-PROFILE = ProfileStore(ROOT / "data" / "profiles")
-CONV = ConversationMemory(ROOT / "data" / "conversations")
+PROFILE = ProfileStore(Path(os.getenv("PROFILES_DIR") or ROOT / "data" / "profiles"))
+CONV = ConversationMemory(Path(os.getenv("CONVERSATIONS_DIR") or ROOT / "data" / "conversations"))
 
 tools = ToolRegistry()
 register_card_tools(tools)
@@ -83,9 +87,9 @@ AGENTS = {
 }
 
 # Routers (ensemble)
-keyword_router = KeywordRouter()               # or KeywordRouter(patterns=your_dict)
+keyword_router = KeywordRouter(path=os.getenv("ROUTER_KEYWORDS_FILE") or ROOT / "data" / "router" / "keywords.yaml")
 semantic_router = SemanticIntents()
-intent_clf = LLMIntentClassifier()
+intent_clf = with_local_fast_path(LLMIntentClassifier())  # local model first, LLM below threshold
 topic_shift = TopicShiftDetector()
 ensemble = EnsembleRouter(keyword_router, semantic_router, intent_clf, topic_shift, EnsembleConfig())
 super_router = SuperRouterLLM()                # optional tie-breaker
@@ -96,10 +100,10 @@ async def start():
     app_user = cl.user_session.get("user")
     user_id = getattr(app_user, "identifier", None) or "demo"
 
-    profile = PROFILE.load(user_id)
+    profile = await asyncio.to_thread(PROFILE.load, user_id)
     profile.fullName = profile.fullName or user_id.capitalize()
     profile.tier = profile.tier or "standard"
-    PROFILE.save(profile)
+    await asyncio.to_thread(PROFILE.save, profile)
 
     greeting = (
         f"Welcome back, {profile.fullName}! ({profile.tier.title()} member)\n"
@@ -113,16 +117,46 @@ async def start():
 
 @cl.on_message
 async def main(message: cl.Message):
+    # One embedding per distinct text for the whole turn (routers + FAQ retrieval)
+    with turn_embeddings():
+        await _handle_turn(message)
+
+DEGRADED_REPLY = "I'm having trouble reaching our assistant service right now. Please try again in a moment."
+
+
+async def _stream_agent(agent, turn: TurnInput, session_mem):
+    """Runs the agent, streaming its reply into one message; returns the TurnOutcome."""
+    msg = cl.Message(content="")
+    outcome = None
+    try:
+        async for ev in agent.astream(turn, session_mem, tool_exec):
+            if ev["type"] == "delta":
+                await msg.stream_token(ev["text"])
+            else:
+                outcome = ev["outcome"]
+    except Exception as e:
+        if not upstream_failed(e):
+            raise
+        cl_log.warning(f"agent degraded: {e}", extra={"stage": "ui.degraded"})
+        outcome = TurnOutcome(replyText=DEGRADED_REPLY, handledTopic=session_mem.get("handled_topic"))
+    final = outcome.replyText or "(no text)"
+    if msg.content != final:  # e.g. the agent fell back to a non-JSON reply
+        msg.content = final
+    await msg.send()
+    return outcome
+
+
+async def _handle_turn(message: cl.Message):
     session_id = cl.user_session.get("session_id")
     user_id = cl.user_session.get("user_id") or "demo"
     text = message.content or ""
 
     # Persist user's message
-    CONV.append(user_id, session_id, role="user", content=text, meta={})
+    await asyncio.to_thread(CONV.append, user_id, session_id, role="user", content=text, meta={})
 
     # Load profile + recent history
-    profile = PROFILE.load(user_id)
-    recent = CONV.last_n(user_id, session_id, n=8)
+    profile = await asyncio.to_thread(PROFILE.load, user_id)
+    recent = await asyncio.to_thread(CONV.last_n, user_id, session_id, n=8)
 
     # Build TurnInput
     turn = TurnInput(
@@ -153,7 +187,7 @@ async def main(message: cl.Message):
         if is_acknowledgement(text) and (time() - last_t) <= 120:
             closing = "Great — I’ll close this issue. If you need anything else, just tell me."
             await cl.Message(content=closing).send()
-            CONV.append(user_id, session_id, role="assistant", content=closing, meta={"agent": "system"})
+            await asyncio.to_thread(CONV.append, user_id, session_id, role="assistant", content=closing, meta={"agent": "system"})
             return
 
     # --------------- If an agent is active, let it handle this turn ---------------
@@ -161,7 +195,7 @@ async def main(message: cl.Message):
         agent = AGENTS.get(active_agent)
         if agent:
             session_mem = sess.setdefault(active_agent, {})
-            outcome = agent.run(turn, session_mem, tool_exec)
+            outcome = await _stream_agent(agent, turn, session_mem)
 
             # Promote agent facts to session facts
             if any(isinstance(k, str) and k.startswith("__fact_") for k in session_mem.keys()):
@@ -170,12 +204,10 @@ async def main(message: cl.Message):
                     if isinstance(k, str) and k.startswith("__fact_"):
                         facts[k] = v
 
-            # Reply
-            await cl.Message(content=outcome.replyText or "(no text)").send()
             for k, v in session_mem.items():
                 if isinstance(k, str) and k.startswith("tool:"):
                     await cl.Message(author="tool", content=f"{k} → {v}").send()
-            CONV.append(user_id, session_id, role="assistant", content=outcome.replyText or "", meta={"agent": active_agent})
+            await asyncio.to_thread(CONV.append, user_id, session_id, role="assistant", content=outcome.replyText or "", meta={"agent": active_agent})
 
             if outcome.isTerminal:
                 sess.pop("active_agent", None)
@@ -198,7 +230,7 @@ async def main(message: cl.Message):
     last_topic = sess.get("last_topic")
     last_topic_time = sess.get("last_topic_time")
 
-    result = ensemble.decide(
+    result = await ensemble.adecide(
         turn,
         last_topic=last_topic,
         last_topic_time=last_topic_time,
@@ -208,7 +240,8 @@ async def main(message: cl.Message):
     # visible debug of signals (kw/sem/llm/topic)
     await cl.Message(
         author="debug",
-        content=" | ".join([f"{s.source[:3]}={s.agent or '-'}({s.confidence:.2f})" for s in result.signals]) or "no-signals"
+        content=" | ".join([f"{s.source[:3]}={s.agent or '-'}({s.confidence:.2f})" for s in result.signals]
+                           + ([f"skip={','.join(result.skipped)}"] if result.skipped else [])) or "no-signals"
     ).send()
 
     # Clarify branch
@@ -219,10 +252,10 @@ async def main(message: cl.Message):
 
     agent_name, conf = result.agent, result.confidence
 
-    # Optional: escalate to SuperRouter only if ensemble is weak
-    if (not agent_name) or conf < 0.75:
+    # Optional: escalate to SuperRouter only if ensemble is weak (and the cascade did not rule it out)
+    if ((not agent_name) or conf < 0.75) and "super" not in result.skipped:
         try:
-            agent_name2, conf2, followup = super_router.route(
+            agent_name2, conf2, followup = await super_router.aroute(
                 turn,
                 active_agent=None,
                 active_topic=last_topic,
@@ -249,7 +282,8 @@ async def main(message: cl.Message):
     # Execute chosen agent
     sess["last_was_terminal"] = False  # we are engaging
     session_mem = sess.setdefault(agent_name, {})
-    outcome = agent.run(turn, session_mem, tool_exec)
+    await cl.Message(content=f"→ **{agent_name}** (confidence {conf:.2f})").send()
+    outcome = await _stream_agent(agent, turn, session_mem)
 
     # Promote facts
     if any(isinstance(k, str) and k.startswith("__fact_") for k in session_mem.keys()):
@@ -267,14 +301,11 @@ async def main(message: cl.Message):
         sess["active_agent"] = agent_name
         sess["active_topic"] = outcome.handledTopic
 
-    await cl.Message(content=f"→ **{agent_name}** (confidence {conf:.2f})").send()
-    await cl.Message(content=outcome.replyText or "(no text)").send()
-
     for k, v in session_mem.items():
         if isinstance(k, str) and k.startswith("tool:"):
             await cl.Message(author="tool", content=f"{k} → {v}").send()
 
-    CONV.append(user_id, session_id, role="assistant", content=outcome.replyText or "", meta={"agent": agent_name})
+    await asyncio.to_thread(CONV.append, user_id, session_id, role="assistant", content=outcome.replyText or "", meta={"agent": agent_name})
 
     cl_log.info("outcome", extra={
         "stage":"ui.out",
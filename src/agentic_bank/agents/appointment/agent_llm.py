@@ -1,7 +1,9 @@
 import json
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from agentic_bank.core.llm.azure import AzureLLM
+from typing import AsyncIterator, List, Dict, Any, Optional
+from agentic_bank.core.llm.azure import AzureLLM, AsyncAzureLLM
+from agentic_bank.core.llm.streaming import ReplyTextExtractor
+from agentic_bank.core.llm.context import budget_for, count_tokens, pack_context
 from agentic_bank.core.messages import TurnOutcome
 
 class ApptConfig:
@@ -13,6 +15,8 @@ class AppointmentAgentLLM:
         self.prompts_dir = prompts_dir
         self.config = config or ApptConfig()
         self.llm = AzureLLM()
+        self.allm = AsyncAzureLLM()
+        self.context_budget = budget_for("appointment")
         self.system_prompt = (self.prompts_dir / "system.md").read_text()
 
         # Optional: define tool schema for booking/checking availability
@@ -51,20 +55,18 @@ class AppointmentAgentLLM:
             }
         ]
 
-    def llm_infer(self, context: Dict[str, Any]) -> str:
-        """
-        Send the prompt to the LLM with context and return raw string.
-        """
-        system_message = self.system_prompt.strip()
-
+    def _messages(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Most recent history and facts (minus tool payloads) within this agent's token budget
+        packed = pack_context(context.get("recent_messages"), context.get("facts"), budget=self.context_budget,
+                              reserved=count_tokens(context.get("user_message") or ""))
         user_message = f"""
         You are a banking assistant that books branch appointments.
 
         Conversation so far:
-        {json.dumps(context.get("recent_messages", []), ensure_ascii=False, indent=2)}
+        {packed.messages_json}
 
         Facts collected so far:
-        {json.dumps(context.get("facts", {}), ensure_ascii=False, indent=2)}
+        {packed.facts_json}
 
         User's latest message:
         {context.get("user_message")}
@@ -93,22 +95,50 @@ class AppointmentAgentLLM:
         }}
         """.strip()
 
-        messages = [{"role": "user", "content": user_message}]
-        raw = self.llm.chat(messages, system=system_message)
-        return raw
+        return [{"role": "user", "content": user_message}]
 
-    def run(self, turn, session_mem, tool_exec):
+    def llm_infer(self, context: Dict[str, Any]) -> str:
         """
-        Called by app.py — uses LLM to decide conversation flow.
+        Send the prompt to the LLM with context and return raw string.
         """
-        context = {
+        raw = self.llm.chat(self._messages(context), system=self.system_prompt.strip())
+        return raw
+
+    async def allm_infer(self, context: Dict[str, Any]) -> str:
+        """Async llm_infer."""
+        return await self.allm.chat(self._messages(context), system=self.system_prompt.strip())
+
+    @staticmethod
+    def _context(turn, session_mem) -> Dict[str, Any]:
+        return {
             "recent_messages": turn.metadata.get("recent_messages", []),
             "facts": session_mem,
             "user_message": turn.text
         }
 
-        raw = self.llm_infer(context)
-
+    def run(self, turn, session_mem, tool_exec):
+        """
+        Called by app.py — uses LLM to decide conversation flow.
+        """
+        return self._outcome(self.llm_infer(self._context(turn, session_mem)), session_mem)
+
+    async def arun(self, turn, session_mem, tool_exec):
+        """Async run() for the async API/UI handlers."""
+        return self._outcome(await self.allm_infer(self._context(turn, session_mem)), session_mem)
+
+    async def astream(self, turn, session_mem, tool_exec) -> AsyncIterator[Dict[str, Any]]:
+        """arun() that streams replyText deltas, then yields the outcome (see BaseAgentImpl.astream)."""
+        extractor = ReplyTextExtractor("replyText")
+        chunks: List[str] = []
+        async for delta in self.allm.stream_chat(self._messages(self._context(turn, session_mem)),
+                                                 system=self.system_prompt.strip()):
+            chunks.append(delta)
+            text = extractor.feed(delta)
+            if text:
+                yield {"type": "delta", "text": text}
+        yield {"type": "outcome", "outcome": self._outcome("".join(chunks), session_mem)}
+
+    def _outcome(self, raw: str, session_mem) -> TurnOutcome:
         try:
             parsed = json.loads(raw)
         except json.JSONDecodeError:
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Protocol
+from typing import AsyncIterator, List, Dict, Any, Protocol
 from pathlib import Path
 from agentic_bank.core.messages import TurnInput, TurnOutcome, ToolCall
 from agentic_bank.core.tooling import ToolExecutor
@@ -22,6 +22,10 @@ class BaseAgentImpl:
     def respond(self, text: str) -> Dict[str, Any]:
         return {"type":"respond", "text": text}
 
+    async def aplan(self, turn: TurnInput, memory: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Async plan(); agents with async LLM calls override this."""
+        return self.plan(turn, memory)
+
     def run(self, turn: TurnInput, memory: Dict[str, Any], tools: ToolExecutor) -> TurnOutcome:
         steps = self.plan(turn, memory)
         tool_calls: List[ToolCall] = []
@@ -35,6 +39,35 @@ class BaseAgentImpl:
             if step["type"] == "respond":
                 reply_chunks.append(step["text"])
 
+        return self._outcome(memory, tool_calls, reply_chunks)
+
+    async def arun(self, turn: TurnInput, memory: Dict[str, Any], tools: ToolExecutor) -> TurnOutcome:
+        steps = await self.aplan(turn, memory)
+        tool_calls: List[ToolCall] = []
+        reply_chunks: List[str] = []
+
+        for step in steps:
+            if step["type"] == "tool":
+                status, data = await tools.acall(step["toolId"], step["args"])
+                tool_calls.append(ToolCall(toolId=step["toolId"], arguments=step["args"]))
+                memory[f"tool:{step['toolId']}"] = {"status": status, "data": data}
+            if step["type"] == "respond":
+                reply_chunks.append(step["text"])
+
+        return self._outcome(memory, tool_calls, reply_chunks)
+
+    async def astream(self, turn: TurnInput, memory: Dict[str, Any], tools: ToolExecutor) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming arun(): yields {"type": "delta", "text"} for user-visible reply text as it is
+        generated, then exactly one {"type": "outcome", "outcome": TurnOutcome}.
+        This default streams nothing incrementally; LLM agents override it.
+        """
+        outcome = await self.arun(turn, memory, tools)
+        if outcome.replyText:
+            yield {"type": "delta", "text": outcome.replyText}
+        yield {"type": "outcome", "outcome": outcome}
+
+    def _outcome(self, memory: Dict[str, Any], tool_calls: List[ToolCall], reply_chunks: List[str]) -> TurnOutcome:
         reply = " ".join(reply_chunks) if reply_chunks else "Done."
 
         # Infer terminal & topic from memory/state if present
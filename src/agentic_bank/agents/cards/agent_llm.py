@@ -1,7 +1,9 @@
 import json
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from agentic_bank.core.llm.azure import AzureLLM
+from typing import AsyncIterator, List, Dict, Any, Optional
+from agentic_bank.core.llm.azure import AzureLLM, AsyncAzureLLM
+from agentic_bank.core.llm.streaming import ReplyTextExtractor
+from agentic_bank.core.llm.context import budget_for, count_tokens, pack_context
 from agentic_bank.core.messages import TurnOutcome
 
 class CardControlConfig:
@@ -13,6 +15,8 @@ class CardControlAgentLLM:
         self.prompts_dir = prompts_dir
         self.config = config or CardControlConfig()
         self.llm = AzureLLM()
+        self.allm = AsyncAzureLLM()
+        self.context_budget = budget_for("cards")
         self.system_prompt = (self.prompts_dir / "system.md").read_text()
 
         # Mock tool schema for blocking a card
@@ -48,22 +52,18 @@ class CardControlAgentLLM:
             }
         ]
 
-    def llm_infer(self, context: Dict[str, Any], tool_exec) -> str:
-        """
-        Sends the conversation context to the LLM and lets it decide:
-        - What to reply to the user
-        - Whether it can call `block_card`
-        """
-        system_message = self.system_prompt.strip()
-
+    def _messages(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Most recent history and facts (minus tool payloads) within this agent's token budget
+        packed = pack_context(context.get("recent_messages"), context.get("facts"), budget=self.context_budget,
+                              reserved=count_tokens(context.get("user_message") or ""))
         user_message = f"""
             You are a banking assistant that handles card-related issues: blocking, unblocking, and replacements.
 
             Conversation so far:
-            {json.dumps(context.get("recent_messages", []), ensure_ascii=False, indent=2)}
+            {packed.messages_json}
 
             Facts collected so far:
-            {json.dumps(context.get("facts", {}), ensure_ascii=False, indent=2)}
+            {packed.facts_json}
 
             User's latest message:
             {context.get("user_message")}
@@ -84,28 +84,71 @@ class CardControlAgentLLM:
             - facts: store any new details
             """.strip()
 
-        messages = [{"role": "user", "content": user_message}]
+        return [{"role": "user", "content": user_message}]
+
+    def llm_infer(self, context: Dict[str, Any], tool_exec) -> str:
+        """
+        Sends the conversation context to the LLM and lets it decide:
+        - What to reply to the user
+        - Whether it can call `block_card`
+        """
         text, summaries = self.llm.chat_with_tools(
-            messages=messages,
+            messages=self._messages(context),
             tools=self.tools_schema,
-            system=system_message,
+            system=self.system_prompt.strip(),
             tool_executor=tool_exec
         )
 
         return text, summaries
 
-    def run(self, turn, session_mem, tool_exec):
-        """
-        Called by app.py — lets the LLM handle flow and optionally call `block_card`.
-        """
-        context = {
+    async def allm_infer(self, context: Dict[str, Any], tool_exec) -> str:
+        """Async llm_infer (tools run through tool_exec.acall)."""
+        return await self.allm.chat_with_tools(
+            messages=self._messages(context),
+            tools=self.tools_schema,
+            system=self.system_prompt.strip(),
+            tool_executor=tool_exec
+        )
+
+    @staticmethod
+    def _context(turn, session_mem) -> Dict[str, Any]:
+        return {
             "recent_messages": turn.metadata.get("recent_messages", []),
             "facts": session_mem,
             "user_message": turn.text
         }
 
-        raw, tool_summaries = self.llm_infer(context, tool_exec)
-
+    def run(self, turn, session_mem, tool_exec):
+        """
+        Called by app.py — lets the LLM handle flow and optionally call `block_card`.
+        """
+        raw, tool_summaries = self.llm_infer(self._context(turn, session_mem), tool_exec)
+        return self._outcome(raw, tool_summaries, session_mem)
+
+    async def arun(self, turn, session_mem, tool_exec):
+        """Async run() for the async API/UI handlers."""
+        raw, tool_summaries = await self.allm_infer(self._context(turn, session_mem), tool_exec)
+        return self._outcome(raw, tool_summaries, session_mem)
+
+    async def astream(self, turn, session_mem, tool_exec) -> AsyncIterator[Dict[str, Any]]:
+        """arun() that streams replyText deltas, then yields the outcome (see BaseAgentImpl.astream)."""
+        extractor = ReplyTextExtractor("replyText")
+        raw, tool_summaries = "", []
+        async for ev in self.allm.stream_with_tools(
+            messages=self._messages(self._context(turn, session_mem)),
+            tools=self.tools_schema,
+            system=self.system_prompt.strip(),
+            tool_executor=tool_exec
+        ):
+            if ev["type"] == "delta":
+                text = extractor.feed(ev["text"])
+                if text:
+                    yield {"type": "delta", "text": text}
+            elif ev["type"] == "done":
+                raw, tool_summaries = ev["text"], ev["summaries"]
+        yield {"type": "outcome", "outcome": self._outcome(raw, tool_summaries, session_mem)}
+
+    def _outcome(self, raw: str, tool_summaries: List[Dict[str, Any]], session_mem) -> TurnOutcome:
         try:
             parsed = json.loads(raw)
         except json.JSONDecodeError:
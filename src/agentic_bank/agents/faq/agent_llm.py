@@ -1,9 +1,9 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 from pydantic import BaseModel
 from agentic_bank.agents.base import BaseAgentImpl
-from agentic_bank.core.llm.azure import AzureLLM
+from agentic_bank.core.llm.azure import AzureLLM, AsyncAzureLLM
 
 class FAQState(BaseModel):
     last_query: Optional[str] = None
@@ -14,6 +14,7 @@ class FAQAgentLLM(BaseAgentImpl):
     def __init__(self, prompts_dir: Path):
         super().__init__(prompts_dir)
         self.llm = AzureLLM()
+        self.allm = AsyncAzureLLM()
         self.tools_schema: List[Dict[str, Any]] = [{
             "type":"function",
             "function": {
@@ -23,17 +24,39 @@ class FAQAgentLLM(BaseAgentImpl):
             }
         }]
 
+    def _request(self, turn) -> Dict[str, Any]:
+        from agentic_bank.api.main import tool_exec
+        return {
+            "messages": [{"role":"user","content":f"Question: {turn.text or ''}\nFirst, call knowledge_retrieve(query). Then answer briefly."}],
+            "tools": self.tools_schema,
+            "system": "You answer banking FAQs using retrieved passages. Keep it short and grounded.",
+            "tool_executor": tool_exec,
+        }
+
     def plan(self, turn, memory: Dict[str, Any]) -> List[Dict[str, Any]]:
-        s = FAQState(**memory) if memory else FAQState()
         memory["handled_topic"] = "faq"
-        system = "You answer banking FAQs using retrieved passages. Keep it short and grounded."
-        from agentic_bank.api.main import tool_exec
-        answer, _ = self.llm.chat_with_tools(
-            messages=[{"role":"user","content":f"Question: {turn.text or ''}\nFirst, call knowledge_retrieve(query). Then answer briefly."}],
-            tools=self.tools_schema,
-            system=system,
-            tool_executor=tool_exec,
-        )
+        answer, _ = self.llm.chat_with_tools(**self._request(turn))
+        return self._steps(turn, memory, answer)
+
+    async def aplan(self, turn, memory: Dict[str, Any]) -> List[Dict[str, Any]]:
+        memory["handled_topic"] = "faq"
+        answer, _ = await self.allm.chat_with_tools(**self._request(turn))
+        return self._steps(turn, memory, answer)
+
+    async def astream(self, turn, memory: Dict[str, Any], tools) -> AsyncIterator[Dict[str, Any]]:
+        # Plain-text answer: deltas go straight through
+        memory["handled_topic"] = "faq"
+        answer = ""
+        async for ev in self.allm.stream_with_tools(**self._request(turn)):
+            if ev["type"] == "delta":
+                yield ev
+            elif ev["type"] == "done":
+                answer = ev["text"]
+        steps = self._steps(turn, memory, answer)
+        yield {"type": "outcome", "outcome": self._outcome(memory, [], [s["text"] for s in steps if s["type"] == "respond"])}
+
+    def _steps(self, turn, memory: Dict[str, Any], answer: str) -> List[Dict[str, Any]]:
+        s = FAQState(**memory) if memory else FAQState()
         s.last_query = turn.text or s.last_query
         s.fsm = "DONE"
         memory.update(s.model_dump())
@@ -4,7 +4,8 @@ import numpy as np
 from pathlib import Path
 
 from agentic_bank.core.tooling import Tool, ToolRegistry
-from agentic_bank.core.llm.embeddings import embed_texts, cosine_sim_matrix
+from agentic_bank.core.llm.embeddings import EMBED_MODEL, embed_texts, embed_for_turn
+from agentic_bank.core.llm.quantize import CompactVectors
 
 DATA_DIR = Path(__file__).resolve().parents[2].parents[1] / "data" / "faq"
 
@@ -13,10 +14,14 @@ for p in sorted(DATA_DIR.glob("*.md")):
     _DOCS.append((p.stem, p.read_text(encoding="utf-8").strip()))
 
 _USE_EMB = os.getenv("RAG_USE_EMBEDDINGS","false").lower() == "true"
-_EMB = None
+_EMB = None  # CompactVectors; RAG_EMBED_DIM / RAG_EMBED_DTYPE override EMBED_STORE_*
 if _USE_EMB and _DOCS:
     try:
-        _EMB = embed_texts([t for _, t in _DOCS])
+        _EMB = CompactVectors.from_float(
+            embed_texts([t for _, t in _DOCS]),
+            int(os.getenv("RAG_EMBED_DIM")) if os.getenv("RAG_EMBED_DIM") else None,
+            os.getenv("RAG_EMBED_DTYPE"),
+        )
     except Exception:
         _USE_EMB = False
 
@@ -34,8 +39,8 @@ def _keyword_search(query: str, k: int = 3) -> List[Dict[str, Any]]:
 def _vector_search(query: str, k: int = 3) -> List[Dict[str, Any]]:
     if not _DOCS:
         return []
-    qv = embed_texts([query])
-    sims = cosine_sim_matrix(qv, _EMB)
+    qv = np.asarray([embed_for_turn(EMBED_MODEL, query, embed_texts)], dtype=np.float32)
+    sims = _EMB.scores(qv)
     order = np.argsort(-sims[0])[:k]
     return [{"id": _DOCS[i][0], "passage": _DOCS[i][1]} for i in order]
 
@@ -47,4 +52,4 @@ def register_faq_tools(registry: ToolRegistry):
         else:
             passages = _keyword_search(query)
         return {"passages": passages}
-    registry.register(Tool("knowledge.retrieve", retrieve, "Retrieve FAQ passages"))
\ No newline at end of file
+    registry.register(Tool("knowledge.retrieve", retrieve, "Retrieve FAQ passages", read_only=True))
\ No newline at end of file
@@ -1,11 +1,14 @@
 # src/agentic_bank/api/main.py
+import asyncio
+import json
 import os
 import uuid
 from pathlib import Path
-from time import time
-from typing import Optional, List, Dict, Any
+from time import perf_counter, time
+from typing import AsyncIterator, Optional, List, Dict, Any
 
 from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 load_dotenv("../.env")
@@ -13,7 +16,7 @@ load_dotenv("../.env")
 from agentic_bank.core.logging import setup_logging, get_logger
 
 # Core types & infra
-from agentic_bank.core.messages import TurnInput, UserIdentity
+from agentic_bank.core.messages import TurnInput, TurnOutcome, UserIdentity
 from agentic_bank.core.memory import InMemoryStore
 from agentic_bank.core.tooling import ToolRegistry, ToolExecutor
 
@@ -21,11 +24,18 @@ from agentic_bank.core.tooling import ToolRegistry, ToolExecutor
 from agentic_bank.core.profile import ProfileStore
 from agentic_bank.core.conv_memory import ConversationMemory
 from agentic_bank.core.utterance import is_acknowledgement
+from agentic_bank.core.llm.embeddings import turn_embeddings
+from agentic_bank.core.llm.resilience import resilience_stats, upstream_failed
+from agentic_bank.core.llm.embeddings import embedding_stats
+from agentic_bank.core.llm.azure import coalescing_stats, reply_cache_stats
+from agentic_bank.core.cache import cache_stats, static_digest_stats
+from agentic_bank.core import metrics
 
 # Routers (standardized ensemble)
 from agentic_bank.router.router import KeywordRouter, EnsembleRouter, EnsembleConfig
 from agentic_bank.router.semantic_intents import SemanticIntents
 from agentic_bank.router.llm_intent import LLMIntentClassifier
+from agentic_bank.router.local_intent import with_local_fast_path
 from agentic_bank.router.topic_shift import TopicShiftDetector
 from agentic_bank.router.super_router_llm import SuperRouterLLM  # optional fallback
 
@@ -63,8 +73,8 @@ log.info(
 # Stores & registries
 memory = InMemoryStore()
 
-PROFILE = ProfileStore(ROOT / "data" / "profiles")
-CONV = ConversationMemory(ROOT / "data" / "conversations")
+PROFILE = ProfileStore(Path(os.getenv("PROFILES_DIR") or ROOT / "data" / "profiles"))
+CONV = ConversationMemory(Path(os.getenv("CONVERSATIONS_DIR") or ROOT / "data" / "conversations"))
 
 tools = ToolRegistry()
 register_card_tools(tools)
@@ -86,13 +96,35 @@ AGENTS = {
 }
 
 # Routers (ensemble)
-keyword_router = KeywordRouter()
+keyword_router = KeywordRouter(path=os.getenv("ROUTER_KEYWORDS_FILE") or ROOT / "data" / "router" / "keywords.yaml")
 semantic_router = SemanticIntents()
-intent_clf = LLMIntentClassifier()
+intent_clf = with_local_fast_path(LLMIntentClassifier())  # local model first, LLM below threshold
 topic_shift = TopicShiftDetector()
 ensemble = EnsembleRouter(keyword_router, semantic_router, intent_clf, topic_shift, EnsembleConfig())
 super_router = SuperRouterLLM()  # optional tie-breaker
 
+# ------------------------------------------------------------------------------
+# Metrics (GET /metrics, Prometheus text format)
+TURN_SECONDS = metrics.histogram("turn_seconds", "Whole turn latency", ["endpoint", "agent", "status"])
+FIRST_DELTA_SECONDS = metrics.histogram("turn_first_delta_seconds", "Time to the first streamed reply text")
+
+def _component_stats():
+    """Counters the caches, batchers and breakers keep themselves, read at scrape time."""
+    yield metrics.gauges("router_decision_cache", "Routing decision cache", ensemble.decision_cache_stats())
+    yield metrics.gauges("router_cascade", "Routing cascade turns and LLM skips", ensemble.cascade_counts())
+    yield metrics.gauges("topic_vector_cache", "Topic-shift text vector cache", topic_shift.cache_stats())
+    yield metrics.gauges("llm_single_flight", "Coalesced identical LLM requests", coalescing_stats())
+    yield metrics.gauges("llm_reply_cache", "Tool-loop reply cache hits, misses and hit ratio", reply_cache_stats())
+    yield metrics.gauges("response_cache", "LLM response cache (L1 and Redis L2 when REDIS_URL is set)", cache_stats())
+    yield metrics.gauges("llm_static_digests", "Memoized system prompt / tool schema digests", static_digest_stats())
+    policies = resilience_stats()
+    yield metrics.gauges("llm_policy", "Deadline/retry/hedge/breaker counters", policies, by="upstream")
+    yield ("llm_breaker_open", "gauge", "1 while an upstream's circuit is open",
+           {(("upstream", name),): float(st["breaker"] == "open") for name, st in policies.items()})
+    yield metrics.gauges("embedding_batcher", "Embedding micro-batcher counters", embedding_stats(), by="service")
+
+metrics.register_collector(_component_stats)
+
 # ------------------------------------------------------------------------------
 # Simple password auth (mirrors Chainlit demo password)
 def require_demo_password(x_demo_password: Optional[str] = Header(default=None)):
@@ -137,6 +169,10 @@ class MessageResponse(BaseModel):
 def health():
     return {"ok": True}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/start", response_model=StartResponse)
 def start(req: StartRequest, _auth=Depends(require_demo_password)):
     user_id = (req.userId or "demo").strip() or "demo"
@@ -165,18 +201,84 @@ def start(req: StartRequest, _auth=Depends(require_demo_password)):
     )
 
 @app.post("/message", response_model=MessageResponse)
-def message(req: MessageRequest, _auth=Depends(require_demo_password)):
+async def message(req: MessageRequest, _auth=Depends(require_demo_password)):
+    # One embedding per distinct text for the whole turn (routers + FAQ retrieval)
+    with turn_embeddings():
+        async for ev in _observed_turn(req, stream=False):
+            if ev["type"] == "final":
+                return ev["response"]
+
+@app.post("/message/stream")
+async def message_stream(req: MessageRequest, _auth=Depends(require_demo_password)):
+    """
+    Same turn as /message, as Server-Sent Events:
+      event: delta  data: {"text": "..."}          reply text as the agent generates it
+      event: done   data: <MessageResponse JSON>   final, authoritative reply + metadata
+    Clarify/ack/routing-failure replies arrive as a single `done`.
+    """
+    async def events():
+        with turn_embeddings():
+            async for ev in _observed_turn(req, stream=True):
+                if ev["type"] == "delta":
+                    yield _sse("delta", {"text": ev["text"]})
+                elif ev["type"] == "final":
+                    yield _sse("done", ev["response"].model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+DEGRADED_REPLY = "I'm having trouble reaching our assistant service right now. Please try again in a moment."
+
+async def _run_agent(agent, turn: TurnInput, session_mem: Dict[str, Any], stream: bool) -> AsyncIterator[Dict[str, Any]]:
+    """Agent events: reply deltas (only when streaming), then {"type": "outcome"}."""
+    try:
+        if not stream:
+            yield {"type": "outcome", "outcome": await agent.arun(turn, session_mem, tool_exec)}
+            return
+        async for ev in agent.astream(turn, session_mem, tool_exec):
+            yield ev
+    except Exception as e:
+        if not upstream_failed(e):
+            raise
+        # LLM upstream is down or out of retries; keep the session (and active agent) for a retry
+        log.warning(f"agent degraded: {e}", extra={"stage": "api.degraded", "agent": type(agent).__name__})
+        yield {"type": "outcome", "outcome": TurnOutcome(replyText=DEGRADED_REPLY, handledTopic=session_mem.get("handled_topic"))}
+
+async def _observed_turn(req: MessageRequest, stream: bool) -> AsyncIterator[Dict[str, Any]]:
+    """_turn_events(), recording turn latency (and time to first delta when streaming)."""
+    endpoint = "/message/stream" if stream else "/message"
+    t0, first = perf_counter(), True
+    try:
+        async for ev in _turn_events(req, stream):
+            if ev["type"] == "delta" and first:
+                first = False
+                FIRST_DELTA_SECONDS.observe(perf_counter() - t0)
+            elif ev["type"] == "final":
+                took = perf_counter() - t0
+                TURN_SECONDS.observe(took, endpoint=endpoint, agent=ev["response"].agent or "", status="ok")
+                log.info("turn out", extra={"stage": "api.turn.out", "agent": ev["response"].agent,
+                                            "ms": round(took * 1000, 1)})
+            yield ev
+    except Exception:
+        TURN_SECONDS.observe(perf_counter() - t0, endpoint=endpoint, agent="", status="error")
+        raise
+
+async def _turn_events(req: MessageRequest, stream: bool) -> AsyncIterator[Dict[str, Any]]:
+    """One turn as events; the last one is always {"type": "final", "response": MessageResponse}."""
     session_id = req.sessionId
     sess = memory.session(session_id)
     user_id = (req.userId or sess.get("user_id") or "demo").strip() or "demo"
     text = req.text or ""
 
     # persist user's message
-    CONV.append(user_id, session_id, role="user", content=text, meta={})
+    await asyncio.to_thread(CONV.append, user_id, session_id, role="user", content=text, meta={})
 
     # load profile + recent history
-    profile = PROFILE.load(user_id)
-    recent = CONV.last_n(user_id, session_id, n=8)
+    profile = await asyncio.to_thread(PROFILE.load, user_id)
+    recent = await asyncio.to_thread(CONV.last_n, user_id, session_id, n=8)
 
     # build TurnInput
     turn = TurnInput(
@@ -204,8 +306,8 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
         last_t = float(sess.get("last_terminal_at", 0.0) or 0.0)
         if is_acknowledgement(text) and (time() - last_t) <= 120:
             closing = "Great — I’ll close this issue. If you need anything else, just tell me."
-            CONV.append(user_id, session_id, role="assistant", content=closing, meta={"agent": "system"})
-            return MessageResponse(
+            await asyncio.to_thread(CONV.append, user_id, session_id, role="assistant", content=closing, meta={"agent": "system"})
+            yield {"type": "final", "response": MessageResponse(
                 replyText=closing,
                 agent="system",
                 confidence=1.0,
@@ -213,14 +315,20 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
                 handledTopic=sess.get("last_topic") or None,
                 lastTopic=sess.get("last_topic") or None,
                 activeAgent=None
-            )
+            )}
+            return
 
     # --------------- If an agent is active, let it handle this turn ---------------
     if active_agent:
         agent = AGENTS.get(active_agent)
         if agent:
             session_mem = sess.setdefault(active_agent, {})
-            outcome = agent.run(turn, session_mem, tool_exec)
+            outcome = None
+            async for ev in _run_agent(agent, turn, session_mem, stream):
+                if ev["type"] == "outcome":
+                    outcome = ev["outcome"]
+                else:
+                    yield ev
 
             # Promote agent facts
             if any(isinstance(k, str) and k.startswith("__fact_") for k in session_mem.keys()):
@@ -234,7 +342,7 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
                 if isinstance(k, str) and k.startswith("tool:"):
                     tool_out.append(ToolEcho(key=k, value=v))
 
-            CONV.append(user_id, session_id, role="assistant", content=outcome.replyText or "", meta={"agent": active_agent})
+            await asyncio.to_thread(CONV.append, user_id, session_id, role="assistant", content=outcome.replyText or "", meta={"agent": active_agent})
 
             if outcome.isTerminal:
                 sess.pop("active_agent", None)
@@ -244,7 +352,7 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
                 sess["last_was_terminal"] = True
                 sess["last_terminal_at"] = time()
                 log.info("agent terminal", extra={"stage": "api.agent.terminal", "agent": active_agent, "topic": outcome.handledTopic})
-                return MessageResponse(
+                yield {"type": "final", "response": MessageResponse(
                     replyText=outcome.replyText or "(no text)",
                     agent=active_agent,
                     confidence=1.0,
@@ -253,10 +361,11 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
                     toolOutputs=tool_out,
                     lastTopic=sess.get("last_topic") or None,
                     activeAgent=None
-                )
+                )}
+                return
             else:
                 log.info("continue agent", extra={"stage": "api.continue", "agent": active_agent})
-                return MessageResponse(
+                yield {"type": "final", "response": MessageResponse(
                     replyText=outcome.replyText or "(no text)",
                     agent=active_agent,
                     confidence=1.0,
@@ -265,7 +374,8 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
                     toolOutputs=tool_out,
                     lastTopic=sess.get("last_topic") or None,
                     activeAgent=active_agent
-                )
+                )}
+                return
         else:
             sess.pop("active_agent", None)
 
@@ -274,7 +384,7 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
     last_topic = sess.get("last_topic")
     last_topic_time = sess.get("last_topic_time")
 
-    result = ensemble.decide(
+    result = await ensemble.adecide(
         turn,
         last_topic=last_topic,
         last_topic_time=last_topic_time,
@@ -282,12 +392,14 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
     )
 
     debug_signals = [f"{s.source[:3]}={s.agent or '-'}({s.confidence:.2f})" for s in result.signals] or ["no-signals"]
+    if result.skipped:
+        debug_signals.append("skip=" + ",".join(result.skipped))
 
     # Clarify branch
     if result.agent == "__clarify__" and result.clarify:
         sess["router_pending"] = result.clarify
         q = f"(Clarify) {result.clarify['question']}"
-        return MessageResponse(
+        yield {"type": "final", "response": MessageResponse(
             replyText=q,
             agent="__clarify__",
             confidence=1.0,
@@ -296,14 +408,15 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
             debugSignals=debug_signals,
             lastTopic=sess.get("last_topic") or None,
             activeAgent=None
-        )
+        )}
+        return
 
     agent_name, conf = result.agent, result.confidence
 
-    # Optional: escalate to SuperRouter only if ensemble is weak
-    if (not agent_name) or conf < 0.75:
+    # Optional: escalate to SuperRouter only if ensemble is weak (and the cascade did not rule it out)
+    if ((not agent_name) or conf < 0.75) and "super" not in result.skipped:
         try:
-            agent_name2, conf2, followup = super_router.route(
+            agent_name2, conf2, followup = await super_router.aroute(
                 turn,
                 active_agent=None,
                 active_topic=last_topic,
@@ -312,7 +425,7 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
             if agent_name2 == "__clarify__" and followup:
                 sess["router_pending"] = followup
                 q = f"(Clarify) {followup['question']}"
-                return MessageResponse(
+                yield {"type": "final", "response": MessageResponse(
                     replyText=q,
                     agent="__clarify__",
                     confidence=max(conf, conf2),
@@ -321,14 +434,15 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
                     debugSignals=debug_signals,
                     lastTopic=sess.get("last_topic") or None,
                     activeAgent=None
-                )
+                )}
+                return
             if agent_name2:
                 agent_name, conf = agent_name2, max(conf, conf2)
         except Exception as e:
             log.error(f"super route error: {e}", extra={"stage":"api.route.super.err"})
 
     if not agent_name:
-        return MessageResponse(
+        yield {"type": "final", "response": MessageResponse(
             replyText="Sorry, I couldn't route that. Could you rephrase?",
             agent=None,
             confidence=conf or 0.0,
@@ -337,11 +451,12 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
             debugSignals=debug_signals,
             lastTopic=sess.get("last_topic") or None,
             activeAgent=None
-        )
+        )}
+        return
 
     agent = AGENTS.get(agent_name)
     if not agent:
-        return MessageResponse(
+        yield {"type": "final", "response": MessageResponse(
             replyText=f"Agent not found: {agent_name}",
             agent=None,
             confidence=conf or 0.0,
@@ -350,12 +465,18 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
             debugSignals=debug_signals,
             lastTopic=sess.get("last_topic") or None,
             activeAgent=None
-        )
+        )}
+        return
 
     # Execute chosen agent
     sess["last_was_terminal"] = False  # we are engaging
     session_mem = sess.setdefault(agent_name, {})
-    outcome = agent.run(turn, session_mem, tool_exec)
+    outcome = None
+    async for ev in _run_agent(agent, turn, session_mem, stream):
+        if ev["type"] == "outcome":
+            outcome = ev["outcome"]
+        else:
+            yield ev
 
     # Promote facts
     if any(isinstance(k, str) and k.startswith("__fact_") for k in session_mem.keys()):
@@ -387,7 +508,7 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
         "topic": outcome.handledTopic
     })
 
-    return MessageResponse(
+    yield {"type": "final", "response": MessageResponse(
         replyText=outcome.replyText or "(no text)",
         agent=agent_name,
         confidence=float(conf or 0.0),
@@ -397,4 +518,4 @@ def message(req: MessageRequest, _auth=Depends(require_demo_password)):
         toolOutputs=tool_out,
         lastTopic=sess.get("last_topic") or None,
         activeAgent=sess.get("active_agent") or None
-    )
+    )}
@@ -1,37 +1,549 @@
-import os, json, hashlib, time
-from typing import Any, Optional
+import os, sys, json, hashlib, heapq, marshal, time, threading, uuid, weakref, zlib
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from agentic_bank.core.logging import get_logger
+
+_log = get_logger("cache")
+
+# Process-wide response cache bounds (see InMemoryCache)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_EVICTION = os.getenv("CACHE_EVICTION", "lru").lower()          # lru | lfu
+CACHE_SWEEP_SECONDS = float(os.getenv("CACHE_SWEEP_SECONDS", "30"))  # 0 disables the background sweep
+_PRUNE_SLOTS = 4  # due expiry slots cleared per get/set, oldest first
+
+def approx_size(val: Any, _depth: int = 0) -> int:
+    """Rough bytes held by a cached value (containers walked a few levels deep)."""
+    n = sys.getsizeof(val)
+    if _depth >= 4:
+        return n
+    if isinstance(val, dict):
+        return n + sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in val.items())
+    if isinstance(val, (list, tuple, set, frozenset)):
+        return n + sum(approx_size(v, _depth + 1) for v in val)
+    return n
+
+class _Entry:
+    __slots__ = ("val", "exp", "size", "freq")
+    def __init__(self, val: Any, exp: Optional[float], size: int):
+        self.val, self.exp, self.size, self.freq = val, exp, size, 1
 
 class InMemoryCache:
-    def __init__(self): self._d = {}
+    """
+    Bounded TTL cache: at most `max_entries` values and ~`max_bytes` (approx_size) in total.
+    Evicts least recently used (`lru`) or least frequently used (`lfu`, ties by recency);
+    get/set are O(1) (amortized for lfu). Expired entries are dropped on read, a few due expiry
+    slots are cleared on every get/set, and a background sweep clears the rest, so keys that are
+    never read again neither pile up nor count against the bounds (even with the sweep off).
+    """
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 eviction: str = CACHE_EVICTION, sweep_seconds: float = CACHE_SWEEP_SECONDS):
+        if eviction not in ("lru", "lfu"):
+            raise ValueError(f"eviction must be 'lru' or 'lfu', not {eviction!r}")
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.eviction = eviction
+        self._lock = threading.Lock()
+        self._d: "OrderedDict[str, _Entry]" = OrderedDict()      # recency order (lru)
+        self._freq: Dict[int, "OrderedDict[str, None]"] = {}      # freq -> keys by recency (lfu)
+        self._min_freq = 0
+        self._expiry: Dict[int, set] = {}                         # whole second -> keys expiring then
+        self._slots: List[int] = []                               # heap of the _expiry seconds
+        self.bytes = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "rejected": 0}
+        if sweep_seconds > 0:
+            _sweeper.add(self, sweep_seconds)
+
     def get(self, k: str) -> Optional[Any]:
-        v = self._d.get(k); 
-        if not v: return None
-        if v["exp"] and v["exp"] < time.time(): self._d.pop(k, None); return None
-        return v["val"]
+        with self._lock:
+            self._prune(time.monotonic(), _PRUNE_SLOTS)
+            e = self._d.get(k)
+            if e is not None and e.exp is not None and e.exp <= time.monotonic():
+                self._drop(k)
+                self.counters["expired"] += 1
+                e = None
+            if e is None:
+                self.counters["misses"] += 1
+                return None
+            self._touch(k, e)
+            self.counters["hits"] += 1
+            return e.val
+
     def set(self, k: str, val: Any, ttl: int | None = None):
-        self._d[k] = {"val": val, "exp": (time.time() + ttl) if ttl else None}
+        size = approx_size(k) + approx_size(val)
+        exp = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._prune(time.monotonic(), _PRUNE_SLOTS)
+            if k in self._d:
+                self._drop(k)
+            if size > self.max_bytes:
+                self.counters["rejected"] += 1
+                return
+            # Make room first so a new (freq 1) entry is never its own victim under lfu
+            while self._d and (len(self._d) >= self.max_entries or self.bytes + size > self.max_bytes):
+                self._drop(self._victim())
+                self.counters["evictions"] += 1
+            self._d[k] = _Entry(val, exp, size)
+            self.bytes += size
+            if self.eviction == "lfu":
+                self._freq.setdefault(1, OrderedDict())[k] = None
+                self._min_freq = 1
+            if exp is not None:
+                slot = int(exp) + 1
+                keys = self._expiry.get(slot)
+                if keys is None:
+                    keys = self._expiry[slot] = set()
+                    heapq.heappush(self._slots, slot)
+                keys.add(k)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        return {k: v for k in keys if (v := self.get(k)) is not None}
+
+    def delete(self, k: str) -> None:
+        with self._lock:
+            if k in self._d:
+                self._drop(k)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._d.clear()
+            self._freq.clear()
+            self._expiry.clear()
+            self._slots.clear()
+            self.bytes = 0
+
+    def sweep(self) -> int:
+        """Drop entries whose TTL has passed; returns how many were removed."""
+        with self._lock:
+            return self._prune(time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._d), "bytes": self.bytes, "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes, **self.counters}
+
+    # ---- internals (lock held) ----
+
+    def _prune(self, now: float, max_slots: Optional[int] = None) -> int:
+        """Clears the oldest expiry slots that are due (at most `max_slots`); returns entries dropped."""
+        removed = 0
+        while self._slots and self._slots[0] <= now and (max_slots is None or max_slots > 0):
+            for k in self._expiry.pop(heapq.heappop(self._slots)):
+                e = self._d.get(k)
+                if e is not None and e.exp is not None and e.exp <= now:
+                    self._drop(k)
+                    removed += 1
+            if max_slots is not None:
+                max_slots -= 1
+        self.counters["expired"] += removed
+        return removed
+
+    def _touch(self, k: str, e: _Entry) -> None:
+        if self.eviction == "lru":
+            self._d.move_to_end(k)
+            return
+        bucket = self._freq[e.freq]
+        del bucket[k]
+        if not bucket:
+            del self._freq[e.freq]
+            if self._min_freq == e.freq:
+                self._min_freq = e.freq + 1
+        e.freq += 1
+        self._freq.setdefault(e.freq, OrderedDict())[k] = None
+
+    def _victim(self) -> str:
+        if self.eviction == "lru":
+            return next(iter(self._d))
+        if self._min_freq not in self._freq:  # its bucket emptied by a delete/expiry
+            self._min_freq = min(self._freq)
+        return next(iter(self._freq[self._min_freq]))
 
+    def _drop(self, k: str) -> None:
+        e = self._d.pop(k)
+        self.bytes -= e.size
+        if self.eviction == "lfu":
+            bucket = self._freq[e.freq]
+            del bucket[k]
+            if not bucket:
+                del self._freq[e.freq]
+        # a stale key left in an expiry slot is ignored by _prune()
+
+class _Sweeper:
+    """One daemon thread that periodically sweeps every live InMemoryCache."""
+    def __init__(self):
+        self._caches: "weakref.WeakKeyDictionary[InMemoryCache, float]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, cache: InMemoryCache, every: float) -> None:
+        with self._lock:
+            self._caches[cache] = every
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cache-sweeper", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        due: Dict[int, float] = {}
+        while True:
+            with self._lock:
+                caches = list(self._caches.items())
+            now = time.monotonic()
+            for cache, every in caches:
+                if due.get(id(cache), 0.0) <= now:
+                    cache.sweep()
+                    due[id(cache)] = now + every
+            time.sleep(min([every for _, every in caches] + [1.0]))
+
+_sweeper = _Sweeper()
 _cache = InMemoryCache()
 
+class LRUCache:
+    """Size-bounded LRU map with optional TTL and hit/miss counters (thread-safe)."""
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl
+        self._d: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at | None, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    def get(self, k: str) -> Optional[Any]:
+        with self._lock:
+            item = self._d.get(k)
+            if item is None or (item[0] is not None and item[0] < time.monotonic()):
+                if item is not None:
+                    del self._d[k]
+                self.misses += 1
+                return None
+            self._d.move_to_end(k)
+            self.hits += 1
+            return item[1]
+    def set(self, k: str, val: Any):
+        exp = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._d[k] = (exp, val)
+            self._d.move_to_end(k)
+            while len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+                self.evictions += 1
+    def __len__(self) -> int:
+        return len(self._d)
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._d), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+class SingleFlight:
+    """
+    Request coalescing: while a call for `key` is in flight, identical calls wait for
+    it and share its result (or exception) instead of running again. Covers the gap
+    before a cache entry exists. `do` is for threads, `ado` for coroutines.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._tasks: Dict[Tuple[Any, str], "asyncio.Task"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+    def do(self, k: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            fut = self._calls.get(k)
+            leader = fut is None
+            if leader:
+                fut = self._calls[k] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                fut.set_result(fn())
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._calls.pop(k, None)
+        return fut.result()
+    async def ado(self, k: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        # Shared work runs as its own task: a cancelled caller does not cancel it for the others
+        key = (asyncio.get_running_loop(), k)
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                task = self._tasks[key] = asyncio.ensure_future(factory())
+                task.add_done_callback(lambda _t: self._forget(key))
+                self.leaders += 1
+        return await asyncio.shield(task)
+    def _forget(self, key: Tuple[Any, str]) -> None:
+        with self._lock:
+            self._tasks.pop(key, None)
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced,
+                    "inflight": len(self._calls) + len(self._tasks)}
+
+# ---------------- Redis L2 + two-tier cache ----------------
+
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))   # per process, shared by all users of a URL
+REDIS_COMPRESS_MIN = int(os.getenv("REDIS_COMPRESS_MIN", "1024"))        # payload bytes above which values are zlib'd
+CACHE_L1 = os.getenv("CACHE_L1", "1") == "1"                             # in-process tier in front of Redis
+CACHE_L1_TTL_SECONDS = float(os.getenv("CACHE_L1_TTL_SECONDS", "30"))    # bounds L1 staleness if an invalidation is missed
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "agentic_bank:cache:invalidate")
+
 try:
     import redis
-    class RedisCache:
-        def __init__(self, url: str):
-            self.r = redis.from_url(url, decode_responses=True)
-        def get(self, k: str):
-            v = self.r.get(k); 
-            return json.loads(v) if v else None
-        def set(self, k: str, val: Any, ttl: int | None = None):
-            self.r.set(k, json.dumps(val), ex=ttl if ttl else None)
 except Exception:  # redis not installed
-    RedisCache = None
+    redis = None
+
+try:
+    import msgpack
+except Exception:  # optional; marshal is used instead
+    msgpack = None
+
+def pack(val: Any) -> bytes:
+    """
+    Compact binary encoding for Redis values: one header byte naming the codec
+    (P = msgpack, M = marshal; lower case when the body is zlib-compressed), then the body.
+    """
+    if msgpack is not None:
+        codec, body = b"P", msgpack.packb(val, use_bin_type=True)
+    else:
+        codec, body = b"M", marshal.dumps(val, 4)
+    if len(body) >= REDIS_COMPRESS_MIN:
+        return codec.lower() + zlib.compress(body, 1)
+    return codec + body
+
+def unpack(data: bytes) -> Any:
+    codec, body = data[:1], data[1:]
+    if codec.islower():
+        codec, body = codec.upper(), zlib.decompress(body)
+    if codec == b"P" and msgpack is not None:
+        return msgpack.unpackb(body, raw=False)
+    if codec == b"M":
+        return marshal.loads(body)  # Redis is trusted infrastructure; marshal is not safe for untrusted input
+    raise ValueError(f"cannot decode cache value with codec {codec!r}")
+
+_redis_lock = threading.RLock()
+_redis_pools: Dict[str, Any] = {}
+
+def redis_pool(url: str):
+    """One connection pool per Redis URL for the whole process."""
+    with _redis_lock:
+        pool = _redis_pools.get(url)
+        if pool is None:
+            pool = _redis_pools[url] = redis.ConnectionPool.from_url(url, max_connections=REDIS_MAX_CONNECTIONS)
+        return pool
+
+class RedisCache:
+    """
+    Redis-backed cache on the shared pool. Values are pack()ed; multi-key reads are one MGET.
+    Redis errors count as misses (reads) or are dropped (writes) so a cache outage never fails a turn.
+    """
+    def __init__(self, url: str):
+        self.r = redis.Redis(connection_pool=redis_pool(url))
+        self.counters = {"hits": 0, "misses": 0, "errors": 0}
+
+    def get(self, k: str) -> Optional[Any]:
+        return self.get_many([k]).get(k)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        try:
+            raw = self.r.mget(keys)
+        except redis.RedisError as e:
+            self._error("mget", e)
+            return {}
+        out: Dict[str, Any] = {}
+        for k, v in zip(keys, raw):
+            if v is None:
+                continue
+            try:
+                out[k] = unpack(v)
+            except Exception as e:
+                self._error("decode", e)
+        self.counters["hits"] += len(out)
+        self.counters["misses"] += len(keys) - len(out)
+        return out
+
+    def set(self, k: str, val: Any, ttl: int | None = None, notify: Optional[Tuple[str, bytes]] = None):
+        """SET (and PUBLISH `notify` = (channel, message) in the same round trip)."""
+        try:
+            data = pack(val)
+        except Exception as e:  # not encodable; keep it out of the shared tier
+            self._error("encode", e)
+            return
+        self._write(lambda p: p.set(k, data, ex=ttl if ttl else None), notify)
+
+    def delete(self, k: str, notify: Optional[Tuple[str, bytes]] = None):
+        self._write(lambda p: p.delete(k), notify)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+    def _write(self, op: Callable[[Any], Any], notify: Optional[Tuple[str, bytes]]) -> None:
+        try:
+            pipe = self.r.pipeline(transaction=False)
+            op(pipe)
+            if notify:
+                pipe.publish(*notify)
+            pipe.execute()
+        except redis.RedisError as e:
+            self._error("write", e)
+
+    def _error(self, what: str, e: Exception) -> None:
+        self.counters["errors"] += 1
+        _log.warning(f"redis cache {what} failed: {type(e).__name__}: {e}", extra={"stage": "cache.redis"})
+
+class TieredCache:
+    """
+    In-process L1 (InMemoryCache) in front of a shared L2 (RedisCache).
+    Reads go L1 -> L2 and fill L1; writes go to both and are announced on a pub/sub
+    channel so other workers drop their L1 copy. L1 entries live at most `l1_ttl`
+    seconds, and L1 is cleared whenever the subscription (re)connects, so a missed
+    announcement only means bounded staleness.
+    """
+    def __init__(self, l2: RedisCache, l1: Optional[InMemoryCache] = None,
+                 channel: str = CACHE_INVALIDATION_CHANNEL, l1_ttl: float = CACHE_L1_TTL_SECONDS):
+        self.l1 = l1 or InMemoryCache()
+        self.l2 = l2
+        self.channel = channel
+        self.l1_ttl = l1_ttl
+        self.node = uuid.uuid4().hex.encode()  # our own announcements are ignored
+        self.counters = {"invalidations_sent": 0, "invalidations_received": 0, "resyncs": 0}
+        threading.Thread(target=self._listen, name="cache-invalidation", daemon=True).start()
+
+    def get_local(self, k: str) -> Optional[Any]:
+        """L1 only; never touches the network."""
+        return self.l1.get(k)
+
+    def get(self, k: str) -> Optional[Any]:
+        v = self.l1.get(k)
+        return v if v is not None else self.fetch([k]).get(k)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        missing: List[str] = []
+        for k in keys:
+            v = self.l1.get(k)
+            if v is None:
+                missing.append(k)
+            else:
+                out[k] = v
+        if missing:
+            out.update(self.fetch(missing))
+        return out
+
+    def fetch(self, keys: List[str]) -> Dict[str, Any]:
+        """L2 lookup (one MGET) that fills L1 with what it finds."""
+        found = self.l2.get_many(keys)
+        for k, v in found.items():
+            self.l1.set(k, v, ttl=self.l1_ttl)
+        return found
+
+    def set(self, k: str, val: Any, ttl: int | None = None):
+        self.l1.set(k, val, ttl=min(ttl, self.l1_ttl) if ttl else self.l1_ttl)
+        self.l2.set(k, val, ttl, notify=(self.channel, self._announcement(k)))
+        self.counters["invalidations_sent"] += 1
+
+    def delete(self, k: str):
+        self.l1.delete(k)
+        self.l2.delete(k, notify=(self.channel, self._announcement(k)))
+        self.counters["invalidations_sent"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {**{f"l1_{n}": v for n, v in self.l1.stats().items()},
+                **{f"l2_{n}": v for n, v in self.l2.stats().items()}, **self.counters}
+
+    def _announcement(self, k: str) -> bytes:
+        return self.node + b" " + k.encode("utf-8")
+
+    def _listen(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                ps = self.l2.r.pubsub(ignore_subscribe_messages=True)
+                ps.subscribe(self.channel)
+                # Announcements may have been missed while we were not subscribed
+                self.l1.clear()
+                self.counters["resyncs"] += 1
+                backoff = 1.0
+                for msg in ps.listen():
+                    node, _, key = msg["data"].partition(b" ")
+                    if node != self.node:
+                        self.l1.delete(key.decode("utf-8"))
+                        self.counters["invalidations_received"] += 1
+            except Exception as e:
+                _log.warning(f"cache invalidation listener: {type(e).__name__}: {e}", extra={"stage": "cache.pubsub"})
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+_remote_caches: Dict[str, Any] = {}
 
 def get_cache():
+    """Process-wide LLM response cache: L1 + Redis with REDIS_URL (Redis only if CACHE_L1=0), else in-memory."""
     url = os.getenv("REDIS_URL")
-    if url and RedisCache:
-        return RedisCache(url)
-    return _cache
+    if not url or redis is None:
+        return _cache
+    with _redis_lock:
+        cache = _remote_caches.get(url)
+        if cache is None:
+            l2 = RedisCache(url)
+            cache = _remote_caches[url] = TieredCache(l2) if CACHE_L1 else l2
+        return cache
+
+def cache_stats() -> Dict[str, int]:
+    """Counters of the cache get_cache() returns."""
+    return get_cache().stats()
 
 def make_key(prefix: str, payload: Any) -> str:
     s = json.dumps(payload, sort_keys=True, ensure_ascii=False)
     return prefix + ":" + hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+# ---------------- Canonical request keys ----------------
+
+# Message fields the model actually sees; everything else (ts, meta, ids...) is volatile
+REQUEST_MESSAGE_FIELDS = ("role", "content", "name", "tool_calls", "tool_call_id")
+
+def _canonical_json(obj: Any) -> bytes:
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def canonical_messages(messages) -> list:
+    """Messages reduced to the fields sent upstream, so bookkeeping never splits cache keys."""
+    return [{f: m[f] for f in REQUEST_MESSAGE_FIELDS if m.get(f) is not None} for m in messages or []]
+
+# Digests of static request parts (system prompts, tool schemas), by string value or object identity
+_static_digests = LRUCache(maxsize=int(os.getenv("CACHE_STATIC_DIGESTS", "256")))
+
+def static_digest(part: Any) -> str:
+    """
+    SHA-256 of a request part that is reused unchanged across calls, computed once.
+    Non-string parts are remembered by identity, so they must not be mutated after first use.
+    """
+    k = part if isinstance(part, str) else id(part)
+    hit = _static_digests.get(k)
+    if hit is not None and (isinstance(part, str) or hit[0] is part):
+        return hit[1]
+    digest = hashlib.sha256(_canonical_json(part)).hexdigest()
+    _static_digests.set(k, (part, digest))  # keeps `part` alive so its id is not reused
+    return digest
+
+def request_key(prefix: str, messages, *, static: Dict[str, Any] | None = None, **params: Any) -> str:
+    """
+    Cache key for an LLM request: digests of the static parts, the scalar params and
+    the canonical messages. Equal requests map to equal keys whatever bookkeeping
+    fields (timestamps, meta) their messages carry.
+    """
+    h = hashlib.sha256()
+    for name, part in sorted((static or {}).items()):
+        h.update(f"{name}={static_digest(part) if part is not None else ''};".encode("utf-8"))
+    h.update(_canonical_json(params))
+    h.update(_canonical_json(canonical_messages(messages)))
+    return prefix + ":" + h.hexdigest()
+
+def static_digest_stats() -> Dict[str, int]:
+    return _static_digests.stats()
@@ -1,42 +1,264 @@
 import os, json as _json
-from typing import List, Dict, Any, Optional, Tuple
-from openai import AzureOpenAI
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator
+import httpx
+from openai import AzureOpenAI, AsyncAzureOpenAI, DefaultAsyncHttpxClient
 from agentic_bank.core.logging import get_logger
-from agentic_bank.core.cache import get_cache, make_key
+from agentic_bank.core import metrics
+from agentic_bank.core.cache import get_cache, request_key, InMemoryCache, SingleFlight, TieredCache
+from agentic_bank.core.llm.streaming import StreamAccumulator
+from agentic_bank.core.llm.resilience import policy
 
 _log = get_logger("llm.azure")
 
+# Connection pool shared by every AsyncAzureLLM in the process (one per endpoint/key)
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "256"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "64"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+
+# Concurrent identical requests share one upstream call (same digest as the cache keys)
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "1") == "1"
+_FLIGHTS = SingleFlight()
+
+CACHE_LOOKUPS = metrics.counter("llm_cache_lookups_total", "Tool-loop reply cache lookups", ["result"])
+_cache_counts = {"hits": 0, "misses": 0}
+_cache_counts_lock = threading.Lock()  # lookups come from handler, router and tool threads
+
+def _count_lookup(cached: Any) -> None:
+    hit = bool(cached)
+    with _cache_counts_lock:
+        _cache_counts["hits" if hit else "misses"] += 1
+    CACHE_LOOKUPS.inc(result="hit" if hit else "miss")
+
+def reply_cache_stats() -> Dict[str, float]:
+    """Tool-loop reply cache hits, misses and hit ratio since start."""
+    with _cache_counts_lock:
+        counts = dict(_cache_counts)
+    total = counts["hits"] + counts["misses"]
+    return {**counts, "hit_ratio": round(counts["hits"] / total, 4) if total else 0.0}
+
+def coalescing_stats() -> Dict[str, int]:
+    """leaders = upstream calls made, coalesced = calls that waited on one instead."""
+    return _FLIGHTS.stats()
+
+def _azure_settings() -> Tuple[str, str, str, str]:
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    api_key = os.getenv("AZURE_OPENAI_KEY")
+    api_version = os.getenv("AZURE_OPENAI_API_VERSION","2024-08-01-preview")
+    if not endpoint or not api_key:
+        raise RuntimeError("Missing Azure OpenAI env vars")
+    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+    if not deployment:
+        raise RuntimeError("Set AZURE_OPENAI_DEPLOYMENT")
+    return endpoint, api_key, api_version, deployment
+
+_async_clients: Dict[Tuple[str, str, str], AsyncAzureOpenAI] = {}
+
+def _shared_async_client(endpoint: str, api_key: str, api_version: str) -> AsyncAzureOpenAI:
+    # httpx pools are bound to the event loop that first uses them; API and UI each run one loop
+    key = (endpoint, api_key, api_version)
+    client = _async_clients.get(key)
+    if client is None:
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(LLM_HTTP_TIMEOUT, connect=5.0),
+        )
+        client = AsyncAzureOpenAI(azure_endpoint=endpoint, api_key=api_key, api_version=api_version,
+                                  http_client=http_client, max_retries=0)
+        _async_clients[key] = client
+    return client
+
+def _with_system(messages: List[Dict[str, Any]], system: Optional[str]) -> List[Dict[str, Any]]:
+    msgs: List[Dict[str, Any]] = []
+    if system:
+        msgs.append({"role":"system","content":system})
+    msgs.extend(messages)
+    return msgs
+
+def _chat_key(deployment: str, system: Optional[str], messages: List[Dict[str, Any]],
+              json_mode: bool, temperature: float) -> str:
+    return request_key("chat", messages, static={"system": system},
+                       deployment=deployment, json_mode=json_mode, temperature=temperature)
+
+def _tools_cache_key(deployment: str, system: Optional[str], messages: List[Dict[str, Any]],
+                     tools: List[Dict[str, Any]]) -> str:
+    # Input only (no tool results); system prompt and tool schemas are hashed once per process
+    return request_key("chat_with_tools", messages, static={"system": system, "tools": tools},
+                       deployment=deployment)
+
+def _tool_id(fn_name: str) -> str:
+    # function names are tool ids with the first "." replaced by "_"
+    return fn_name.replace("_", ".", 1)
+
+def _cacheable(text: str, summaries: List[Dict[str, Any]], tool_executor) -> bool:
+    # Replaying a reply skips its tool calls: only allowed if every one was read-only and succeeded
+    if not text:
+        return False
+    return not summaries or (tool_executor is not None and all(
+        s["status"] == "ok" and tool_executor.read_only(_tool_id(s["name"])) for s in summaries))
+
+def _coalescable(tools: List[Dict[str, Any]], tool_executor) -> bool:
+    # Callers may share one tool loop only if none of the offered tools has side effects
+    return tool_executor is None or all(
+        tool_executor.read_only(_tool_id(t["function"]["name"])) for t in tools)
+
+def _tool_args(tc) -> Dict[str, Any]:
+    try:
+        return _json.loads(tc.function.arguments or "{}")
+    except Exception:
+        return {}
+
+def _tool_jobs(tool_calls) -> List[Tuple[str, Dict[str, Any]]]:
+    """(tool_id, args) per call."""
+    jobs = []
+    for tc in tool_calls:
+        _log.info("llm tool_call", extra={"stage":"llm.tc", "tool":tc.function.name})
+        jobs.append((_tool_id(tc.function.name), _tool_args(tc)))
+    return jobs
+
+def _no_executor(jobs: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+    return [("error", {"message":"no executor"})] * len(jobs)
+
+def _tool_round(content: Optional[str], tool_calls, jobs, results, summaries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Records one round of tool results in `summaries` and returns the messages for the
+    next request: a single assistant message carrying every tool call, then one tool
+    message per call.
+    """
+    msgs: List[Dict[str, Any]] = [{
+        "role":"assistant",
+        "content": content or None,
+        "tool_calls": [{
+            "id": tc.id,
+            "type": "function",
+            "function": {"name": tc.function.name, "arguments": tc.function.arguments},
+        } for tc in tool_calls],
+    }]
+    for tc, (_, args), (status, data) in zip(tool_calls, jobs, results):
+        fn_name = tc.function.name
+        summaries.append({"name": fn_name, "arguments": args, "status": status, "data": data})
+        _log.info("llm tool_result", extra={"stage":"llm.tc.result", "tool":fn_name, "status":status})
+        msgs.append({
+            "role":"tool",
+            "tool_call_id": tc.id,
+            "name": fn_name,
+            "content": _json.dumps(data),
+        })
+    return msgs
+
 class AzureLLM:
     def __init__(self):
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        api_key = os.getenv("AZURE_OPENAI_KEY")
-        api_version = os.getenv("AZURE_OPENAI_API_VERSION","2024-08-01-preview")
+        endpoint, api_key, api_version, deployment = _azure_settings()
         self.cache = get_cache()
         self.cache_ttl = int(os.getenv("LLM_CACHE_TTL_SECONDS", "120"))  # 2 min default
+        self.deployment = deployment
+        self.client = AzureOpenAI(azure_endpoint=endpoint, api_key=api_key, api_version=api_version, max_retries=0)
+
+    def _create(self, **kwargs):
+        # Deadline/retry/breaker per call; streams are not hedged (the body would be read twice)
+        stream = bool(kwargs.get("stream"))
+        return policy("chat").call(lambda timeout: self.client.chat.completions.create(timeout=timeout, **kwargs),
+                                   hedge=not stream, op="stream" if stream else "request")
 
-        if not endpoint or not api_key:
-            raise RuntimeError("Missing Azure OpenAI env vars")
-        self.deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
-        if not self.deployment:
-            raise RuntimeError("Set AZURE_OPENAI_DEPLOYMENT")
-        self.client = AzureOpenAI(azure_endpoint=endpoint, api_key=api_key, api_version=api_version)
-
-    def chat(self, messages: List[Dict[str, str]], system: Optional[str] = None, json_mode: bool = False) -> str:
-        msgs = []
-        if system:
-            msgs.append({"role":"system","content":system})
-        msgs.extend(messages)
+    def chat(self, messages: List[Dict[str, str]], system: Optional[str] = None, json_mode: bool = False,
+             temperature: float = 0.2) -> str:
+        if not LLM_SINGLE_FLIGHT:
+            return self._chat(messages, system, json_mode, temperature)
+        key = _chat_key(self.deployment, system, messages, json_mode, temperature)
+        return _FLIGHTS.do(key, lambda: self._chat(messages, system, json_mode, temperature))
+
+    def _chat(self, messages, system, json_mode, temperature) -> str:
         kwargs: Dict[str, Any] = {}
         if json_mode:
             kwargs["response_format"] = {"type":"json_object"}
-        resp = self.client.chat.completions.create(
+        resp = self._create(
             model=self.deployment,
-            messages=msgs,
-            temperature=0.2,
+            messages=_with_system(messages, system),
+            temperature=temperature,
             **kwargs
         )
         return resp.choices[0].message.content or ""
 
+    def stream_chat(self, messages: List[Dict[str, str]], system: Optional[str] = None, json_mode: bool = False,
+                    temperature: float = 0.2) -> Iterator[str]:
+        """chat(), yielding text deltas as they arrive."""
+        kwargs: Dict[str, Any] = {}
+        if json_mode:
+            kwargs["response_format"] = {"type":"json_object"}
+        stream = self._create(
+            model=self.deployment,
+            messages=_with_system(messages, system),
+            temperature=temperature,
+            stream=True,
+            **kwargs
+        )
+        acc = StreamAccumulator()
+        for chunk in stream:
+            text = acc.add(chunk)
+            if text:
+                yield text
+
+    def stream_with_tools(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        tools: List[Dict[str, Any]],
+        system: Optional[str] = None,
+        max_iters: int = 4,
+        tool_executor=None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        chat_with_tools() as a stream of events:
+          {"type": "delta", "text"}            reply text as it arrives
+          {"type": "tool", "name", "status"}   after each tool call
+          {"type": "done", "text", "summaries"} last, with the same values chat_with_tools returns
+        """
+        ckey = _tools_cache_key(self.deployment, system, messages, tools)
+        cached = self.cache.get(ckey)
+        _count_lookup(cached)
+        if cached:
+            yield {"type": "delta", "text": cached["text"]}
+            yield {"type": "done", "text": cached["text"], "summaries": cached.get("summaries", [])}
+            return
+
+        msgs = _with_system(messages, system)
+        summaries: List[Dict[str, Any]] = []
+
+        for _ in range(max_iters):
+            stream = self._create(
+                model=self.deployment,
+                messages=msgs,
+                tools=tools,
+                tool_choice="auto",
+                temperature=0.2,
+                stream=True,
+            )
+            acc = StreamAccumulator()
+            for chunk in stream:
+                text = acc.add(chunk)
+                if text:
+                    yield {"type": "delta", "text": text}
+            if not acc.tool_calls:
+                text = acc.text
+                if self.cache_ttl > 0 and _cacheable(text, summaries, tool_executor):
+                    self.cache.set(ckey, {"text": text, "summaries": summaries}, ttl=self.cache_ttl)
+                yield {"type": "done", "text": text, "summaries": summaries}
+                return
+            # Calls of one response run concurrently and go back as a single assistant turn
+            jobs = _tool_jobs(acc.tool_calls)
+            results = tool_executor.call_many(jobs) if tool_executor is not None else _no_executor(jobs)
+            msgs.extend(_tool_round(acc.text, acc.tool_calls, jobs, results, summaries))
+            for s in summaries[-len(jobs):]:
+                yield {"type": "tool", "name": s["name"], "status": s["status"]}
+        _log.error("max iters hit", extra={"stage":"llm.error"})
+        yield {"type": "done", "text": "Sorry, I couldn't complete the request right now.", "summaries": summaries}
+
     def chat_with_tools(
         self,
         messages: List[Dict[str, str]],
@@ -46,27 +268,23 @@ class AzureLLM:
         max_iters: int = 4,
         tool_executor=None,
     ) -> Tuple[str, List[Dict[str, Any]]]:
-        # Build a stable cache key (no tool results, just input)
-        ckey = make_key("chat_with_tools", {
-            "deployment": self.deployment,
-            "system": system,
-            "messages": messages,
-            "tools": tools,
-        })
+        ckey = _tools_cache_key(self.deployment, system, messages, tools)
         cached = self.cache.get(ckey)
+        _count_lookup(cached)
         if cached:
-            # Return cached assistant text only (no summaries since no tool exec)
+            # Only replies whose tools were all read-only are cached (see _cacheable)
             return cached["text"], cached.get("summaries", [])
-        
-        msgs: List[Dict[str, Any]] = []
-        
-        if system:
-            msgs.append({"role":"system","content":system})
-        msgs.extend(messages)
+        run = lambda: self._tools_loop(ckey, messages, tools, system, max_iters, tool_executor)
+        if not LLM_SINGLE_FLIGHT or not _coalescable(tools, tool_executor):
+            return run()
+        return _FLIGHTS.do(ckey, run)
+
+    def _tools_loop(self, ckey, messages, tools, system, max_iters, tool_executor) -> Tuple[str, List[Dict[str, Any]]]:
+        msgs = _with_system(messages, system)
         summaries: List[Dict[str, Any]] = []
-        
+
         for _ in range(max_iters):
-            resp = self.client.chat.completions.create(
+            resp = self._create(
                 model=self.deployment,
                 messages=msgs,
                 tools=tools,
@@ -77,36 +295,181 @@ class AzureLLM:
             if not getattr(msg, "tool_calls", None):
                 _log.debug("assistant text", extra={"stage":"llm.reply"})
                 text = msg.content or ""
-                if self.cache_ttl > 0 and text:
+                if self.cache_ttl > 0 and _cacheable(text, summaries, tool_executor):
                     self.cache.set(ckey, {"text": text, "summaries": summaries}, ttl=self.cache_ttl)
                 return text, summaries
-            for tc in msg.tool_calls:
-                fn_name = tc.function.name
-                _log.info("llm tool_call", extra={"stage":"llm.tc", "tool":fn_name})
-                try:
-                    args = _json.loads(tc.function.arguments or "{}")
-                except Exception:
-                    args = {}
-                status, data = ("error", {"message":"no executor"})
-                if tool_executor is not None:
-                    tool_id = fn_name.replace("_", ".", 1)
-                    status, data = tool_executor.call(tool_id, args)
-                summaries.append({"name": fn_name, "arguments": args, "status": status, "data": data})
-                _log.info("llm tool_result", extra={"stage":"llm.tc.result", "tool":fn_name, "status":status})
-                msgs.append({
-                    "role":"assistant",
-                    "content": None,
-                    "tool_calls": [{
-                        "id": tc.id,
-                        "type": "function",
-                        "function": {"name": fn_name, "arguments": tc.function.arguments},
-                    }],
-                })
-                msgs.append({
-                    "role":"tool",
-                    "tool_call_id": tc.id,
-                    "name": fn_name,
-                    "content": _json.dumps(data),
-                })
+            # Calls of one response run concurrently and go back as a single assistant turn
+            jobs = _tool_jobs(msg.tool_calls)
+            results = tool_executor.call_many(jobs) if tool_executor is not None else _no_executor(jobs)
+            msgs.extend(_tool_round(msg.content, msg.tool_calls, jobs, results, summaries))
+        _log.error("max iters hit", extra={"stage":"llm.error"})
+        return ("Sorry, I couldn't complete the request right now.", summaries)
+
+class AsyncAzureLLM:
+    """
+    Async counterpart of AzureLLM for the FastAPI/Chainlit hot paths: same prompts,
+    cache keys and TTL, on a process-wide AsyncAzureOpenAI client and connection pool.
+    Tools run through ToolExecutor.acall.
+    """
+    def __init__(self):
+        endpoint, api_key, api_version, deployment = _azure_settings()
+        self.cache = get_cache()
+        self.cache_ttl = int(os.getenv("LLM_CACHE_TTL_SECONDS", "120"))  # 2 min default
+        self.deployment = deployment
+        self.client = _shared_async_client(endpoint, api_key, api_version)
+
+    async def _create(self, **kwargs):
+        stream = bool(kwargs.get("stream"))
+        return await policy("chat").acall(
+            lambda timeout: self.client.chat.completions.create(timeout=timeout, **kwargs),
+            hedge=not stream, op="stream" if stream else "request")
+
+    async def _cache_get(self, key: str):
+        # Redis is a blocking client; keep it off the event loop (L1 hits stay on it)
+        if isinstance(self.cache, InMemoryCache):
+            return self.cache.get(key)
+        if isinstance(self.cache, TieredCache):
+            hit = self.cache.get_local(key)
+            if hit is not None:
+                return hit
+            return (await asyncio.to_thread(self.cache.fetch, [key])).get(key)
+        return await asyncio.to_thread(self.cache.get, key)
+
+    async def _cache_set(self, key: str, val: Any, ttl: int) -> None:
+        if isinstance(self.cache, InMemoryCache):
+            self.cache.set(key, val, ttl=ttl)
+        else:
+            await asyncio.to_thread(self.cache.set, key, val, ttl)
+
+    async def chat(self, messages: List[Dict[str, str]], system: Optional[str] = None, json_mode: bool = False,
+                   temperature: float = 0.2) -> str:
+        if not LLM_SINGLE_FLIGHT:
+            return await self._chat(messages, system, json_mode, temperature)
+        key = _chat_key(self.deployment, system, messages, json_mode, temperature)
+        return await _FLIGHTS.ado(key, lambda: self._chat(messages, system, json_mode, temperature))
+
+    async def _chat(self, messages, system, json_mode, temperature) -> str:
+        kwargs: Dict[str, Any] = {}
+        if json_mode:
+            kwargs["response_format"] = {"type":"json_object"}
+        resp = await self._create(
+            model=self.deployment,
+            messages=_with_system(messages, system),
+            temperature=temperature,
+            **kwargs
+        )
+        return resp.choices[0].message.content or ""
+
+    async def stream_chat(self, messages: List[Dict[str, str]], system: Optional[str] = None,
+                          json_mode: bool = False, temperature: float = 0.2) -> AsyncIterator[str]:
+        """chat(), yielding text deltas as they arrive."""
+        kwargs: Dict[str, Any] = {}
+        if json_mode:
+            kwargs["response_format"] = {"type":"json_object"}
+        stream = await self._create(
+            model=self.deployment,
+            messages=_with_system(messages, system),
+            temperature=temperature,
+            stream=True,
+            **kwargs
+        )
+        acc = StreamAccumulator()
+        async for chunk in stream:
+            text = acc.add(chunk)
+            if text:
+                yield text
+
+    async def stream_with_tools(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        tools: List[Dict[str, Any]],
+        system: Optional[str] = None,
+        max_iters: int = 4,
+        tool_executor=None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async AzureLLM.stream_with_tools (same events)."""
+        ckey = _tools_cache_key(self.deployment, system, messages, tools)
+        cached = await self._cache_get(ckey)
+        _count_lookup(cached)
+        if cached:
+            yield {"type": "delta", "text": cached["text"]}
+            yield {"type": "done", "text": cached["text"], "summaries": cached.get("summaries", [])}
+            return
+
+        msgs = _with_system(messages, system)
+        summaries: List[Dict[str, Any]] = []
+
+        for _ in range(max_iters):
+            stream = await self._create(
+                model=self.deployment,
+                messages=msgs,
+                tools=tools,
+                tool_choice="auto",
+                temperature=0.2,
+                stream=True,
+            )
+            acc = StreamAccumulator()
+            async for chunk in stream:
+                text = acc.add(chunk)
+                if text:
+                    yield {"type": "delta", "text": text}
+            if not acc.tool_calls:
+                text = acc.text
+                if self.cache_ttl > 0 and _cacheable(text, summaries, tool_executor):
+                    await self._cache_set(ckey, {"text": text, "summaries": summaries}, self.cache_ttl)
+                yield {"type": "done", "text": text, "summaries": summaries}
+                return
+            # Calls of one response run concurrently and go back as a single assistant turn
+            jobs = _tool_jobs(acc.tool_calls)
+            results = await tool_executor.acall_many(jobs) if tool_executor is not None else _no_executor(jobs)
+            msgs.extend(_tool_round(acc.text, acc.tool_calls, jobs, results, summaries))
+            for s in summaries[-len(jobs):]:
+                yield {"type": "tool", "name": s["name"], "status": s["status"]}
+        _log.error("max iters hit", extra={"stage":"llm.error"})
+        yield {"type": "done", "text": "Sorry, I couldn't complete the request right now.", "summaries": summaries}
+
+    async def chat_with_tools(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        tools: List[Dict[str, Any]],
+        system: Optional[str] = None,
+        max_iters: int = 4,
+        tool_executor=None,
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        ckey = _tools_cache_key(self.deployment, system, messages, tools)
+        cached = await self._cache_get(ckey)
+        _count_lookup(cached)
+        if cached:
+            return cached["text"], cached.get("summaries", [])
+        run = lambda: self._tools_loop(ckey, messages, tools, system, max_iters, tool_executor)
+        if not LLM_SINGLE_FLIGHT or not _coalescable(tools, tool_executor):
+            return await run()
+        return await _FLIGHTS.ado(ckey, run)
+
+    async def _tools_loop(self, ckey, messages, tools, system, max_iters, tool_executor) -> Tuple[str, List[Dict[str, Any]]]:
+        msgs = _with_system(messages, system)
+        summaries: List[Dict[str, Any]] = []
+
+        for _ in range(max_iters):
+            resp = await self._create(
+                model=self.deployment,
+                messages=msgs,
+                tools=tools,
+                tool_choice="auto",
+                temperature=0.2,
+            )
+            msg = resp.choices[0].message
+            if not getattr(msg, "tool_calls", None):
+                _log.debug("assistant text", extra={"stage":"llm.reply"})
+                text = msg.content or ""
+                if self.cache_ttl > 0 and _cacheable(text, summaries, tool_executor):
+                    await self._cache_set(ckey, {"text": text, "summaries": summaries}, self.cache_ttl)
+                return text, summaries
+            # Calls of one response run concurrently and go back as a single assistant turn
+            jobs = _tool_jobs(msg.tool_calls)
+            results = await tool_executor.acall_many(jobs) if tool_executor is not None else _no_executor(jobs)
+            msgs.extend(_tool_round(msg.content, msg.tool_calls, jobs, results, summaries))
         _log.error("max iters hit", extra={"stage":"llm.error"})
-        return ("Sorry, I couldn't complete the request right now.", summaries)
\ No newline at end of file
+        return ("Sorry, I couldn't complete the request right now.", summaries)
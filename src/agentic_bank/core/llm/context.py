@@ -0,0 +1,97 @@
+"""
+Token-budgeted prompt context (conversation history + session facts).
+
+pack_context() keeps prompts bounded as sessions grow:
+- messages are reduced to role/content (`ts` and `meta` are dropped) and the most
+  recent ones are kept first until the budget is spent; over-long messages are clipped;
+- facts drop `tool:` entries (raw tool payloads; summaries already sit in the facts);
+- everything is serialized as compact JSON.
+
+Tokens are counted with tiktoken when it is installed, otherwise estimated locally
+(~4 characters per token, which over-counts slightly for English).
+Budgets come from CONTEXT_TOKENS_<NAME> (e.g. CONTEXT_TOKENS_CARDS), then CONTEXT_TOKENS.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List
+import json
+import math
+import os
+
+try:
+    import tiktoken
+    _ENC = tiktoken.get_encoding(os.getenv("CONTEXT_TOKENIZER", "o200k_base"))
+except Exception:  # tiktoken not installed (or encoding unavailable offline)
+    _ENC = None
+
+CONTEXT_TOKENS = int(os.getenv("CONTEXT_TOKENS", "1200"))
+# Longest single history message kept whole; longer ones are clipped to this many tokens
+CONTEXT_MESSAGE_TOKENS = int(os.getenv("CONTEXT_MESSAGE_TOKENS", "300"))
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENC is not None:
+        return len(_ENC.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+def compact_json(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def budget_for(name: str) -> int:
+    """Token budget for one prompt's variable context."""
+    return int(os.getenv(f"CONTEXT_TOKENS_{name.upper()}", str(CONTEXT_TOKENS)))
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _ENC is not None:
+        return _ENC.decode(_ENC.encode(text, disallowed_special=())[:max_tokens]) + "…"
+    return text[:max_tokens * 4] + "…"
+
+
+def slim_facts(facts: Dict[str, Any] | None) -> Dict[str, Any]:
+    return {k: v for k, v in (facts or {}).items() if not (isinstance(k, str) and k.startswith("tool:"))}
+
+
+@dataclass
+class PackedContext:
+    messages: List[Dict[str, str]]   # chronological
+    facts: Dict[str, Any]
+    tokens: int                      # of messages + facts as compact JSON
+    dropped: int                     # history messages left out
+
+    @property
+    def messages_json(self) -> str:
+        return compact_json(self.messages)
+
+    @property
+    def facts_json(self) -> str:
+        return compact_json(self.facts)
+
+
+def pack_context(recent_messages: List[Dict[str, Any]] | None, facts: Dict[str, Any] | None, *,
+                 budget: int, reserved: int = 0) -> PackedContext:
+    """
+    Fit history and facts into `budget` tokens minus `reserved` (the caller's other
+    variable text, e.g. the user's message). Facts are kept whole; history fills what is left.
+    """
+    kept_facts = slim_facts(facts)
+    left = budget - reserved - count_tokens(compact_json(kept_facts))
+    msgs = [m for m in (recent_messages or []) if m.get("content")]
+    kept: List[Dict[str, str]] = []
+    for m in reversed(msgs):
+        slim = {"role": str(m.get("role") or "user"), "content": _clip(str(m["content"]), CONTEXT_MESSAGE_TOKENS)}
+        cost = count_tokens(compact_json(slim)) + 1
+        if cost > left:
+            break
+        kept.append(slim)
+        left -= cost
+    kept.reverse()
+    packed = PackedContext(kept, kept_facts, 0, len(msgs) - len(kept))
+    packed.tokens = count_tokens(packed.messages_json) + count_tokens(packed.facts_json)
+    return packed
@@ -1,30 +1,280 @@
+import atexit
 import os
-from typing import List
+import queue
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import numpy as np
 from openai import AzureOpenAI
+from agentic_bank.core.llm.resilience import policy
 
-def embed_texts(texts: List[str]) -> np.ndarray:
-    model = os.getenv("AZURE_OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-   
-    client = AzureOpenAI(
-        api_version=os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION", "2024-12-01-preview"),
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        api_key=api_key
-    )
-   
-    resp = client.embeddings.create(
-        input=texts,
-        model=model
+# Embeddings deployment of the semantic router and the FAQ retriever; within a turn
+# each (model, text) pair is embedded once and reused by every consumer.
+EMBED_MODEL = (
+    os.getenv("AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT")
+    or os.getenv("AZURE_OPENAI_EMBEDDING_MODEL")
+    or "text-embedding-3-large"
+)
+
+def create_embeddings(client, texts: List[str], model: str) -> List[List[float]]:
+    """client.embeddings.create under the shared "embeddings" deadline/hedge/retry/breaker policy."""
+    resp = policy("embeddings").call(
+        lambda timeout: client.embeddings.create(input=texts, model=model, timeout=timeout)
     )
-  
-    vecs = [d.embedding for d in resp.data]
-   
+    return [d.embedding for d in resp.data]
+
+# ---------------- Shared client + micro-batching ----------------
+
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "64"))          # inputs per request
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))  # how long the first request waits for company
+EMBED_BATCH_INFLIGHT = int(os.getenv("EMBED_BATCH_INFLIGHT", "8"))  # batched requests in flight per service
+
+_client_lock = threading.Lock()
+_shared_client: Optional[AzureOpenAI] = None
+
+def shared_embeddings_client() -> AzureOpenAI:
+    """One pooled Azure OpenAI client for every embeddings consumer in the process."""
+    global _shared_client
+    with _client_lock:
+        if _shared_client is None:
+            _shared_client = AzureOpenAI(
+                api_version=os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION", "2024-12-01-preview"),
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                api_key=os.getenv("AZURE_OPENAI_API_KEY") or os.getenv("AZURE_OPENAI_KEY"),
+                max_retries=0,
+            )
+        return _shared_client
+
+class EmbeddingBatcher:
+    """
+    Coalesces small embedding requests from concurrent turns into batched calls.
+    A request made while no other is queued or in flight is sent at once on the calling
+    thread. Otherwise it is queued: the first queued request waits up to `max_wait_ms`
+    (or until `max_batch` inputs are queued), then one request is sent for the distinct
+    texts and the vectors are fanned back out. Requests already at `max_batch` inputs
+    bypass the queue.
+    close() stops the collector thread and sender pool; later requests are sent unbatched.
+    """
+    def __init__(self, client, model: str, max_batch: int = EMBED_BATCH_MAX,
+                 max_wait_ms: float = EMBED_BATCH_WAIT_MS, max_inflight: int = EMBED_BATCH_INFLIGHT):
+        self.client = client
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._q: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._senders = ThreadPoolExecutor(max_workers=max(1, max_inflight), thread_name_prefix="embed-batch")
+        self._lock = threading.Lock()
+        self._closed = False
+        self._busy = 0  # requests queued or being sent through the batcher
+        self.counters = {"requests": 0, "inputs": 0, "batches": 0, "sent_inputs": 0, "immediate": 0}
+        threading.Thread(target=self._collect, name="embed-batcher", daemon=True).start()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        self._count(requests=1, inputs=len(texts))
+        fut: Future = Future()
+        with self._lock:
+            direct = self._closed or len(texts) >= self.max_batch
+            alone = not direct and self._busy == 0
+            if not direct:
+                self._busy += 1
+                if not alone:
+                    self._q.put((list(texts), fut))
+        if direct:
+            self._count(batches=1, sent_inputs=len(texts))
+            return create_embeddings(self.client, texts, self.model)
+        if alone:
+            # Nothing to wait for: no collection window; requests arriving meanwhile are batched
+            self._count(immediate=1)
+            self._send([(list(texts), fut)])
+        return fut.result()
+
+    def close(self) -> None:
+        """Sends what is queued, then stops the collector thread and the sender pool."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._q.put(None)
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for k, n in deltas.items():
+                self.counters[k] += n
+
+    def _collect(self) -> None:
+        while True:
+            first = self._q.get()
+            if first is None:
+                self._senders.shutdown(wait=False)
+                return
+            batch = [first]
+            n = len(first[0])
+            until = monotonic() + self.max_wait
+            while n < self.max_batch:
+                try:
+                    item = self._q.get(timeout=max(0.0, until - monotonic())) if self.max_wait else self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:  # closed: send this batch, then stop
+                    self._q.put(None)
+                    break
+                batch.append(item)
+                n += len(item[0])
+            self._senders.submit(self._send, batch)
+
+    def _send(self, batch: List[Tuple[List[str], Future]]) -> None:
+        unique = list(dict.fromkeys(t for texts, _ in batch for t in texts))
+        self._count(batches=1, sent_inputs=len(unique))
+        try:
+            vecs = dict(zip(unique, create_embeddings(self.client, unique, self.model)))
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        finally:
+            with self._lock:
+                self._busy -= len(batch)
+        for texts, fut in batch:
+            fut.set_result([vecs[t] for t in texts])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, queued=self._q.qsize())
+
+class _ClientRef:
+    """Weak reference to a client where possible, so a service never keeps its client alive."""
+    def __init__(self, client):
+        try:
+            self._ref: Callable[[], Any] = weakref.ref(client)
+        except TypeError:  # e.g. __slots__ without __weakref__
+            self._ref = lambda: client
+
+    def __getattr__(self, name: str):
+        client = self._ref()
+        if client is None:
+            raise RuntimeError("embeddings client was garbage collected")
+        return getattr(client, name)
+
+# client -> {model: batcher}; an entry goes (and its batcher is closed) with its client
+_services: "weakref.WeakKeyDictionary[Any, Dict[str, EmbeddingBatcher]]" = weakref.WeakKeyDictionary()
+_strong_services: Dict[int, Tuple[Any, Dict[str, EmbeddingBatcher]]] = {}  # clients that take no weakref
+
+def _client_services(client) -> Dict[str, EmbeddingBatcher]:
+    try:
+        svcs = _services.get(client)
+        if svcs is None:
+            svcs = _services[client] = {}
+            weakref.finalize(client, _close_all, svcs)
+        return svcs
+    except TypeError:
+        return _strong_services.setdefault(id(client), (client, {}))[1]
+
+def embedding_service(model: Optional[str] = None, client=None) -> EmbeddingBatcher:
+    """Process-wide batcher per (model, client); the shared client by default."""
+    model = model or EMBED_MODEL
+    client = client or shared_embeddings_client()
+    with _client_lock:
+        svcs = _client_services(client)
+        svc = svcs.get(model)
+        if svc is None:
+            svc = svcs[model] = EmbeddingBatcher(_ClientRef(client), model)
+        return svc
+
+def _close_all(svcs: Dict[str, EmbeddingBatcher]) -> None:
+    for svc in list(svcs.values()):
+        svc.close()
+
+def close_embedding_services() -> None:
+    """Stops every batcher started by embedding_service(); runs at interpreter exit."""
+    with _client_lock:
+        groups = list(_services.values()) + [svcs for _, svcs in _strong_services.values()]
+        _services.clear()
+        _strong_services.clear()
+    for svcs in groups:
+        _close_all(svcs)
+
+atexit.register(close_embedding_services)
+
+def embedding_stats() -> Dict[str, Dict[str, int]]:
+    with _client_lock:
+        groups = list(_services.values()) + [svcs for _, svcs in _strong_services.values()]
+    services = [(model, svc) for svcs in groups for model, svc in svcs.items()]
+    return {f"{model}#{i}": svc.stats() for i, (model, svc) in enumerate(services)}
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    vecs = embedding_service(EMBED_MODEL).embed(list(texts))
     return np.array(vecs, dtype=np.float32)
 
+def l2_normalize(x: np.ndarray) -> np.ndarray:
+    """Unit-normalize a vector, or each row of a matrix, as float32."""
+    x = np.asarray(x, dtype=np.float32)
+    if x.ndim == 1:
+        return x / (np.linalg.norm(x) + 1e-12)
+    return x / (np.linalg.norm(x, axis=1, keepdims=True) + 1e-12)
+
 def cosine_sim_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
-    a_norm = a / (np.linalg.norm(a, axis=1, keepdims=True) + 1e-12)
-    b_norm = b / (np.linalg.norm(b, axis=1, keepdims=True) + 1e-12)
-    return a_norm @ b_norm.T
+    return l2_normalize(a) @ l2_normalize(b).T
+
+# ---------------- Turn-scoped embedding reuse ----------------
+
+Fetch = Callable[[List[str]], List[List[float]]]
+
+class TurnEmbeddings:
+    """
+    Vectors embedded during one turn, keyed by (model, text).
+    Safe to share across the router's worker threads: concurrent requests for the
+    same pair wait on the first caller's fetch instead of embedding again.
+    """
+    def __init__(self):
+        self._vecs: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model: str, text: str, fetch: Fetch) -> List[float]:
+        key = (model, text)
+        with self._lock:
+            fut = self._vecs.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._vecs[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        if owner:
+            try:
+                fut.set_result(list(fetch([text])[0]))
+            except Exception as e:
+                with self._lock:
+                    self._vecs.pop(key, None)  # let a later caller retry
+                fut.set_exception(e)
+        return fut.result()
+
+_turn: ContextVar[Optional[TurnEmbeddings]] = ContextVar("turn_embeddings", default=None)
 
+@contextmanager
+def turn_embeddings() -> Iterator[TurnEmbeddings]:
+    """Open a turn scope (or join the enclosing one) for embed_for_turn()."""
+    ctx = _turn.get()
+    if ctx is not None:
+        yield ctx
+        return
+    ctx = TurnEmbeddings()
+    token = _turn.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _turn.reset(token)
 
+def embed_for_turn(model: str, text: str, fetch: Fetch) -> List[float]:
+    """Embed `text` at most once per (model, text) within the current turn scope."""
+    ctx = _turn.get()
+    if ctx is None:
+        return list(fetch([text])[0])
+    return ctx.get(model, text, fetch)
@@ -0,0 +1,101 @@
+"""
+Compact storage for normalized embedding vectors.
+
+- Matryoshka truncation: keep the first `dim` components and re-normalize
+  (text-embedding-3 models are trained so that prefixes stay meaningful).
+- dtype: "float32", "float16", or "int8" with one float32 scale per vector
+  (x ~= scale * codes, scale = max|x| / 127).
+
+Scores are computed on the stored codes (row chunks are widened to float32
+on the fly) against queries truncated the same way, so callers keep passing
+full-size API embeddings.
+
+Defaults come from EMBED_STORE_DIM (0 = keep all) and EMBED_STORE_DTYPE.
+"""
+from __future__ import annotations
+from typing import Optional
+import os
+import numpy as np
+from agentic_bank.core.llm.embeddings import l2_normalize
+
+EMBED_STORE_DIM = int(os.getenv("EMBED_STORE_DIM", "0"))
+EMBED_STORE_DTYPE = os.getenv("EMBED_STORE_DTYPE", "float32").lower()
+
+DTYPES = ("float32", "float16", "int8")
+
+# Rows widened to float32 per step while scoring int8/float16 codes
+_CHUNK = 4096
+
+
+def truncate(x: np.ndarray, dim: int | None) -> np.ndarray:
+    """First `dim` components of each row (or of a vector), re-normalized."""
+    x = np.asarray(x, dtype=np.float32)
+    if dim and dim < x.shape[-1]:
+        x = x[..., :dim]
+    return l2_normalize(x)
+
+
+class CompactVectors:
+    """Row-wise normalized vectors, optionally truncated and quantized."""
+
+    def __init__(self, codes: np.ndarray, scale: Optional[np.ndarray], dtype: str):
+        self.codes = codes
+        self.scale = scale
+        self.dtype = dtype
+
+    @classmethod
+    def from_float(cls, mat: np.ndarray, dim: int | None = None, dtype: str | None = None) -> "CompactVectors":
+        dim = EMBED_STORE_DIM if dim is None else dim
+        dtype = (dtype or EMBED_STORE_DTYPE).lower()
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown embedding storage dtype: {dtype}")
+        x = truncate(np.atleast_2d(np.asarray(mat, dtype=np.float32)), dim) if len(mat) else \
+            np.zeros((0, min(dim or np.inf, np.shape(mat)[-1])), dtype=np.float32)
+        if dtype == "int8":
+            scale = (np.abs(x).max(axis=1, initial=0.0) / 127.0).astype(np.float32)
+            scale[scale == 0] = 1.0
+            codes = np.clip(np.rint(x / scale[:, None]), -127, 127).astype(np.int8)
+            return cls(codes, scale, dtype)
+        return cls(x.astype(dtype), None, dtype)
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1]
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    def __getitem__(self, rows) -> "CompactVectors":
+        """Row subset (slices are views, index arrays copy)."""
+        scale = self.scale[rows] if self.scale is not None else None
+        return CompactVectors(self.codes[rows], scale, self.dtype)
+
+    def prepare(self, Q: np.ndarray) -> np.ndarray:
+        """Queries in the stored space: (n, dim) float32, truncated and normalized."""
+        return truncate(np.atleast_2d(Q), self.dim)
+
+    def dense(self) -> np.ndarray:
+        """float32 reconstruction (n, dim)."""
+        x = self.codes.astype(np.float32)
+        return x * self.scale[:, None] if self.scale is not None else x
+
+    def scores(self, Q: np.ndarray, prepared: bool = False) -> np.ndarray:
+        """(n_queries, n_rows) inner products with the stored rows."""
+        Q = Q if prepared else self.prepare(Q)
+        if self.dtype == "float32":
+            return Q @ self.codes.T
+        out = np.empty((Q.shape[0], len(self)), dtype=np.float32)
+        for i in range(0, len(self), _CHUNK):
+            block = self.codes[i:i + _CHUNK].astype(np.float32)
+            out[:, i:i + _CHUNK] = Q @ block.T
+        if self.scale is not None:
+            out *= self.scale[None, :]
+        return out
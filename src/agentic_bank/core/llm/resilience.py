@@ -0,0 +1,424 @@
+"""
+Deadlines, hedging, retries and circuit breaking around Azure OpenAI calls.
+
+    policy("chat").call(lambda timeout: client.chat.completions.create(..., timeout=timeout))
+    await policy("chat").acall(lambda timeout: aclient.chat.completions.create(..., timeout=timeout))
+
+Per logical call:
+- deadline: every attempt gets the remaining budget as its request timeout.
+- hedging: if an attempt has not answered after the recent `hedge_quantile`
+  latency, a duplicate is sent and the first answer wins (async losers are cancelled).
+  At most `hedge_max_share` of calls are hedged. Sync calls run on the calling
+  thread unless a hedge pool worker is idle for them; a backup is only sent when
+  another worker is idle, so queueing never triggers or delays a hedge.
+- retries: 429 / 5xx / timeouts / connection errors, full-jitter exponential backoff,
+  honouring Retry-After, never past the deadline.
+- circuit breaker: after `breaker_failures` consecutive failed attempts calls fail fast
+  with CircuitOpenError for `breaker_reset_s`; then traffic is let through again and the
+  first result closes (or re-opens) it. Callers treat CircuitOpenError as "use the
+  degraded path" (the router drops to keyword-only); the API and UI answer with a
+  fallback for any upstream_failed() error, which also covers exhausted retries.
+
+Policies are per upstream ("chat", "embeddings"), configured from env with the
+prefixes LLM_ and EMBED_ (e.g. LLM_DEADLINE_S, EMBED_RETRIES).
+Every logical call is recorded in llm_call_seconds, and the usage of non-streamed
+responses in llm_tokens_total.
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from time import monotonic, sleep
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import numpy as np
+import openai
+from agentic_bank.core.logging import get_logger
+from agentic_bank.core import metrics
+
+log = get_logger("llm.resilience")
+
+CALL_SECONDS = metrics.histogram(
+    "llm_call_seconds", "Azure OpenAI call latency incl. retries and hedges (streams: until the response starts)",
+    ["upstream", "op", "status"])
+TOKENS = metrics.counter("llm_tokens_total", "Tokens reported in Azure OpenAI usage", ["upstream", "kind"])
+
+T = TypeVar("T")
+
+
+class _HedgePool:
+    """Threads that carry sync attempts so a hedge can race the original request; never queues."""
+    def __init__(self, workers: int):
+        self.workers = max(0, workers)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._busy = 0
+
+    def idle(self) -> int:
+        return self.workers - self._busy
+
+    def try_submit(self, fn: Callable[..., T], *args) -> Optional["Future[T]"]:
+        """Runs `fn` on an idle worker, or returns None when every worker is busy."""
+        with self._lock:
+            if self._busy >= self.workers:
+                return None
+            self._busy += 1
+        fut = self._pool.submit(contextvars.copy_context().run, fn, *args)
+        fut.add_done_callback(self._release)
+        return fut
+
+    def _release(self, _f) -> None:
+        with self._lock:
+            self._busy -= 1
+
+
+_HEDGE_POOL = _HedgePool(int(os.getenv("LLM_HEDGE_WORKERS", "32")))
+
+
+class CircuitOpenError(RuntimeError):
+    """The upstream is failing; the call was refused without being sent."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """No attempt answered within the call's deadline."""
+
+
+def _retryable(e: BaseException) -> bool:
+    if isinstance(e, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    status = getattr(e, "status_code", None)
+    return status == 429 or (isinstance(status, int) and status >= 500)
+
+
+def upstream_failed(e: BaseException) -> bool:
+    """True for the errors a policy gives up with: open breaker, deadline, retries exhausted."""
+    return isinstance(e, (CircuitOpenError, DeadlineExceeded)) or _retryable(e)
+
+
+def _retry_after(e: BaseException) -> float:
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after-ms")) / 1000.0
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open (fail fast) -> half-open (let traffic probe)."""
+    def __init__(self, name: str, failures: int = 5, reset_s: float = 30.0):
+        self.name = name
+        self.failures = max(1, failures)
+        self.reset_s = reset_s
+        self._lock = threading.Lock()
+        self._count = 0
+        self._opened_at: Optional[float] = None
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "open" if monotonic() - self._opened_at < self.reset_s else "half_open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                log.info(f"{self.name} circuit closed", extra={"stage": "llm.breaker"})
+            self._count = 0
+            self._opened_at = None
+
+    def failure(self) -> None:
+        with self._lock:
+            self._count += 1
+            half_open = self._opened_at is not None
+            if half_open or self._count >= self.failures:
+                if not half_open:
+                    self.trips += 1
+                    log.warning(f"{self.name} circuit opened after {self._count} failures",
+                                extra={"stage": "llm.breaker"})
+                self._opened_at = monotonic()
+
+
+class LatencyWindow:
+    """Recent successful attempt latencies (seconds)."""
+    def __init__(self, size: int = 256):
+        self._s: deque = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._s.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        if len(self._s) < min_samples:
+            return None
+        return float(np.quantile(np.fromiter(self._s, dtype=np.float64), q))
+
+
+@dataclass
+class Policy:
+    name: str
+    deadline_s: float = 30.0
+    retries: int = 2
+    backoff_base_s: float = 0.25
+    backoff_max_s: float = 4.0
+    hedge_quantile: float = 0.95          # 0 disables hedging
+    hedge_min_s: float = 0.3
+    hedge_initial_s: float = 0.0          # delay before enough samples exist; 0 = no hedge until then
+    hedge_max_share: float = 0.1          # hedges allowed per call made
+    breaker_failures: int = 5
+    breaker_reset_s: float = 30.0
+    breaker: CircuitBreaker = field(init=False)
+    latency: LatencyWindow = field(init=False, default_factory=LatencyWindow)
+    counters: Dict[str, int] = field(init=False, default_factory=lambda: {
+        "calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "rejected": 0, "deadline": 0, "failed": 0})
+    _lock: threading.Lock = field(init=False, repr=False, compare=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.breaker = CircuitBreaker(self.name, self.breaker_failures, self.breaker_reset_s)
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, **defaults) -> "Policy":
+        def env(key: str, cast, default):
+            v = os.getenv(prefix + key)
+            return cast(v) if v not in (None, "") else default
+        d = {**{f: getattr(cls, f) for f in ("deadline_s", "retries", "backoff_base_s", "backoff_max_s",
+                                              "hedge_quantile", "hedge_min_s", "hedge_initial_s",
+                                              "hedge_max_share", "breaker_failures", "breaker_reset_s")}, **defaults}
+        return cls(
+            name=name,
+            deadline_s=env("DEADLINE_S", float, d["deadline_s"]),
+            retries=env("RETRIES", int, d["retries"]),
+            backoff_base_s=env("BACKOFF_BASE_S", float, d["backoff_base_s"]),
+            backoff_max_s=env("BACKOFF_MAX_S", float, d["backoff_max_s"]),
+            hedge_quantile=env("HEDGE_QUANTILE", float, d["hedge_quantile"]),
+            hedge_min_s=env("HEDGE_MIN_S", float, d["hedge_min_s"]),
+            hedge_initial_s=env("HEDGE_INITIAL_S", float, d["hedge_initial_s"]),
+            hedge_max_share=env("HEDGE_MAX_SHARE", float, d["hedge_max_share"]),
+            breaker_failures=env("BREAKER_FAILURES", int, d["breaker_failures"]),
+            breaker_reset_s=env("BREAKER_RESET_S", float, d["breaker_reset_s"]),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {**counters, "breaker": self.breaker.state, "trips": self.breaker.trips,
+                "hedge_delay_s": self.hedge_delay()}
+
+    def hedge_delay(self) -> Optional[float]:
+        if self.hedge_quantile <= 0:
+            return None
+        q = self.latency.quantile(self.hedge_quantile)
+        if q is None:
+            return self.hedge_initial_s or None
+        return max(self.hedge_min_s, q)
+
+    def _hedge_allowed(self) -> bool:
+        with self._lock:
+            return self.counters["hedges"] < self.hedge_max_share * self.counters["calls"]
+
+    def _count(self, **deltas: int) -> None:
+        # Policies are shared by every thread (router pool, tool executor, handlers)
+        with self._lock:
+            for k, n in deltas.items():
+                self.counters[k] += n
+
+    # ---- shared retry loop pieces ----
+
+    def _admit(self) -> float:
+        self._count(calls=1)
+        if not self.breaker.allow():
+            self._count(rejected=1)
+            raise CircuitOpenError(f"{self.name} circuit open")
+        return monotonic() + self.deadline_s
+
+    def _on_error(self, e: BaseException, attempt: int, end: float) -> float:
+        """Backoff before the next attempt, or re-raise when the call should give up."""
+        if isinstance(e, DeadlineExceeded):
+            self._count(deadline=1)
+            self.breaker.failure()
+            raise e
+        if not _retryable(e):
+            raise e
+        self.breaker.failure()
+        delay = max(_retry_after(e), random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt)))
+        if attempt >= self.retries or monotonic() + delay >= end or not self.breaker.allow():
+            self._count(failed=1)
+            raise e
+        self._count(retries=1)
+        log.warning(f"{self.name} retry {attempt + 1} in {delay:.2f}s: {type(e).__name__}",
+                    extra={"stage": "llm.retry"})
+        return delay
+
+    def _on_success(self, started: float) -> None:
+        self.latency.add(monotonic() - started)
+        self.breaker.success()
+
+    def _observe(self, op: str, started: float, status: str, result: Any) -> None:
+        CALL_SECONDS.observe(monotonic() - started, upstream=self.name, op=op, status=status)
+        usage = getattr(result, "usage", None)
+        for kind in ("prompt", "completion"):
+            n = getattr(usage, f"{kind}_tokens", None)
+            if isinstance(n, int) and n:
+                TOKENS.inc(n, upstream=self.name, kind=kind)
+
+    @staticmethod
+    def _status(e: BaseException) -> str:
+        if isinstance(e, CircuitOpenError):
+            return "rejected"
+        return "deadline" if isinstance(e, DeadlineExceeded) else "error"
+
+    # ---- sync ----
+
+    def call(self, fn: Callable[[float], T], hedge: bool = True, op: str = "request") -> T:
+        """Run `fn(timeout)` under this policy; `fn` must pass the timeout to its request."""
+        started, status, result = monotonic(), "ok", None
+        try:
+            result = self._call(fn, hedge)
+            return result
+        except Exception as e:
+            status = self._status(e)
+            raise
+        finally:
+            self._observe(op, started, status, result)
+
+    def _call(self, fn: Callable[[float], T], hedge: bool) -> T:
+        end = self._admit()
+        attempt = 0
+        while True:
+            started = monotonic()
+            try:
+                result = self._attempt(fn, end, hedge)
+            except Exception as e:
+                sleep(self._on_error(e, attempt, end))
+                attempt += 1
+                continue
+            self._on_success(started)
+            return result
+
+    def _attempt(self, fn: Callable[[float], T], end: float, hedge: bool) -> T:
+        remaining = end - monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.name} deadline exceeded")
+        delay = self.hedge_delay() if hedge else None
+        # A thread blocked in a request cannot return a backup's earlier answer, so the
+        # primary only leaves the calling thread when a hedge could follow it
+        if delay is None or delay >= remaining or not self._hedge_allowed() or _HEDGE_POOL.idle() < 2:
+            return fn(remaining)
+        primary = _HEDGE_POOL.try_submit(fn, remaining)
+        if primary is None:
+            return fn(remaining)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        backup = _HEDGE_POOL.try_submit(fn, end - monotonic()) if self._hedge_allowed() else None
+        pending = {primary}
+        if backup is not None:
+            self._count(hedges=1)
+            pending.add(backup)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, end - monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"{self.name} deadline exceeded")
+            for f in done:
+                if f.exception() is None:
+                    self._count(hedge_wins=int(f is backup))
+                    return f.result()
+                error = f.exception()
+        raise error
+
+    # ---- async ----
+
+    async def acall(self, fn: Callable[[float], Awaitable[T]], hedge: bool = True, op: str = "request") -> T:
+        """call() for coroutines; the losing hedge is cancelled."""
+        started, status, result = monotonic(), "ok", None
+        try:
+            result = await self._acall(fn, hedge)
+            return result
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status = self._status(e)
+            raise
+        finally:
+            self._observe(op, started, status, result)
+
+    async def _acall(self, fn: Callable[[float], Awaitable[T]], hedge: bool) -> T:
+        end = self._admit()
+        attempt = 0
+        while True:
+            started = monotonic()
+            try:
+                result = await self._aattempt(fn, end, hedge)
+            except Exception as e:
+                await asyncio.sleep(self._on_error(e, attempt, end))
+                attempt += 1
+                continue
+            self._on_success(started)
+            return result
+
+    async def _aattempt(self, fn: Callable[[float], Awaitable[T]], end: float, hedge: bool) -> T:
+        remaining = end - monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.name} deadline exceeded")
+        delay = self.hedge_delay() if hedge else None
+        primary = asyncio.ensure_future(fn(remaining))
+        tasks = {primary}
+        try:
+            if delay is not None and delay < remaining:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._hedge_allowed():
+                    self._count(hedges=1)
+                    tasks.add(asyncio.ensure_future(fn(end - monotonic())))
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, end - monotonic()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise DeadlineExceeded(f"{self.name} deadline exceeded")
+                for t in done:
+                    if t.exception() is None:
+                        self._count(hedge_wins=int(t is not primary))
+                        return t.result()
+                    error = t.exception()
+            raise error
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+
+_POLICIES: Dict[str, Policy] = {}
+_DEFAULTS = {
+    "chat": ("LLM_", {"deadline_s": 30.0}),
+    "embeddings": ("EMBED_", {"deadline_s": 10.0, "hedge_min_s": 0.15}),
+}
+_policies_lock = threading.Lock()
+
+
+def policy(name: str) -> Policy:
+    """Process-wide policy for an upstream ("chat" or "embeddings")."""
+    p = _POLICIES.get(name)
+    if p is None:
+        with _policies_lock:
+            p = _POLICIES.get(name)
+            if p is None:
+                prefix, defaults = _DEFAULTS.get(name, (name.upper() + "_", {}))
+                p = _POLICIES[name] = Policy.from_env(name, prefix, **defaults)
+    return p
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: p.stats() for name, p in _POLICIES.items()}
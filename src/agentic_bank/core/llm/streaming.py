@@ -0,0 +1,116 @@
+"""
+Helpers for streamed chat completions.
+
+- StreamAccumulator: folds `chat.completions` stream chunks into the reply text and
+  complete tool calls (arguments arrive in pieces, keyed by the call's index).
+- ReplyTextExtractor: the card/appointment agents answer with a JSON object; this
+  yields only the user-visible `replyText` string while that JSON is still arriving.
+  Plain-text replies pass through unchanged.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+from types import SimpleNamespace
+import json
+import re
+
+
+class StreamAccumulator:
+    def __init__(self):
+        self._text: List[str] = []
+        self._calls: Dict[int, Dict[str, str]] = {}
+
+    def add(self, chunk) -> Optional[str]:
+        """Fold one chunk in; returns its text delta, if any."""
+        if not getattr(chunk, "choices", None):  # e.g. Azure content-filter preamble
+            return None
+        delta = chunk.choices[0].delta
+        for tc in getattr(delta, "tool_calls", None) or []:
+            slot = self._calls.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+            if tc.id:
+                slot["id"] = tc.id
+            fn = getattr(tc, "function", None)
+            if fn is not None:
+                slot["name"] += fn.name or ""
+                slot["arguments"] += fn.arguments or ""
+        text = getattr(delta, "content", None)
+        if text:
+            self._text.append(text)
+        return text or None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text)
+
+    @property
+    def tool_calls(self) -> List[Any]:
+        """Assembled calls, shaped like `message.tool_calls` of a non-streamed response."""
+        return [
+            SimpleNamespace(id=c["id"], type="function",
+                            function=SimpleNamespace(name=c["name"], arguments=c["arguments"]))
+            for _, c in sorted(self._calls.items())
+        ]
+
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class ReplyTextExtractor:
+    def __init__(self, field: str = "replyText"):
+        self._key = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._buf = ""
+        self._mode: Optional[str] = None  # "json" | "text"
+        self._pos = -1                    # start of the undecoded part of the string value
+        self._done = False
+
+    def feed(self, delta: str) -> str:
+        """Newly available user-visible text for this delta (may be empty)."""
+        if self._done or not delta:
+            return ""
+        self._buf += delta
+        if self._mode is None:
+            head = self._buf.lstrip()
+            if not head or (head.startswith("`") and len(head) < 3):
+                return ""
+            self._mode = "json" if head.startswith(("{", "```")) else "text"
+            if self._mode == "text":
+                return head
+        if self._mode == "text":
+            return delta
+        if self._pos < 0:
+            m = self._key.search(self._buf)
+            if not m:
+                return ""
+            self._pos = m.end()
+        return self._decode()
+
+    def _decode(self) -> str:
+        out: List[str] = []
+        i, buf = self._pos, self._buf
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self._done = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            if i + 1 >= len(buf):
+                break  # escape split across deltas
+            esc = buf[i + 1]
+            if esc == "u":
+                # \uXXXX, or a \uD8xx\uDCxx surrogate pair that must be decoded together
+                width = 12 if buf[i + 2:i + 4].lower() in ("d8", "d9", "da", "db") else 6
+                if i + width > len(buf):
+                    break
+                try:
+                    out.append(json.loads('"' + buf[i:i + width] + '"'))
+                except ValueError:
+                    pass
+                i += width
+                continue
+            out.append(_ESCAPES.get(esc, esc))
+            i += 2
+        self._pos = i
+        return "".join(out)
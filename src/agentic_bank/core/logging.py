@@ -1,6 +1,9 @@
 import logging, os, sys, json, time
 from typing import Any, Dict
 
+# Attributes every LogRecord carries; anything else was passed via `extra=`
+_RESERVED = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
 def _json_fmt(record: logging.LogRecord) -> str:
     payload: Dict[str, Any] = {
         "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)),
@@ -8,12 +11,13 @@ def _json_fmt(record: logging.LogRecord) -> str:
         "logger": record.name,
         "msg": record.getMessage(),
     }
-    # include extras if present
-    for k in ("turnId","sessionId","agent","conf","stage","tool","status"):
-        v = getattr(record, k, None)
-        if v is not None:
+    # include every extra the caller passed
+    for k, v in record.__dict__.items():
+        if k not in _RESERVED and not k.startswith("_") and v is not None:
             payload[k] = v
-    return json.dumps(payload, ensure_ascii=False)
+    if record.exc_info:
+        payload["exc"] = logging.Formatter().formatException(record.exc_info)
+    return json.dumps(payload, ensure_ascii=False, default=str)
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
@@ -0,0 +1,174 @@
+"""
+In-process metrics with Prometheus text exposition (no client library needed).
+
+    TOOL_SECONDS = histogram("tool_call_seconds", "Tool handler latency", ["tool", "status"])
+    TOOL_SECONDS.observe(0.012, tool="cards.block", status="ok")
+    with TOOL_SECONDS.time(tool="cards.block", status="ok"): ...
+
+Counters and histograms are created once at import time and are thread-safe.
+Components that already keep their own counters (caches, batchers, breakers) are
+exported at scrape time through register_collector(). render() produces the
+`text/plain; version=0.0.4` body served by the API's /metrics.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import threading
+
+# Seconds; covers in-process signals (ms) through slow completions (tens of s)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[str, ...]
+# (name, type, help, {label dict as sorted tuple: value}) yielded by collectors
+Sample = Tuple[str, str, str, Dict[Tuple[Tuple[str, str], ...], float]]
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}" if body else ""
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(zip(self.labelnames, k))} {_num(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}  # per-bucket counts (+Inf last), then sum
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(s)) for k, s in self._series.items())
+        out = self._header()
+        for key, s in items:
+            pairs = list(zip(self.labelnames, key))
+            cum = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), s[:-1]):
+                cum += n
+                le = "+Inf" if bound == float("inf") else _num(bound)
+                out.append(f"{self.name}_bucket{_labels(pairs + [('le', le)])} {_num(cum)}")
+            out.append(f"{self.name}_sum{_labels(pairs)} {_num(s[-1])}")
+            out.append(f"{self.name}_count{_labels(pairs)} {_num(cum)}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(m, cls):
+                raise ValueError(f"metric {name} already registered as {m.kind}")
+            return m
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets)
+
+    def register_collector(self, fn: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in list(self._metrics.values()):
+            lines += m.render()
+        for fn in list(self._collectors):
+            try:
+                samples = list(fn())
+            except Exception:  # a broken collector must not break the scrape
+                continue
+            for name, kind, help, values in samples:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_labels(k)} {_num(v)}" for k, v in values.items()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+register_collector = REGISTRY.register_collector
+
+
+def gauges(name: str, help: str, stats: Dict[str, Any], label: str = "kind", by: Optional[str] = None) -> Sample:
+    """
+    A gauge family from a component's stats dict, one sample per numeric key.
+    With `by`, `stats` maps a label value (e.g. an upstream name) to such a dict.
+    """
+    groups = stats.items() if by else [(None, stats)]
+    values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+    for group, st in groups:
+        for k, v in (st or {}).items():
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                values[tuple(sorted(((label, k),) + (((by, str(group)),) if by else ())))] = float(v)
+    return name, "gauge", help, values
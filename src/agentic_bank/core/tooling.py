@@ -1,13 +1,26 @@
-from typing import Callable, Dict, Any, Optional, Tuple
+import asyncio
+import inspect
+import os
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from agentic_bank.core.logging import get_logger
+from agentic_bank.core import metrics
 _log = get_logger("tools")
 
+TOOL_SECONDS = metrics.histogram("tool_call_seconds", "Tool handler latency", ["tool", "status"])
+
+# Upper bound on tool calls of one model response running at the same time
+TOOL_MAX_PARALLEL = int(os.getenv("TOOL_MAX_PARALLEL", "8"))
+_POOL = ThreadPoolExecutor(max_workers=TOOL_MAX_PARALLEL, thread_name_prefix="tool")
+
 @dataclass
 class Tool:
     tool_id: str
-    handler: Callable[[Dict[str, Any]], Dict[str, Any]]
+    handler: Callable[[Dict[str, Any]], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]]  # sync or async
     description: str = ""
+    read_only: bool = False  # no side effects: replies built on its results may be cached and shared
 
 class ToolRegistry:
     def __init__(self):
@@ -19,20 +32,64 @@ class ToolRegistry:
     def get(self, tool_id: str) -> Optional[Tool]:
         return self._tools.get(tool_id)
 
+    def read_only(self, tool_id: str) -> bool:
+        tool = self._tools.get(tool_id)
+        return bool(tool and tool.read_only)
+
 class ToolExecutor:
     def __init__(self, registry: ToolRegistry):
         self.registry = registry
 
+    def read_only(self, tool_id: str) -> bool:
+        """True if `tool_id` is registered and has no side effects."""
+        return self.registry.read_only(tool_id)
+
     def call(self, tool_id: str, args: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
         _log.debug(f"call -> {tool_id}", extra={"stage":"tool.call", "tool":tool_id})
         tool = self.registry.get(tool_id)
         if not tool:
             _log.error("tool not found", extra={"stage":"tool.error", "tool":tool_id})
             return ("error", {"message":"tool_not_found", "tool_id": tool_id})
+        t0 = perf_counter()
         try:
             data = tool.handler(args)
+            TOOL_SECONDS.observe(perf_counter() - t0, tool=tool_id, status="ok")
+            _log.debug(f"ok <- {tool_id}", extra={"stage":"tool.ok", "tool":tool_id, "status":"ok"})
+            return ("ok", data)
+        except Exception as e:
+            TOOL_SECONDS.observe(perf_counter() - t0, tool=tool_id, status="error")
+            _log.exception(f"tool error {tool_id}: {e}", extra={"stage":"tool.error", "tool":tool_id, "status":"error"})
+            return ("error", {"message": str(e)})
+
+    async def acall(self, tool_id: str, args: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Async call: coroutine handlers are awaited, sync ones run in a worker thread."""
+        tool = self.registry.get(tool_id)
+        if not tool or not inspect.iscoroutinefunction(tool.handler):
+            return await asyncio.to_thread(self.call, tool_id, args)
+        _log.debug(f"call -> {tool_id}", extra={"stage":"tool.call", "tool":tool_id})
+        t0 = perf_counter()
+        try:
+            data = await tool.handler(args)
+            TOOL_SECONDS.observe(perf_counter() - t0, tool=tool_id, status="ok")
             _log.debug(f"ok <- {tool_id}", extra={"stage":"tool.ok", "tool":tool_id, "status":"ok"})
             return ("ok", data)
         except Exception as e:
+            TOOL_SECONDS.observe(perf_counter() - t0, tool=tool_id, status="error")
             _log.exception(f"tool error {tool_id}: {e}", extra={"stage":"tool.error", "tool":tool_id, "status":"error"})
-            return ("error", {"message": str(e)})
\ No newline at end of file
+            return ("error", {"message": str(e)})
+
+    def call_many(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """call() for each (tool_id, args) concurrently on a bounded pool; results keep input order."""
+        if len(calls) <= 1:
+            return [self.call(tool_id, args) for tool_id, args in calls]
+        return list(_POOL.map(lambda c: self.call(*c), calls))
+
+    async def acall_many(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """acall() for each (tool_id, args), at most TOOL_MAX_PARALLEL at a time; results keep input order."""
+        sem = asyncio.Semaphore(TOOL_MAX_PARALLEL)
+
+        async def one(tool_id: str, args: Dict[str, Any]):
+            async with sem:
+                return await self.acall(tool_id, args)
+
+        return list(await asyncio.gather(*(one(tool_id, args) for tool_id, args in calls)))
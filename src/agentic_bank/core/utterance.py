@@ -8,6 +8,12 @@ _ACK_PATTERNS: Final[list[re.Pattern]] = [
     re.compile(r"^\s*(bye|goodbye|see ya|see you)\.?\s*$", re.I),
 ]
 
+_PUNCT_EDGES = re.compile(r"^[\s\W_]+|[\s\W_]+$")
+
+def normalize_utterance(text: str) -> str:
+    """Case/whitespace/edge-punctuation insensitive form of an utterance, for cache keys."""
+    return _PUNCT_EDGES.sub("", " ".join((text or "").lower().split()))
+
 def is_acknowledgement(text: str) -> bool:
     if not text:
         return False
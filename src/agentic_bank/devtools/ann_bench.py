@@ -0,0 +1,112 @@
+"""
+Recall-vs-latency benchmark for the semantic router indexes (router/ann.py).
+
+    python -m agentic_bank.devtools.ann_bench --n 50000 --dim 256 --nprobe 1 2 4 8 16 32
+
+Exemplars are synthetic: each agent owns a few topic centres and every exemplar
+is a noisy unit vector around one of them; queries are drawn the same way.
+For every nprobe this reports recall@k against exact search, how often the
+routed agent (grouped max over the k hits) matches exact routing, and
+single-query latency p50/p99, which is how the router calls the index.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import time
+import numpy as np
+
+from agentic_bank.core.llm.embeddings import l2_normalize
+from agentic_bank.router.ann import ExactIndex, IVFIndex
+
+
+def synthetic(n: int, dim: int, agents: int, topics: int, noise: float, n_queries: int,
+              seed: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centres = l2_normalize(rng.standard_normal((agents * topics, dim)).astype(np.float32))
+
+    def draw(m: int) -> Tuple[np.ndarray, np.ndarray]:
+        c = rng.integers(0, len(centres), size=m)
+        X = centres[c] + noise * rng.standard_normal((m, dim)).astype(np.float32) / np.sqrt(dim)
+        return l2_normalize(X), c // topics
+
+    X, labels = draw(n)
+    Q, _ = draw(n_queries)
+    return X, labels, Q
+
+
+def routed_agents(ids: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Agent of the best hit == agent of the grouped max over the hits."""
+    return labels[ids[:, 0]]
+
+
+def _latency(index, Q: np.ndarray, k: int, **kw) -> Tuple[np.ndarray, np.ndarray, List[float]]:
+    sims, ids, lat = [], [], []
+    for q in Q:
+        t0 = time.perf_counter()
+        s, i = index.search(q[None, :], k, **kw)
+        lat.append(time.perf_counter() - t0)
+        sims.append(s[0])
+        ids.append(i[0])
+    return np.stack(sims), np.stack(ids), lat
+
+
+def _ms(lat: List[float], q: float) -> float:
+    return round(float(np.percentile(np.asarray(lat) * 1000.0, q)), 3)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    X, labels, Q = synthetic(args.n, args.dim, args.agents, args.topics, args.noise, args.queries, args.seed)
+
+    exact = ExactIndex(X)
+    _, e_ids, e_lat = _latency(exact, Q, args.k)
+    e_agents = routed_agents(e_ids, labels)
+
+    t0 = time.perf_counter()
+    ivf = IVFIndex(X, nlist=args.nlist, seed=args.seed)
+    build_s = time.perf_counter() - t0
+
+    rows: List[Dict[str, Any]] = [{"index": "exact", "nprobe": None, "recall": 1.0, "agent_agreement": 1.0,
+                                   "p50_ms": _ms(e_lat, 50), "p99_ms": _ms(e_lat, 99)}]
+    for nprobe in args.nprobe:
+        _, ids, lat = _latency(ivf, Q, args.k, nprobe=nprobe)
+        hit = [len(set(a.tolist()) & set(b.tolist())) / args.k for a, b in zip(ids, e_ids)]
+        rows.append({
+            "index": "ivf", "nprobe": nprobe,
+            "recall": round(float(np.mean(hit)), 4),
+            "agent_agreement": round(float(np.mean(routed_agents(ids, labels) == e_agents)), 4),
+            "p50_ms": _ms(lat, 50), "p99_ms": _ms(lat, 99),
+        })
+    return {"n": args.n, "dim": args.dim, "k": args.k, "queries": args.queries,
+            "nlist": ivf.nlist, "ivf_build_s": round(build_s, 2), "results": rows}
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m agentic_bank.devtools.ann_bench")
+    parser.add_argument("--n", type=int, default=50000, help="number of exemplars")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--agents", type=int, default=12)
+    parser.add_argument("--topics", type=int, default=40, help="topic centres per agent")
+    parser.add_argument("--noise", type=float, default=1.5)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=32)
+    parser.add_argument("--nlist", type=int, default=None, help="default 4*sqrt(n)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    rep = run(args)
+    if args.json:
+        print(json.dumps(rep, indent=2))
+        return
+    print(f"n={rep['n']} dim={rep['dim']} k={rep['k']} queries={rep['queries']} "
+          f"nlist={rep['nlist']} ivf_build={rep['ivf_build_s']}s")
+    print(f"{'index':<7}{'nprobe':>7}{'recall':>9}{'agent':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in rep["results"]:
+        print(f"{r['index']:<7}{str(r['nprobe'] or '-'):>7}{r['recall']:>9.3f}{r['agent_agreement']:>9.3f}"
+              f"{r['p50_ms']:>9.3f}{r['p99_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
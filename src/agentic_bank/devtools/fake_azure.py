@@ -0,0 +1,272 @@
+"""
+Local stand-in for Azure OpenAI, for load-testing the whole stack without quota.
+
+    python -m agentic_bank.devtools.fake_azure --port 8900 --chat-p50-ms 600 --embed-p50-ms 40 \\
+        --error-rate 0.01 --rate-limit-rate 0.02 --rpm 3000
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8900 AZURE_OPENAI_KEY=fake AZURE_OPENAI_API_KEY=fake \\
+        AZURE_OPENAI_DEPLOYMENT=gpt-4o uvicorn agentic_bank.api.main:app --port 8000
+
+Speaks the Azure wire format for
+  POST /openai/deployments/{deployment}/chat/completions   (JSON or `stream: true` SSE, tool calls)
+  POST /openai/deployments/{deployment}/embeddings
+Replies are deterministic in the request:
+- embeddings: stubs.hash_embedding (lexically close texts get close vectors);
+- intent-classifier / super-router prompts: stubs.rule_intent as JSON;
+- agent prompts asking for `replyText`: a JSON agent reply; FAQ/plain prompts: text;
+- with `tools`, a hash-chosen share of first rounds (--tool-rate) calls one of the tools
+  with placeholder arguments; the round after a tool result answers normally;
+- --script FILE (JSONL {"match": regex, "reply": str | obj, "tool_calls": [...]}) overrides
+  all of the above when the last user message matches.
+Failure profiles: --error-rate (500), --rate-limit-rate (429 with retry-after-ms) and
+--rpm (token bucket; 429 when empty). GET /stats reports counters.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from agentic_bank.devtools.stubs import INTENT_RULES, LatencyModel, _user_text_from_prompt, hash_embedding, rule_intent
+from agentic_bank.router.router import INTENT_AGENTS
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text or "") // 4)
+
+
+def _digest(obj: Any) -> int:
+    return int(hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _placeholder_args(tool: Dict[str, Any]) -> Dict[str, Any]:
+    params = (tool.get("function") or {}).get("parameters") or {}
+    props = params.get("properties") or {}
+    fill = {"string": "fake", "boolean": True, "number": 1, "integer": 1, "array": [], "object": {}}
+    return {name: fill.get((props.get(name) or {}).get("type"), "fake") for name in params.get("required") or props}
+
+
+class FakeAzure:
+    """Response generation and failure injection; the HTTP layer is in make_app()."""
+    def __init__(self, chat_latency: LatencyModel, embed_latency: LatencyModel, token_delay_ms: float = 0.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, rpm: int = 0,
+                 tool_rate: float = 0.3, embed_dim: int = 3072, script: Optional[Path] = None, seed: int = 0):
+        self.chat_latency = chat_latency
+        self.embed_latency = embed_latency
+        self.token_delay = token_delay_ms / 1000.0
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm = rpm
+        self.tool_rate = tool_rate
+        self.embed_dim = embed_dim
+        self.script = self._load_script(script) if script else []
+        self._rng = random.Random(seed)
+        self._bucket = float(rpm)
+        self._refilled = time.monotonic()
+        self.counters: Dict[str, int] = {"chat": 0, "stream": 0, "embeddings": 0, "inputs": 0,
+                                         "tool_calls": 0, "errors": 0, "throttled": 0}
+
+    @staticmethod
+    def _load_script(path: Path) -> List[Tuple[re.Pattern, Dict[str, Any]]]:
+        rules = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                rule = json.loads(line)
+                rules.append((re.compile(rule["match"], re.I), rule))
+        return rules
+
+    # ---- failure injection ----
+
+    def fault(self) -> Optional[JSONResponse]:
+        """A 429/500 response to send instead of an answer, or None."""
+        if self.rpm > 0:
+            now = time.monotonic()
+            self._bucket = min(self.rpm, self._bucket + (now - self._refilled) * self.rpm / 60.0)
+            self._refilled = now
+            if self._bucket < 1:
+                return self._throttled(int((1 - self._bucket) * 60000 / self.rpm) + 1)
+            self._bucket -= 1
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return self._throttled(1000)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.counters["errors"] += 1
+            return JSONResponse({"error": {"code": "InternalServerError", "message": "fake upstream error"}},
+                                status_code=500)
+        return None
+
+    def _throttled(self, retry_ms: int) -> JSONResponse:
+        self.counters["throttled"] += 1
+        return JSONResponse({"error": {"code": "429", "message": "Rate limit is exceeded."}}, status_code=429,
+                            headers={"retry-after-ms": str(retry_ms), "retry-after": str(max(1, retry_ms // 1000))})
+
+    # ---- embeddings ----
+
+    def embeddings(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        texts = body.get("input") or []
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        dim = int(body.get("dimensions") or self.embed_dim)
+        self.counters["embeddings"] += 1
+        self.counters["inputs"] += len(texts)
+        tokens = sum(_tokens(t) for t in texts)
+        return {
+            "object": "list",
+            "model": body.get("model"),
+            "data": [{"object": "embedding", "index": i, "embedding": hash_embedding(t, dim)} for i, t in enumerate(texts)],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    # ---- chat ----
+
+    def answer(self, body: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """(content, tool_calls) for a chat request."""
+        messages = body.get("messages") or []
+        system = next((str(m.get("content") or "") for m in messages if m.get("role") == "system"), "")
+        last = messages[-1] if messages else {}
+        user = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+        tools = body.get("tools") or []
+        h = _digest(messages)
+
+        for rx, rule in self.script:
+            if rx.search(user):
+                reply = rule.get("reply")
+                return (json.dumps(reply) if isinstance(reply, (dict, list)) else reply), rule.get("tool_calls") or []
+
+        if "intent classifier" in system:
+            return json.dumps(rule_intent(_user_text_from_prompt(user))), []
+        if "super-router" in system:
+            text = _user_text_from_prompt(user)
+            intent = rule_intent(text)
+            agent = INTENT_AGENTS.get(intent["intent"])
+            if not agent:
+                return json.dumps({"decision": "clarify", "agent": None, "confidence": 0.5,
+                                   "question": "Is this about a card, an appointment or a general question?"}), []
+            return json.dumps({"decision": "handoff", "agent": agent, "confidence": intent["confidence"], "question": None}), []
+
+        if tools and last.get("role") != "tool" and (h % 1000) / 1000.0 < self.tool_rate:
+            tool = tools[h % len(tools)]
+            return None, [{"id": f"call_{h:08x}", "type": "function",
+                           "function": {"name": tool["function"]["name"], "arguments": json.dumps(_placeholder_args(tool))}}]
+
+        topic = next((intent for rx, intent, _ in INTENT_RULES if rx.search(user)), "other")
+        if "replyText" in user:
+            return json.dumps({"replyText": f"(fake) Noted — step {h % 97} of your {topic.replace('_', ' ')} request.",
+                               "isTerminal": h % 3 == 0, "handledTopic": topic, "facts": {}}), []
+        return f"(fake) Here is what I found about your question [{h % 997}].", []
+
+    def completion(self, body: Dict[str, Any], content: Optional[str], tool_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.counters["chat"] += 1
+        self.counters["tool_calls"] += len(tool_calls)
+        prompt = _tokens(json.dumps(body.get("messages") or []))
+        completion = _tokens(content or json.dumps(tool_calls))
+        message: Dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model") or "gpt-4o",
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+            "usage": {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion},
+        }
+
+    def chunks(self, body: Dict[str, Any], content: Optional[str], tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The same answer as chat.completion.chunk objects (content in ~4-char pieces)."""
+        self.counters["stream"] += 1
+        self.counters["tool_calls"] += len(tool_calls)
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model") or "gpt-4o"}
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> Dict[str, Any]:
+            return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+
+        out = [chunk({"role": "assistant", "content": ""})]
+        for i in range(0, len(content or ""), 4):
+            out.append(chunk({"content": content[i:i + 4]}))
+        for i, tc in enumerate(tool_calls):
+            args = tc["function"]["arguments"]
+            out.append(chunk({"tool_calls": [{"index": i, "id": tc["id"], "type": "function",
+                                              "function": {"name": tc["function"]["name"], "arguments": ""}}]}))
+            for j in range(0, len(args), 8):
+                out.append(chunk({"tool_calls": [{"index": i, "function": {"arguments": args[j:j + 8]}}]}))
+        out.append(chunk({}, "tool_calls" if tool_calls else "stop"))
+        return out
+
+
+def make_app(fake: FakeAzure) -> FastAPI:
+    app = FastAPI(title="Fake Azure OpenAI")
+
+    @app.post("/openai/deployments/{deployment}/embeddings")
+    async def embeddings(deployment: str, request: Request):
+        body = await request.json()
+        await asyncio.sleep(fake.embed_latency.sample())
+        failed = fake.fault()
+        if failed is not None:
+            return failed
+        # Hashing thousands of dims per token is CPU work; keep the event loop free
+        return JSONResponse(await asyncio.to_thread(fake.embeddings, {"model": deployment, **body}))
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat(deployment: str, request: Request):
+        body = {"model": deployment, **(await request.json())}
+        await asyncio.sleep(fake.chat_latency.sample())
+        failed = fake.fault()
+        if failed is not None:
+            return failed
+        content, tool_calls = fake.answer(body)
+        if not body.get("stream"):
+            return JSONResponse(fake.completion(body, content, tool_calls))
+
+        async def events():
+            for c in fake.chunks(body, content, tool_calls):
+                if fake.token_delay:
+                    await asyncio.sleep(fake.token_delay)
+                yield f"data: {json.dumps(c)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return fake.counters
+
+    return app
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m agentic_bank.devtools.fake_azure")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--chat-p50-ms", type=float, default=600.0, help="time to first byte of a completion")
+    parser.add_argument("--embed-p50-ms", type=float, default=40.0)
+    parser.add_argument("--latency-dist", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--token-delay-ms", type=float, default=15.0, help="between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--tool-rate", type=float, default=0.3, help="share of first tool rounds that call a tool")
+    parser.add_argument("--embed-dim", type=int, default=3072)
+    parser.add_argument("--script", type=Path, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    fake = FakeAzure(
+        chat_latency=LatencyModel(args.chat_p50_ms, args.latency_dist, args.latency_sigma, seed=args.seed),
+        embed_latency=LatencyModel(args.embed_p50_ms, args.latency_dist, args.latency_sigma, seed=args.seed + 1),
+        token_delay_ms=args.token_delay_ms, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        rpm=args.rpm, tool_rate=args.tool_rate, embed_dim=args.embed_dim, script=args.script, seed=args.seed,
+    )
+    uvicorn.run(make_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
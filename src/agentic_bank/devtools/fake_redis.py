@@ -0,0 +1,265 @@
+"""
+Local stand-in for Redis, for exercising the two-tier cache without a Redis server.
+
+    python -m agentic_bank.devtools.fake_redis --port 6390
+    REDIS_URL=redis://127.0.0.1:6390/0 uvicorn agentic_bank.api.main:app --port 8000 --workers 2
+
+Speaks RESP2 and RESP3 (HELLO) over TCP for the commands the cache uses and redis-py
+sends on connect: HELLO, PING, ECHO, SELECT, CLIENT, INFO, GET, SET (EX/PX/NX/XX), MGET, DEL, EXISTS, TTL, PTTL,
+DBSIZE, FLUSHDB/FLUSHALL, PUBLISH, SUBSCRIBE/UNSUBSCRIBE, MULTI/EXEC/DISCARD, QUIT.
+One keyspace for every db index; expiry is lazy. Not for production use.
+FakeRedis.start_background() runs it on a thread for ad-hoc scripts.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Set, Tuple
+import argparse
+import asyncio
+import threading
+import time
+
+
+class _Error(Exception):
+    pass
+
+
+class _Push(list):
+    """Out-of-band pub/sub frame (`>` in RESP3, a plain array in RESP2)."""
+
+
+def _encode(v: Any, proto: int = 2) -> bytes:
+    if isinstance(v, _Error):
+        return b"-" + str(v).encode() + b"\r\n"
+    if v is None:
+        return b"_\r\n" if proto == 3 else b"$-1\r\n"
+    if isinstance(v, bool):
+        return b":%d\r\n" % int(v)
+    if isinstance(v, int):
+        return b":%d\r\n" % v
+    if isinstance(v, str):  # status reply
+        return b"+" + v.encode() + b"\r\n"
+    if isinstance(v, bytes):
+        return b"$%d\r\n%s\r\n" % (len(v), v)
+    if isinstance(v, dict):
+        if proto == 3:
+            return b"%%%d\r\n" % len(v) + b"".join(_encode(k, proto) + _encode(x, proto) for k, x in v.items())
+        return _encode([y for kv in v.items() for y in kv], proto)
+    if isinstance(v, (list, tuple)):
+        head = b">" if proto == 3 and isinstance(v, _Push) else b"*"
+        return head + b"%d\r\n" % len(v) + b"".join(_encode(x, proto) for x in v)
+    raise TypeError(type(v))
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):  # inline command (e.g. from telnet / redis-cli --no-raw)
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:])):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}   # key -> (value, expires_at)
+        self.channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self.proto: Dict[asyncio.StreamWriter, int] = {}              # per connection, 2 until HELLO 3
+        self.stats = {"connections": 0, "commands": 0, "published": 0}
+
+    # ---- keyspace ----
+
+    def _get(self, k: bytes) -> Optional[bytes]:
+        item = self.data.get(k)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.monotonic():
+            del self.data[k]
+            return None
+        return item[0]
+
+    def _ttl_ms(self, k: bytes) -> int:
+        if self._get(k) is None:
+            return -2
+        exp = self.data[k][1]
+        return -1 if exp is None else max(0, int((exp - time.monotonic()) * 1000))
+
+    def _set(self, args: List[bytes]) -> Any:
+        k, v, opts = args[0], args[1], [a.upper() for a in args[2:]]
+        exp: Optional[float] = None
+        i = 0
+        while i < len(opts):
+            if opts[i] in (b"EX", b"PX"):
+                n = float(args[2 + i + 1])
+                exp = time.monotonic() + (n if opts[i] == b"EX" else n / 1000.0)
+                i += 2
+                continue
+            if opts[i] == b"NX" and self._get(k) is not None:
+                return None
+            if opts[i] == b"XX" and self._get(k) is None:
+                return None
+            i += 1
+        self.data[k] = (v, exp)
+        return "OK"
+
+    def execute(self, args: List[bytes]) -> Any:
+        cmd, rest = args[0].upper(), args[1:]
+        self.stats["commands"] += 1
+        if cmd == b"PING":
+            return rest[0] if rest else "PONG"
+        if cmd == b"ECHO":
+            return rest[0]
+        if cmd in (b"SELECT", b"CLIENT"):
+            return "OK"
+        if cmd == b"INFO":
+            return b"# Server\r\nredis_version:7.2.0\r\nfake:1\r\n"
+        if cmd == b"GET":
+            return self._get(rest[0])
+        if cmd == b"SET":
+            return self._set(rest)
+        if cmd == b"MGET":
+            return [self._get(k) for k in rest]
+        if cmd == b"DEL":
+            return sum(self.data.pop(k, None) is not None for k in rest)
+        if cmd == b"EXISTS":
+            return sum(self._get(k) is not None for k in rest)
+        if cmd == b"PTTL":
+            return self._ttl_ms(rest[0])
+        if cmd == b"TTL":
+            ms = self._ttl_ms(rest[0])
+            return ms if ms < 0 else (ms + 999) // 1000
+        if cmd == b"DBSIZE":
+            return sum(self._get(k) is not None for k in list(self.data))
+        if cmd in (b"FLUSHDB", b"FLUSHALL"):
+            self.data.clear()
+            return "OK"
+        if cmd == b"PUBLISH":
+            return self._publish(rest[0], rest[1])
+        return _Error(f"ERR unknown command '{cmd.decode(errors='replace')}'")
+
+    # ---- pub/sub ----
+
+    def _publish(self, channel: bytes, message: bytes) -> int:
+        subs = self.channels.get(channel, set())
+        for w in list(subs):
+            if w.is_closing():
+                subs.discard(w)
+            else:
+                w.write(_encode(_Push([b"message", channel, message]), self.proto.get(w, 2)))
+        self.stats["published"] += 1
+        return len(subs)
+
+    def _subscriptions(self, w: asyncio.StreamWriter) -> List[bytes]:
+        return [c for c, subs in self.channels.items() if w in subs]
+
+    def _pubsub(self, cmd: bytes, channels: List[bytes], w: asyncio.StreamWriter) -> bytes:
+        out = b""
+        proto = self.proto.get(w, 2)
+        if cmd == b"SUBSCRIBE":
+            for c in channels:
+                self.channels.setdefault(c, set()).add(w)
+                out += _encode(_Push([b"subscribe", c, len(self._subscriptions(w))]), proto)
+        else:
+            for c in channels or self._subscriptions(w) or [None]:
+                if c is not None:
+                    self.channels.get(c, set()).discard(w)
+                out += _encode(_Push([b"unsubscribe", c, len(self._subscriptions(w))]), proto)
+        return out
+
+    def _hello(self, args: List[bytes], w: asyncio.StreamWriter) -> Any:
+        if args:
+            if args[0] not in (b"2", b"3"):
+                return _Error("NOPROTO unsupported protocol version")
+            self.proto[w] = int(args[0])
+        return {b"server": b"redis", b"version": b"7.2.0", b"proto": self.proto.get(w, 2),
+                b"id": id(w) & 0xFFFF, b"mode": b"standalone", b"role": b"master", b"modules": []}
+
+    # ---- connections ----
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        queued: Optional[List[List[bytes]]] = None   # inside MULTI
+        try:
+            while True:
+                try:
+                    args = await _read_command(reader)
+                except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                    break
+                if not args:
+                    if args is None:
+                        break
+                    continue
+                cmd = args[0].upper()
+                proto = self.proto.get(writer, 2)
+                if cmd == b"QUIT":
+                    writer.write(_encode("OK"))
+                    break
+                if cmd == b"HELLO":
+                    reply = self._hello(args[1:], writer)
+                    writer.write(_encode(reply, self.proto.get(writer, 2)))
+                elif cmd in (b"SUBSCRIBE", b"UNSUBSCRIBE"):
+                    writer.write(self._pubsub(cmd, args[1:], writer))
+                elif cmd == b"MULTI":
+                    queued = []
+                    writer.write(_encode("OK"))
+                elif cmd == b"EXEC":
+                    writer.write(_encode(_Error("ERR EXEC without MULTI")) if queued is None
+                                 else _encode([self.execute(a) for a in queued], proto))
+                    queued = None
+                elif cmd == b"DISCARD":
+                    queued = None
+                    writer.write(_encode("OK"))
+                elif queued is not None:
+                    queued.append(args)
+                    writer.write(_encode("QUEUED"))
+                else:
+                    try:
+                        writer.write(_encode(self.execute(args), proto))
+                    except (IndexError, ValueError) as e:
+                        writer.write(_encode(_Error(f"ERR {type(e).__name__}: {e}")))
+                await writer.drain()
+        finally:
+            for subs in self.channels.values():
+                subs.discard(writer)
+            self.proto.pop(writer, None)
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+
+    def start_background(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Serve on a daemon thread; returns the bound port."""
+        ready = threading.Event()
+        bound: Dict[str, int] = {}
+
+        def run():
+            loop = asyncio.new_event_loop()
+            server = loop.run_until_complete(self.serve(host, port))
+            bound["port"] = server.sockets[0].getsockname()[1]
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="fake-redis", daemon=True).start()
+        ready.wait()
+        return bound["port"]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m agentic_bank.devtools.fake_redis")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = await FakeRedis().serve(args.host, args.port)
+        print(f"fake redis on redis://{args.host}:{args.port}/0", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Concurrent session load against a running API (e.g. pointed at devtools/fake_azure).
+
+    python -m agentic_bank.devtools.load_test --url http://127.0.0.1:8000 --sessions 200 --concurrency 50
+    python -m agentic_bank.devtools.load_test --stream   # /message/stream; also reports time to first delta
+
+Each session calls /start, then sends --turns messages drawn from the router bench
+corpus. Reports per-turn latency percentiles, throughput and failures. User ids and
+messages both come from --seed. Start the API with PROFILES_DIR / CONVERSATIONS_DIR
+pointing at a scratch directory, so load sessions stay out of data/ (the local intent
+classifier trains on data/conversations).
+"""
+from __future__ import annotations
+from typing import Any, Dict, List
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import httpx
+
+from agentic_bank.devtools.router_bench import DEFAULT_CORPUS, load_corpus, percentiles
+
+
+async def _session(client: httpx.AsyncClient, user_id: str, texts: List[str], args: argparse.Namespace,
+                   out: Dict[str, List[Any]]) -> None:
+    r = await client.post("/start", json={"userId": user_id})
+    r.raise_for_status()
+    sid = r.json()["sessionId"]
+    for text in texts:
+        t0 = time.perf_counter()
+        try:
+            if args.stream:
+                first = None
+                async with client.stream("POST", "/message/stream", json={"sessionId": sid, "text": text}) as resp:
+                    resp.raise_for_status()
+                    async for line in resp.aiter_lines():
+                        if first is None and line.startswith("event: delta"):
+                            first = time.perf_counter() - t0
+                if first is not None:
+                    out["first_delta"].append(first)
+            else:
+                resp = await client.post("/message", json={"sessionId": sid, "text": text})
+                resp.raise_for_status()
+            out["turn"].append(time.perf_counter() - t0)
+        except Exception as e:
+            out["errors"].append(f"{type(e).__name__}: {e}")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus = [r["text"] for r in load_corpus(args.corpus)]
+    rng = random.Random(args.seed)
+    sessions = [(f"load{rng.randrange(10**6)}", [rng.choice(corpus) for _ in range(args.turns)])
+                for _ in range(args.sessions)]
+    out: Dict[str, List[Any]] = {"turn": [], "first_delta": [], "errors": []}
+    sem = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"x-demo-password": args.password}
+
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=args.timeout) as client:
+        async def one(user_id: str, texts: List[str]):
+            async with sem:
+                try:
+                    await _session(client, user_id, texts, args, out)
+                except Exception as e:
+                    out["errors"].append(f"start {type(e).__name__}: {e}")
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(u, t) for u, t in sessions))
+        wall = time.perf_counter() - t0
+
+    return {
+        "sessions": args.sessions, "turns": len(out["turn"]), "concurrency": args.concurrency,
+        "wall_s": round(wall, 2), "turns_per_s": round(len(out["turn"]) / wall, 1) if wall else 0.0,
+        "turn": percentiles(out["turn"]), "first_delta": percentiles(out["first_delta"]),
+        "errors": len(out["errors"]), "error_samples": out["errors"][:5],
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m agentic_bank.devtools.load_test")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--password", default=os.getenv("CHAINLIT_DEMO_PASSWORD", "demo"))
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=3, help="messages per session")
+    parser.add_argument("--concurrency", type=int, default=50, help="sessions in flight")
+    parser.add_argument("--stream", action="store_true", help="use /message/stream")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Memory vs accuracy of compact exemplar storage (core/llm/quantize.py) for the semantic router.
+
+    python -m agentic_bank.devtools.quant_bench --dims 0 1024 512 256 --dtypes float32 float16 int8
+    python -m agentic_bank.devtools.quant_bench --azure      # real embeddings (needs AZURE_OPENAI_*)
+
+Every (dim, dtype) pair routes the labeled bench corpus through SemanticIntents
+and is compared with full-size float32: bytes per vector, compression, agreement
+with the float32 decision, mean |score delta| and accuracy on the labels.
+Stub embeddings are hashed, not Matryoshka-trained, so truncation numbers are only
+representative with --azure.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List
+from pathlib import Path
+import argparse
+import json
+import os
+import tempfile
+import numpy as np
+
+from agentic_bank.devtools.router_bench import DEFAULT_CORPUS, load_corpus
+from agentic_bank.devtools.stubs import StubEmbeddingsClient
+from agentic_bank.router.exemplars import ExemplarStore
+from agentic_bank.router.semantic_intents import SemanticIntents, SEM_EMBED_MODEL
+
+
+def _client(azure: bool, dim: int):
+    if not azure:
+        return StubEmbeddingsClient(dim=dim)
+    from openai import AzureOpenAI
+    return AzureOpenAI(
+        api_version=os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION", "2024-12-01-preview"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_key=os.getenv("AZURE_OPENAI_API_KEY") or os.getenv("AZURE_OPENAI_KEY"),
+    )
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus = load_corpus(args.corpus)
+    texts = [r["text"] for r in corpus]
+    expected = [None if r.get("agent") == "__clarify__" else r.get("agent") for r in corpus]
+    client = _client(args.azure, args.stub_dim)
+
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="quant-bench-") as tmp:
+        store = ExemplarStore(SEM_EMBED_MODEL, base=Path(tmp))
+        # Queries are embedded once and replayed against every storage variant
+        Q = np.asarray([d.embedding for d in client.embeddings.create(input=texts, model=SEM_EMBED_MODEL).data],
+                       dtype=np.float32)
+
+        base = SemanticIntents(client=client, store=store, index="exact", dim=0, dtype="float32")
+        full_dim = base._vecs.dim
+        ref = base._score_many(Q)
+        ref_agents = [base._decision(s)[0] for s in ref]
+
+        for dim in args.dims:
+            for dtype in args.dtypes:
+                sem = SemanticIntents(client=client, store=store, index="exact", dim=dim, dtype=dtype)
+                sc = sem._score_many(Q)
+                agents = [sem._decision(s)[0] for s in sc]
+                vecs = sem._vecs
+                per_vec = vecs.nbytes / max(len(vecs), 1)
+                rows.append({
+                    "dim": vecs.dim, "dtype": dtype,
+                    "bytes_per_vector": round(per_vec, 1),
+                    "compression": round(full_dim * 4 / per_vec, 1),
+                    "agreement": round(float(np.mean([a == b for a, b in zip(agents, ref_agents)])), 4),
+                    "mean_abs_score_delta": round(float(np.mean(np.abs(sc - ref))), 5),
+                    "accuracy": round(float(np.mean([a == e for a, e in zip(agents, expected)])), 4),
+                })
+    return {"corpus": str(args.corpus), "backend": "azure" if args.azure else "stub",
+            "full_dim": full_dim, "results": rows}
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m agentic_bank.devtools.quant_bench")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--dims", type=int, nargs="+", default=[0, 1024, 512, 256], help="0 = full size")
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("--stub-dim", type=int, default=3072, help="stub embedding size (text-embedding-3-large: 3072)")
+    parser.add_argument("--azure", action="store_true", help="embed with Azure OpenAI instead of the stub")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    rep = run(args)
+    if args.json:
+        print(json.dumps(rep, indent=2))
+        return
+    print(f"corpus={rep['corpus']} backend={rep['backend']} full_dim={rep['full_dim']}")
+    print(f"{'dim':>6} {'dtype':<8}{'B/vec':>9}{'x':>7}{'agree':>8}{'|dscore|':>10}{'acc':>7}")
+    for r in rep["results"]:
+        print(f"{r['dim']:>6} {r['dtype']:<8}{r['bytes_per_vector']:>9.1f}{r['compression']:>7.1f}"
+              f"{r['agreement']:>8.3f}{r['mean_abs_score_delta']:>10.5f}{r['accuracy']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
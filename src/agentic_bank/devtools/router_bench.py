@@ -0,0 +1,184 @@
+"""
+Router latency/accuracy benchmark against deterministic stub backends (no Azure needed).
+
+    python -m agentic_bank.devtools.router_bench --emb-latency-ms 40 --llm-latency-ms 600
+
+Corpus: JSONL, one turn per line:
+    {"text": "...", "agent": "<expected agent or __clarify__>",
+     "last_topic": "card_block", "session_facts": {...}}     # last two optional
+
+Reports p50/p95/p99 per signal and for EnsembleRouter.decide end to end,
+plus accuracy (result.agent == expected agent) and the clarify rate.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import numpy as np
+
+from agentic_bank.core.messages import TurnInput, UserIdentity
+from agentic_bank.devtools.stubs import LatencyModel, StubChatLLM, StubEmbeddingsClient
+from agentic_bank.router.exemplars import ExemplarStore
+from agentic_bank.router.llm_intent import LLMIntentClassifier
+from agentic_bank.router.router import EnsembleConfig, EnsembleRouter, KeywordRouter
+from agentic_bank.router.semantic_intents import SemanticIntents, SEM_EMBED_MODEL
+from agentic_bank.router.topic_shift import TopicShiftDetector, TOPIC_EMBED_MODEL
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[3] / "data" / "bench" / "router_corpus.jsonl"
+
+
+class Timed:
+    """Proxy that records the wall time of selected methods and delegates everything else."""
+    def __init__(self, target: Any, methods: List[str]):
+        self._target = target
+        self._methods = set(methods)
+        self.samples: List[float] = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if name not in self._methods or not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.samples.append(time.perf_counter() - t0)
+        return timed
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"n": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    ms = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"n": len(samples), "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2)}
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    rows = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            rows.append(json.loads(line))
+    return rows
+
+
+def _turn(text: str) -> TurnInput:
+    return TurnInput(turnId=str(uuid.uuid4()), sessionId="bench", channel="web",
+                     user=UserIdentity(userId="bench"), text=text, metadata={"recent_messages": []})
+
+
+def build_router(args: argparse.Namespace, store_dir: Path) -> Dict[str, Any]:
+    def latency(p50: float, seed: int) -> LatencyModel:
+        return LatencyModel(p50_ms=p50, dist=args.dist, sigma=args.sigma, jitter_ms=args.jitter_ms, seed=seed)
+
+    emb_client = StubEmbeddingsClient(latency(args.emb_latency_ms, args.seed))
+    llm = StubChatLLM(latency(args.llm_latency_ms, args.seed + 1), error_rate=args.llm_error_rate, seed=args.seed)
+
+    # Exemplars are embedded once at build time into a throwaway artifact dir, not timed
+    kw = Timed(KeywordRouter(), ["route"])
+    sem = Timed(SemanticIntents(client=emb_client, store=ExemplarStore(SEM_EMBED_MODEL, base=store_dir)), ["route"])
+    llm_clf = Timed(LLMIntentClassifier(llm=llm), ["classify"])
+    topic = Timed(TopicShiftDetector(client=emb_client, store=ExemplarStore(TOPIC_EMBED_MODEL, base=store_dir)),
+                  ["detect"])
+    cfg = EnsembleConfig(cascade=args.cascade, decision_cache_size=0)
+    router = EnsembleRouter(kw, sem, llm_clf, topic, cfg)
+    return {"router": router, "timed": {"keyword": kw, "semantic": sem, "llm": llm_clf, "topic": topic},
+            "emb_client": emb_client, "llm": llm}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus = load_corpus(args.corpus)
+    with tempfile.TemporaryDirectory(prefix="router-bench-") as tmp:
+        parts = build_router(args, Path(tmp))
+        router: EnsembleRouter = parts["router"]
+        for t in parts["timed"].values():
+            t.samples.clear()
+        emb_calls0 = parts["emb_client"].calls
+
+        decide_s: List[float] = []
+        correct = clarify = 0
+        misses: List[Dict[str, Any]] = []
+        for rep in range(args.repeat):
+            for row in corpus:
+                last_topic: Optional[str] = row.get("last_topic")
+                t0 = time.perf_counter()
+                res = router.decide(_turn(row["text"]), last_topic=last_topic,
+                                    last_topic_time=time.time() if last_topic else None,
+                                    session_facts=row.get("session_facts") or {})
+                decide_s.append(time.perf_counter() - t0)
+                if rep:
+                    continue
+                clarify += res.agent == "__clarify__"
+                if res.agent == row.get("agent"):
+                    correct += 1
+                else:
+                    misses.append({"text": row["text"], "expected": row.get("agent"), "got": res.agent,
+                                   "conf": round(res.confidence, 3)})
+
+    n = len(corpus)
+    return {
+        "corpus": str(args.corpus),
+        "turns": n,
+        "repeat": args.repeat,
+        "cascade": args.cascade,
+        "backends": {"emb_latency_ms": args.emb_latency_ms, "llm_latency_ms": args.llm_latency_ms,
+                     "dist": args.dist, "sigma": args.sigma},
+        "accuracy": round(correct / n, 4) if n else 0.0,
+        "clarify_rate": round(clarify / n, 4) if n else 0.0,
+        "decide": percentiles(decide_s),
+        "signals": {name: percentiles(t.samples) for name, t in parts["timed"].items()},
+        "embedding_calls": parts["emb_client"].calls - emb_calls0,
+        "llm_calls": parts["llm"].calls,
+        "cascade_stats": dict(getattr(router, "cascade_stats", {}) or {}),
+        "misses": misses,
+    }
+
+
+def _print_report(rep: Dict[str, Any]) -> None:
+    print(f"corpus={rep['corpus']} turns={rep['turns']} repeat={rep['repeat']} cascade={rep['cascade']}")
+    print(f"backends: {rep['backends']}")
+    print(f"accuracy={rep['accuracy']:.3f} clarify_rate={rep['clarify_rate']:.3f} "
+          f"embedding_calls={rep['embedding_calls']} llm_calls={rep['llm_calls']}")
+    print(f"{'stage':<10}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(rep["signals"].items()) + [("decide", rep["decide"])]
+    for name, p in rows:
+        print(f"{name:<10}{p['n']:>7}{p['p50_ms']:>10.2f}{p['p95_ms']:>10.2f}{p['p99_ms']:>10.2f}")
+    for m in rep["misses"]:
+        print(f"  miss: {m['text']!r} expected={m['expected']} got={m['got']} conf={m['conf']}")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m agentic_bank.devtools.router_bench")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--emb-latency-ms", type=float, default=float(os.getenv("BENCH_EMB_LATENCY_MS", "40")))
+    parser.add_argument("--llm-latency-ms", type=float, default=float(os.getenv("BENCH_LLM_LATENCY_MS", "400")))
+    parser.add_argument("--dist", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal shape")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform half-width")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus (accuracy uses the first)")
+    parser.add_argument("--cascade", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    rep = run(args)
+    if args.json:
+        print(json.dumps(rep, indent=2))
+    else:
+        _print_report(rep)
+
+
+if __name__ == "__main__":
+    main()
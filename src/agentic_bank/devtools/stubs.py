@@ -0,0 +1,152 @@
+"""
+Deterministic stand-ins for the Azure OpenAI backends, for benchmarks and local runs.
+
+- StubEmbeddingsClient: exposes `.embeddings.create(input=..., model=...)`; vectors are a
+  hashed bag of words + char 4-grams, so lexically close texts get close vectors.
+- StubChatLLM: exposes `.chat(messages, system=None, json_mode=False, ...)` like AzureLLM;
+  answers intent-classification prompts with a small rule table.
+
+Both sleep according to a LatencyModel so latency distributions can be reproduced.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+import json
+import random
+import re
+import threading
+import time
+import zlib
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+
+@dataclass
+class LatencyModel:
+    """Per-call latency: 'fixed', 'uniform' (p50 +/- jitter) or 'lognormal' (median p50, shape sigma)."""
+    p50_ms: float = 0.0
+    dist: str = "lognormal"
+    sigma: float = 0.5
+    jitter_ms: float = 0.0
+    seed: int = 0
+    _rng: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def sample(self) -> float:
+        """Seconds for one call."""
+        if self.p50_ms <= 0:
+            return 0.0
+        with self._lock:
+            if self.dist == "fixed":
+                ms = self.p50_ms
+            elif self.dist == "uniform":
+                ms = self._rng.uniform(self.p50_ms - self.jitter_ms, self.p50_ms + self.jitter_ms)
+            elif self.dist == "lognormal":
+                ms = self.p50_ms * self._rng.lognormvariate(0.0, self.sigma)
+            else:
+                raise ValueError(f"unknown latency distribution: {self.dist}")
+        return max(0.0, ms) / 1000.0
+
+    def wait(self) -> None:
+        s = self.sample()
+        if s:
+            time.sleep(s)
+
+
+def _token_vec(tok: str, dim: int) -> np.ndarray:
+    return np.random.default_rng(zlib.crc32(tok.encode("utf-8"))).standard_normal(dim).astype(np.float32)
+
+
+def hash_embedding(text: str, dim: int = 256) -> List[float]:
+    """Deterministic unit vector from words (weight 1) and char 4-grams (weight 0.5)."""
+    words = _TOKEN.findall((text or "").lower())
+    v = np.zeros(dim, dtype=np.float32)
+    for w in words:
+        v += _token_vec("w:" + w, dim)
+        padded = f" {w} "
+        for k in range(len(padded) - 3):
+            v += 0.5 * _token_vec("c:" + padded[k:k + 4], dim)
+    if not words:
+        v += _token_vec("<empty>", dim)
+    return (v / (np.linalg.norm(v) + 1e-9)).tolist()
+
+
+class _StubEmbeddings:
+    def __init__(self, owner: "StubEmbeddingsClient"):
+        self._owner = owner
+
+    def create(self, *, input, model: str, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        self._owner.calls += 1
+        self._owner.inputs += len(texts)
+        self._owner.latency.wait()
+        data = [SimpleNamespace(index=i, embedding=hash_embedding(t, self._owner.dim)) for i, t in enumerate(texts)]
+        tokens = sum(len(_TOKEN.findall(t)) for t in texts)
+        return SimpleNamespace(data=data, model=model, usage=SimpleNamespace(prompt_tokens=tokens, total_tokens=tokens))
+
+
+class StubEmbeddingsClient:
+    """Drop-in for the `client` argument of SemanticIntents / TopicShiftDetector."""
+    def __init__(self, latency: LatencyModel | None = None, dim: int = 256):
+        self.latency = latency or LatencyModel()
+        self.dim = dim
+        self.calls = 0
+        self.inputs = 0
+        self.embeddings = _StubEmbeddings(self)
+
+
+INTENT_RULES: List[tuple] = [
+    (re.compile(r"\b(new one|new card|replace(ment)?|reissue)\b", re.I), "card_replacement", 0.85),
+    (re.compile(r"\b(block|freeze|lock|stolen|lost|fraud)\b", re.I), "card_block", 0.9),
+    (re.compile(r"\b(appointment|book|schedule|meeting|visit|advisor)\b", re.I), "appointment_booking", 0.85),
+    (re.compile(r"\b(limit|fees?|cutoff|rate|withdraw|how|what|when)\b", re.I), "faq", 0.8),
+    (re.compile(r"^\s*(bye|goodbye|that'?s all|no thanks?)\b", re.I), "closing", 0.85),
+    (re.compile(r"^\s*(hi|hello|hey|thanks|thank you|ok|okay)\b", re.I), "smalltalk", 0.8),
+]
+
+
+def rule_intent(text: str) -> Dict[str, Any]:
+    for rx, intent, conf in INTENT_RULES:
+        if rx.search(text or ""):
+            return {"intent": intent, "confidence": conf, "slots": {}}
+    return {"intent": "other", "confidence": 0.4, "slots": {}}
+
+
+def _user_text_from_prompt(prompt: str) -> str:
+    """Pull USER_TEXT / TEXT out of the JSON context the router prompts end with."""
+    for line in reversed(prompt.splitlines()):
+        if line.lstrip().startswith("{"):
+            try:
+                ctx = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(ctx, dict):
+                return str(ctx.get("USER_TEXT") or ctx.get("TEXT") or "")
+    return prompt
+
+
+class StubChatLLM:
+    """Drop-in for AzureLLM where only `.chat` is used (LLMIntentClassifier, SuperRouterLLM)."""
+    def __init__(self, latency: LatencyModel | None = None,
+                 responder: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency or LatencyModel()
+        self.responder = responder or rule_intent
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def chat(self, messages: List[Dict[str, Any]], system: Optional[str] = None, json_mode: bool = False, **kwargs) -> str:
+        self.calls += 1
+        self.latency.wait()
+        with self._lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                raise RuntimeError("stub LLM error")
+        text = _user_text_from_prompt(str(messages[-1].get("content") or ""))
+        return json.dumps(self.responder(text))
@@ -0,0 +1,147 @@
+"""
+Nearest-neighbour indexes over normalized exemplar vectors (inner product == cosine).
+
+- ExactIndex: brute-force matrix product; exact, best for small sets.
+- IVFIndex:   inverted file with spherical k-means coarse quantization. A query
+              scans only the `nprobe` closest of `nlist` clusters; nprobe is the
+              recall/latency knob (nprobe == nlist is exact).
+
+build_index() picks one from ROUTER_SEM_INDEX ("auto" | "exact" | "ivf"); auto uses
+exact search below ROUTER_ANN_MIN_SIZE exemplars (default 5000). Both indexes keep
+their rows as CompactVectors, so truncated/int8 storage carries over.
+"""
+from __future__ import annotations
+from typing import Tuple, Union
+import os
+import numpy as np
+from agentic_bank.core.llm.embeddings import l2_normalize
+from agentic_bank.core.llm.quantize import CompactVectors
+from agentic_bank.core.logging import get_logger
+
+log = get_logger("router.ann")
+
+ANN_MIN_SIZE = int(os.getenv("ROUTER_ANN_MIN_SIZE", "5000"))
+ANN_NPROBE = int(os.getenv("ROUTER_ANN_NPROBE", "8"))
+
+# (sims, ids), both (n_queries, k); missing neighbours are id -1 with sim -inf
+Hits = Tuple[np.ndarray, np.ndarray]
+
+Vectors = Union[np.ndarray, CompactVectors]
+
+
+def _compact(mat: Vectors) -> CompactVectors:
+    return mat if isinstance(mat, CompactVectors) else CompactVectors.from_float(mat, dim=0, dtype="float32")
+
+
+def _topk(sims: np.ndarray, ids: np.ndarray, k: int) -> Hits:
+    """Top-k of one query's candidate sims, sorted descending and padded to k."""
+    out_s = np.full(k, -np.inf, dtype=np.float32)
+    out_i = np.full(k, -1, dtype=np.int64)
+    n = sims.shape[0]
+    if n:
+        take = min(k, n)
+        part = np.argpartition(-sims, take - 1)[:take] if n > take else np.arange(n)
+        part = part[np.argsort(-sims[part], kind="stable")]
+        out_s[:take], out_i[:take] = sims[part], ids[part]
+    return out_s, out_i
+
+
+class ExactIndex:
+    kind = "exact"
+
+    def __init__(self, mat: Vectors):
+        self.vecs = _compact(mat)
+
+    def __len__(self) -> int:
+        return len(self.vecs)
+
+    def search(self, Q: np.ndarray, k: int) -> Hits:
+        S = self.vecs.scores(Q)
+        ids = np.arange(len(self), dtype=np.int64)
+        hits = [_topk(row, ids, k) for row in S]
+        return np.stack([h[0] for h in hits]), np.stack([h[1] for h in hits])
+
+
+class IVFIndex:
+    """
+    Rows are reordered by cluster so each inverted list is one contiguous slice of
+    `self.vecs`; `self.ids` maps those rows back to the caller's row numbers.
+    Clustering runs on a float32 copy that is dropped after the build.
+    """
+    kind = "ivf"
+
+    def __init__(self, mat: Vectors, nlist: int | None = None, nprobe: int | None = None,
+                 iters: int = 20, seed: int = 0):
+        vecs = _compact(mat)
+        X = vecs.dense()
+        n = X.shape[0]
+        self.nlist = max(1, min(n, nlist or int(4 * np.sqrt(max(n, 1)))))
+        self.nprobe = nprobe or ANN_NPROBE
+        self.centroids, assign = self._kmeans(X, self.nlist, iters, np.random.default_rng(seed))
+
+        order = np.argsort(assign, kind="stable")
+        self.vecs = vecs[order]
+        self.ids = order.astype(np.int64)
+        counts = np.bincount(assign, minlength=self.nlist)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+
+    def __len__(self) -> int:
+        return len(self.vecs)
+
+    @staticmethod
+    def _assign(X: np.ndarray, C: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        out = np.empty(X.shape[0], dtype=np.int64)
+        for i in range(0, X.shape[0], chunk):
+            out[i:i + chunk] = np.argmax(X[i:i + chunk] @ C.T, axis=1)
+        return out
+
+    @classmethod
+    def _kmeans(cls, X: np.ndarray, k: int, iters: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """Spherical k-means: centroids are re-normalized means; empty clusters are reseeded."""
+        C = X[rng.choice(X.shape[0], size=k, replace=False)].copy()
+        assign = cls._assign(X, C)
+        for _ in range(iters):
+            sums = np.zeros_like(C)
+            np.add.at(sums, assign, X)
+            empty = np.flatnonzero(np.bincount(assign, minlength=k) == 0)
+            if empty.size:
+                sums[empty] = X[rng.choice(X.shape[0], size=empty.size, replace=False)]
+            C = l2_normalize(sums)
+            new = cls._assign(X, C)
+            if np.array_equal(new, assign):
+                break
+            assign = new
+        return C.astype(np.float32), assign
+
+    def search(self, Q: np.ndarray, k: int, nprobe: int | None = None) -> Hits:
+        Q = self.vecs.prepare(Q)
+        nprobe = max(1, min(self.nlist, nprobe or self.nprobe))
+        coarse = Q @ self.centroids.T
+        probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe] if nprobe < self.nlist else \
+            np.broadcast_to(np.arange(self.nlist), (Q.shape[0], self.nlist))
+
+        out_s = np.empty((Q.shape[0], k), dtype=np.float32)
+        out_i = np.empty((Q.shape[0], k), dtype=np.int64)
+        for qi in range(Q.shape[0]):
+            q = Q[qi:qi + 1]
+            # Inverted lists are contiguous, so each probe scores a view of the stored rows
+            spans = [(self.offsets[c], self.offsets[c + 1]) for c in probes[qi]]
+            sims = np.concatenate([self.vecs[a:b].scores(q, prepared=True)[0] for a, b in spans])
+            ids = np.concatenate([self.ids[a:b] for a, b in spans])
+            out_s[qi], out_i[qi] = _topk(sims, ids, k)
+        return out_s, out_i
+
+
+def build_index(mat: Vectors, kind: str | None = None, **kwargs):
+    """ExactIndex or IVFIndex for the normalized rows of `mat`."""
+    kind = (kind or os.getenv("ROUTER_SEM_INDEX", "auto")).lower()
+    if kind == "auto":
+        kind = "ivf" if mat.shape[0] >= ANN_MIN_SIZE else "exact"
+    if kind == "exact":
+        return ExactIndex(mat)
+    if kind == "ivf":
+        index = IVFIndex(mat, **kwargs)
+        log.info(f"ivf index: {len(index)} vectors, nlist={index.nlist}, nprobe={index.nprobe}",
+                 extra={"stage": "router.ann"})
+        return index
+    raise ValueError(f"Unknown semantic index: {kind}")
@@ -0,0 +1,174 @@
+"""
+Offline-built exemplar embedding artifacts for router startup.
+
+Build once (CI, deploy step, or by hand):
+
+    python -m agentic_bank.router.exemplars build
+
+For every embedding model this writes, under data/embeddings/:
+    <model>-<digest>.npy   float32 (n, dim) matrix, content-hashed over the exemplar texts
+    <model>.json           manifest: {"model", "file", "dim", "keys": [sha1(text), ...]}
+
+At startup the routers memory-map the matrix and only call the embeddings API
+for exemplars whose text is not in the artifact yet.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Sequence
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from agentic_bank.core.logging import get_logger
+
+log = get_logger("router.exemplars")
+
+DEFAULT_DIR = Path(__file__).resolve().parents[3] / "data" / "embeddings"
+REBUILD_HINT = "rebuild it with `python -m agentic_bank.router.exemplars build`"
+
+EmbedBatch = Callable[[List[str]], List[List[float]]]
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ExemplarStore:
+    """Embedding artifact for one model, loaded lazily with np.load(mmap_mode="r")."""
+
+    def __init__(self, model: str, base: Path | None = None):
+        self.model = model
+        self.base = Path(base or os.getenv("ROUTER_EXEMPLAR_DIR") or DEFAULT_DIR)
+        self._slug = re.sub(r"[^\w.-]", "_", model)
+        self._rows: Optional[Dict[str, int]] = None
+        self._mat: Optional[np.ndarray] = None
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.base / f"{self._slug}.json"
+
+    def load(self) -> Dict[str, int]:
+        """Map text key -> row of the memory-mapped matrix (empty if no artifact)."""
+        if self._rows is not None:
+            return self._rows
+        self._rows = {}
+        if not self.manifest_path.exists():
+            return self._rows
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            mat = np.load(self.base / manifest["file"], mmap_mode="r")
+            if mat.ndim != 2 or mat.shape != (len(manifest["keys"]), manifest["dim"]):
+                raise ValueError(f"{manifest['file']} has shape {mat.shape}, manifest says "
+                                 f"({len(manifest['keys'])}, {manifest['dim']})")
+            self._mat = mat
+            self._rows = {k: i for i, k in enumerate(manifest["keys"])}
+        except Exception as e:
+            log.error(f"exemplar artifact unreadable, {REBUILD_HINT}: {e}", extra={"stage": "router.exemplars"})
+            self._rows, self._mat = {}, None
+        return self._rows
+
+    def embed(self, texts: Sequence[str], embed_batch: EmbedBatch) -> np.ndarray:
+        """
+        Vectors for `texts`, reading the artifact and embedding only what is missing.
+        Raises ValueError if the model now returns vectors of another size than the artifact.
+        """
+        rows = self.load()
+        keys = [text_key(t) for t in texts]
+        missing = [i for i, k in enumerate(keys) if k not in rows]
+
+        fresh: Dict[int, np.ndarray] = {}
+        if missing:
+            log.info(
+                f"embedding {len(missing)}/{len(texts)} exemplars not in artifact",
+                extra={"stage": "router.exemplars", "model": self.model},
+            )
+            vecs = embed_batch([texts[i] for i in missing])
+            fresh = {i: np.asarray(v, dtype=np.float32) for i, v in zip(missing, vecs)}
+
+        dims = {v.shape[-1] for v in fresh.values()}
+        if len(dims) > 1:
+            raise ValueError(f"{self.model} returned vectors of mixed sizes {sorted(dims)}")
+        dim = self._mat.shape[1] if self._mat is not None else (dims.pop() if dims else 0)
+        if self._mat is not None and dims and dims != {dim}:
+            raise ValueError(f"{self.model} returns {dims.pop()}-dim vectors but {self.manifest_path} "
+                             f"holds {dim}-dim ones; {REBUILD_HINT}")
+        out = np.empty((len(texts), dim), dtype=np.float32)
+        for i, k in enumerate(keys):
+            out[i] = fresh[i] if i in fresh else self._mat[rows[k]]
+        return out
+
+    def build(self, texts: Sequence[str], embed_batch: EmbedBatch) -> Path:
+        """Write (or refresh) the artifact for `texts`; unchanged texts are not re-embedded."""
+        texts = list(dict.fromkeys(texts))
+        try:
+            mat = self.embed(texts, embed_batch)
+        except ValueError as e:  # stale artifact of another size: start over
+            log.warning(f"re-embedding all exemplars: {e}", extra={"stage": "router.exemplars", "model": self.model})
+            self._rows, self._mat = {}, None
+            mat = self.embed(texts, embed_batch)
+        keys = [text_key(t) for t in texts]
+        digest = hashlib.sha1("\n".join(sorted(keys)).encode("utf-8")).hexdigest()[:12]
+        fname = f"{self._slug}-{digest}.npy"
+
+        self.base.mkdir(parents=True, exist_ok=True)
+        tmp = self.base / (fname + ".tmp")
+        with tmp.open("wb") as fh:
+            np.save(fh, mat)
+        os.replace(tmp, self.base / fname)
+
+        previous = None
+        try:
+            previous = json.loads(self.manifest_path.read_text(encoding="utf-8")).get("file")
+        except (OSError, ValueError, AttributeError):
+            pass
+        manifest = {"model": self.model, "file": fname, "dim": int(mat.shape[1]), "keys": keys}
+        # Readers never see a half-written manifest
+        tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+        if previous and previous != fname:
+            (self.base / previous).unlink(missing_ok=True)
+
+        self._rows, self._mat = None, None
+        return self.base / fname
+
+
+def _collect_exemplars() -> Dict[str, List[str]]:
+    """Exemplar texts of the default routers, grouped by embedding model."""
+    from agentic_bank.router.semantic_intents import DEFAULT_INTENT_EXAMPLES, SEM_EMBED_MODEL
+    from agentic_bank.router.topic_shift import TOPIC_EXEMPLARS, TOPIC_EMBED_MODEL
+
+    by_model: Dict[str, List[str]] = {}
+    for examples in DEFAULT_INTENT_EXAMPLES.values():
+        by_model.setdefault(SEM_EMBED_MODEL, []).extend(examples)
+    by_model.setdefault(TOPIC_EMBED_MODEL, []).extend(TOPIC_EXEMPLARS.values())
+    return by_model
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m agentic_bank.router.exemplars")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="embed router exemplars into .npy artifacts")
+    b.add_argument("--out", type=Path, default=None, help="artifact directory (default: data/embeddings)")
+    args = parser.parse_args(argv)
+
+    from openai import AzureOpenAI
+    client = AzureOpenAI(
+        api_version=os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION", "2024-12-01-preview"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_key=os.getenv("AZURE_OPENAI_API_KEY") or os.getenv("AZURE_OPENAI_KEY"),
+    )
+
+    for model, texts in _collect_exemplars().items():
+        def embed_batch(batch: List[str], _model: str = model) -> List[List[float]]:
+            resp = client.embeddings.create(input=batch, model=_model)
+            return [d.embedding for d in resp.data]
+
+        path = ExemplarStore(model, args.out).build(texts, embed_batch)
+        print(f"{model}: {len(set(texts))} exemplars -> {path}")
+
+
+if __name__ == "__main__":
+    main()
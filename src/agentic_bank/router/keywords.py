@@ -0,0 +1,108 @@
+"""
+Single-pass multi-pattern matcher for the keyword router.
+
+Config (YAML or dict), per agent:
+
+    agent-card-control-llm:
+      patterns:                 # regexes, case-insensitive, each counted once
+        - '\\b(block|freeze|lock)\\b'
+      keywords:                 # plain words/phrases on word boundaries
+        visa: 0.5               #   {keyword: weight} ...
+        mastercard: 0.5
+      weight: 1.0               # default weight for patterns / listed keywords
+
+The legacy shape `{agent: [pattern, ...]}` is accepted as well.
+
+All keywords (thousands are fine) are folded into one trie-shaped regex, so
+they are found in a single scan regardless of their count; at a given position
+the longest keyword wins ("debit card" over "card"). Regex patterns are few and
+are searched one by one, so a pattern still counts when its text overlaps a
+keyword or another pattern, exactly as with the per-pattern scorer.
+"""
+from __future__ import annotations
+from typing import Dict, Any, List, Optional, Pattern, Tuple
+from pathlib import Path
+import re
+import yaml
+
+# (agent, weight) pairs a hit contributes to
+Credits = List[Tuple[str, float]]
+
+
+def _trie_regex(words: List[str]) -> str:
+    """Regex equivalent to an alternation of `words`, factored on common prefixes."""
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def walk(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return walk(trie)
+
+
+def _norm_keyword(word: str) -> str:
+    return " ".join(str(word).lower().split())
+
+
+class KeywordMatcher:
+    def __init__(self, config: Dict[str, Any]):
+        self.agents: List[str] = []
+        self._patterns: List[Tuple[Pattern[str], str, float]] = []  # (regex, agent, weight)
+        self._keywords: Dict[str, Credits] = {}    # normalized keyword -> credits
+        for agent, spec in (config or {}).items():
+            self.agents.append(agent)
+            if isinstance(spec, list):
+                spec = {"patterns": spec}
+            weight = float(spec.get("weight", 1.0))
+            for pat in spec.get("patterns") or []:
+                self._patterns.append((re.compile(pat, re.I), agent, weight))
+            keywords = spec.get("keywords") or {}
+            if isinstance(keywords, list):
+                keywords = {k: weight for k in keywords}
+            for kw, w in keywords.items():
+                kw = _norm_keyword(kw)
+                if kw:
+                    self._keywords.setdefault(kw, []).append((agent, float(w)))
+
+        # greedy optional suffixes make the trie prefer the longest keyword at a position
+        self._kw_rx: Optional[Pattern[str]] = (
+            re.compile(r"\b" + _trie_regex(list(self._keywords)) + r"\b", re.I) if self._keywords else None
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self._patterns) + len(self._keywords)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Weighted per-agent scores; each pattern/keyword counts at most once."""
+        scores: Dict[str, float] = {}
+        if not text:
+            return scores
+        for rx, agent, w in self._patterns:
+            if rx.search(text):
+                scores[agent] = scores.get(agent, 0.0) + w
+        if self._kw_rx is not None:
+            seen = set()
+            for m in self._kw_rx.finditer(text):
+                kw = _norm_keyword(m.group(0))
+                if kw in seen:
+                    continue
+                seen.add(kw)
+                for agent, w in self._keywords.get(kw, []):
+                    scores[agent] = scores.get(agent, 0.0) + w
+        return scores
+
+
+def load_keyword_config(path: Path) -> Dict[str, Any]:
+    data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping of agent -> patterns/keywords")
+    return data
@@ -1,7 +1,9 @@
 from __future__ import annotations
 from typing import Dict, Any, Optional, Tuple, List
 import json
+from concurrent.futures import ThreadPoolExecutor
 from agentic_bank.core.llm.azure import AzureLLM
+from agentic_bank.core.llm.context import budget_for, compact_json, count_tokens, pack_context
 from agentic_bank.core.logging import get_logger
 
 log = get_logger("router.llm_intent")
@@ -44,8 +46,9 @@ FEWSHOTS: List[Dict[str, Any]] = [
 ]
 
 class LLMIntentClassifier:
-    def __init__(self):
-        self.llm = AzureLLM()
+    def __init__(self, llm=None, context_budget: int | None = None):
+        self.llm = llm or AzureLLM()
+        self.context_budget = context_budget or budget_for("router")
 
     def classify(
         self,
@@ -55,17 +58,19 @@ class LLMIntentClassifier:
         session_facts: dict[str, Any] | None,
         last_topic: Optional[str] = None
     ) -> Tuple[str, float, Dict[str, Any]]:
+        packed = pack_context(recent_messages, session_facts, budget=self.context_budget,
+                              reserved=count_tokens(user_text or ""))
         ctx = {
             "USER_TEXT": user_text or "",
-            "RECENT_MESSAGES": recent_messages or [],
-            "SESSION_FACTS": session_facts or {},
+            "RECENT_MESSAGES": packed.messages,
+            "SESSION_FACTS": packed.facts,
             "LAST_TOPIC": last_topic or "",
             "FEWSHOTS": FEWSHOTS
         }
         prompt = (
             "Classify the intent based on the following JSON context. "
             "Return {\"intent\":\"...\",\"confidence\":0..1,\"slots\":{...}}.\n"
-            f"{json.dumps(ctx, ensure_ascii=False)}"
+            f"{compact_json(ctx)}"
         )
         raw = self.llm.chat(
             messages=[{"role": "user", "content": prompt}],
@@ -82,3 +87,19 @@ class LLMIntentClassifier:
         slots = data.get("slots") or {}
         log.info("intent", extra={"stage":"router.llm.intent","intent":intent,"conf":conf})
         return intent, conf, slots
+
+    def classify_many(self, items: List[Dict[str, Any]], max_concurrency: int = 8
+                      ) -> List[Optional[Tuple[str, float, Dict[str, Any]]]]:
+        """
+        classify() over many inputs (each a dict of classify kwargs) with at most
+        `max_concurrency` requests in flight. Failed items come back as None.
+        """
+        def one(kwargs: Dict[str, Any]):
+            try:
+                return self.classify(**kwargs)
+            except Exception as e:
+                log.error(f"intent classify failed: {e}", extra={"stage": "router.llm.intent"})
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="intent") as pool:
+            return list(pool.map(one, items))
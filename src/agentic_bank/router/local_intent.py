@@ -0,0 +1,295 @@
+"""
+Local intent classifier: hashed word/char n-grams + multinomial logistic regression.
+
+Runs in-process (tens of microseconds, no network) and is used as a fast path in
+front of LLMIntentClassifier: the LLM is only called when the local model is not
+confident enough.
+
+Train / evaluate from logged conversations (data/conversations/*.jsonl):
+
+    python -m agentic_bank.router.local_intent train --out data/models/intent_local.npz
+    python -m agentic_bank.router.local_intent eval --model data/models/intent_local.npz
+
+Conversation logs carry no intent labels, so they are weakly labelled from the agent
+that answered each *routed* user turn (see `examples_from_conversations`). Explicit
+labels can be added with `--labels file.jsonl` ({"text": ..., "intent": ...} per line).
+"""
+from __future__ import annotations
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+import numpy as np
+from agentic_bank.core.logging import get_logger
+
+log = get_logger("router.local_intent")
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_MODEL_PATH = PROJECT_ROOT / "data" / "models" / "intent_local.npz"
+
+LABELS: List[str] = [
+    "card_block", "card_replacement", "appointment_booking", "faq", "smalltalk", "closing", "other",
+]
+
+# agent that answered a routed turn -> intent label
+AGENT_LABELS: Dict[str, str] = {
+    "agent-card-control-llm": "card_block",
+    "agent-appointment-llm": "appointment_booking",
+    "agent-faq-llm": "faq",
+    "system": "closing",
+}
+_REPLACEMENT = re.compile(r"\b(new one|new card|replace(ment)?|reissue)\b", re.I)
+_TOKEN = re.compile(r"\w+", re.U)
+
+
+# ---------------- Features ----------------
+
+def featurize(text: str, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Signed feature hashing of word 1-2 grams and char 3-5 grams; L2-normalized."""
+    words = _TOKEN.findall((text or "").lower())
+    feats: Dict[int, float] = {}
+
+    def add(tok: str) -> None:
+        h = zlib.crc32(tok.encode("utf-8"))
+        i = h % dim
+        feats[i] = feats.get(i, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+
+    for w in words:
+        add("w:" + w)
+        padded = f" {w} "
+        for n in (3, 4, 5):
+            for k in range(len(padded) - n + 1):
+                add("c:" + padded[k:k + n])
+    for a, b in zip(words, words[1:]):
+        add(f"b:{a} {b}")
+    if not feats:
+        add("<empty>")
+
+    idx = np.fromiter(feats.keys(), dtype=np.int64, count=len(feats))
+    val = np.fromiter(feats.values(), dtype=np.float32, count=len(feats))
+    return idx, val / (np.linalg.norm(val) + 1e-9)
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    e = np.exp(z - z.max())
+    return e / e.sum()
+
+
+# ---------------- Model ----------------
+
+class LocalIntentModel:
+    def __init__(self, W: np.ndarray, b: np.ndarray, labels: List[str]):
+        self.W = W            # (dim, n_labels)
+        self.b = b            # (n_labels,)
+        self.labels = labels
+        self.dim = W.shape[0]
+
+    @classmethod
+    def train(cls, texts: List[str], labels: List[str], *, dim: int = 2 ** 16, epochs: int = 8,
+              lr: float = 0.5, l2: float = 1e-5, seed: int = 0) -> "LocalIntentModel":
+        names = [l for l in LABELS if l in set(labels)] + sorted(set(labels) - set(LABELS))
+        y = np.array([names.index(l) for l in labels])
+        X = [featurize(t, dim) for t in texts]
+        W = np.zeros((dim, len(names)), dtype=np.float32)
+        b = np.zeros(len(names), dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            step = lr / (1.0 + epoch)
+            for i in rng.permutation(len(X)):
+                idx, val = X[i]
+                g = _softmax(val @ W[idx] + b)
+                g[y[i]] -= 1.0
+                W[idx] -= step * (np.outer(val, g) + l2 * W[idx])
+                b -= step * g
+        return cls(W, b, names)
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        idx, val = featurize(text, self.dim)
+        return _softmax(val @ self.W[idx] + self.b)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        p = self.predict_proba(text)
+        k = int(np.argmax(p))
+        return self.labels[k], float(p[k])
+
+    def classify(self, *, user_text: str, recent_messages=None, session_facts=None,
+                 last_topic: Optional[str] = None) -> Tuple[str, float, Dict[str, Any]]:
+        """Same contract as LLMIntentClassifier.classify (no slot extraction)."""
+        intent, conf = self.predict(user_text)
+        return intent, conf, {}
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, W=self.W, b=self.b, labels=np.array(self.labels))
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalIntentModel":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z["W"].astype(np.float32), z["b"].astype(np.float32), [str(l) for l in z["labels"]])
+
+
+class FastPathIntentClassifier:
+    """
+    Router hook: answer from the local model when it is confident, otherwise ask the LLM.
+    Drop-in replacement for LLMIntentClassifier in EnsembleRouter.
+    """
+    def __init__(self, local: LocalIntentModel, fallback, threshold: float | None = None):
+        self.local = local
+        self.fallback = fallback
+        self.threshold = threshold if threshold is not None else float(os.getenv("ROUTER_LOCAL_INTENT_MIN", "0.80"))
+        self.stats: Dict[str, int] = {"local": 0, "fallback": 0}
+
+    def classify(self, *, user_text: str, recent_messages=None, session_facts=None,
+                 last_topic: Optional[str] = None) -> Tuple[str, float, Dict[str, Any]]:
+        intent, conf, slots = self.local.classify(user_text=user_text)
+        if conf >= self.threshold:
+            self.stats["local"] += 1
+            log.info("intent", extra={"stage": "router.local.intent", "intent": intent, "conf": conf, "src": "local"})
+            return intent, conf, slots
+        self.stats["fallback"] += 1
+        return self.fallback.classify(user_text=user_text, recent_messages=recent_messages,
+                                      session_facts=session_facts, last_topic=last_topic)
+
+    def classify_many(self, items: List[Dict[str, Any]], max_concurrency: int = 8
+                      ) -> List[Optional[Tuple[str, float, Dict[str, Any]]]]:
+        """Local predictions for all items; only the unconfident ones go to the fallback in one batch."""
+        out: List[Optional[Tuple[str, float, Dict[str, Any]]]] = [
+            self.local.classify(user_text=it.get("user_text") or "") for it in items
+        ]
+        unsure = [i for i, r in enumerate(out) if r[1] < self.threshold]
+        self.stats["local"] += len(items) - len(unsure)
+        self.stats["fallback"] += len(unsure)
+        if unsure:
+            if hasattr(self.fallback, "classify_many"):
+                answers = self.fallback.classify_many([items[i] for i in unsure], max_concurrency=max_concurrency)
+            else:
+                answers = [self.fallback.classify(**items[i]) for i in unsure]
+            for i, ans in zip(unsure, answers):
+                out[i] = ans
+        return out
+
+
+def with_local_fast_path(llm_classifier, path: Path | str | None = None):
+    """Wrap `llm_classifier` with the local model if a trained one exists, else return it unchanged."""
+    path = Path(path or os.getenv("ROUTER_LOCAL_INTENT_MODEL") or DEFAULT_MODEL_PATH)
+    if not path.exists():
+        return llm_classifier
+    try:
+        return FastPathIntentClassifier(LocalIntentModel.load(path), llm_classifier)
+    except Exception as e:
+        log.error(f"local intent model unusable, LLM only: {e}", extra={"stage": "router.local.intent"})
+        return llm_classifier
+
+
+# ---------------- Data ----------------
+
+def examples_from_conversations(paths: Iterable[Path]) -> List[Tuple[str, str]]:
+    """
+    Weak labels from conversation logs. A user turn is labelled with the agent that
+    answered it, but only when that answer started a new agent (i.e. the turn was
+    routed, not continued inside an active flow). Explicit `meta.intent` wins.
+    """
+    out: List[Tuple[str, str]] = []
+    for p in paths:
+        prev_agent: Optional[str] = None
+        pending: Optional[Dict[str, Any]] = None
+        for line in Path(p).read_text(encoding="utf-8").splitlines():
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue
+            meta = rec.get("meta") or {}
+            if rec.get("role") == "user":
+                if meta.get("intent") in LABELS:
+                    out.append((rec.get("content") or "", meta["intent"]))
+                    pending = None
+                else:
+                    pending = rec
+                continue
+            agent = meta.get("agent")
+            if pending is not None and agent in AGENT_LABELS and (agent != prev_agent or agent == "system"):
+                text = pending.get("content") or ""
+                label = AGENT_LABELS[agent]
+                if label == "card_block" and _REPLACEMENT.search(text):
+                    label = "card_replacement"
+                out.append((text, label))
+            pending = None
+            prev_agent = agent
+    return [(t, l) for t, l in out if t.strip()]
+
+
+def load_examples(conversations: Path, labels: Optional[Path]) -> List[Tuple[str, str]]:
+    examples = examples_from_conversations(sorted(Path(conversations).glob("*.jsonl")))
+    if labels:
+        for line in Path(labels).read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                rec = json.loads(line)
+                examples.append((rec["text"], rec["intent"]))
+    return examples
+
+
+def evaluate(model: LocalIntentModel, examples: List[Tuple[str, str]]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    preds = [model.predict(t)[0] for t, _ in examples]
+    per_turn_us = (time.perf_counter() - t0) / max(1, len(examples)) * 1e6
+    gold = [l for _, l in examples]
+    report: Dict[str, Any] = {
+        "n": len(examples),
+        "accuracy": float(np.mean([p == g for p, g in zip(preds, gold)])) if examples else 0.0,
+        "latency_us": round(per_turn_us, 1),
+        "labels": {},
+    }
+    for lab in sorted(set(gold) | set(preds)):
+        tp = sum(1 for p, g in zip(preds, gold) if p == g == lab)
+        n_pred = sum(1 for p in preds if p == lab)
+        n_gold = sum(1 for g in gold if g == lab)
+        report["labels"][lab] = {
+            "precision": round(tp / n_pred, 3) if n_pred else 0.0,
+            "recall": round(tp / n_gold, 3) if n_gold else 0.0,
+            "support": n_gold,
+        }
+    return report
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m agentic_bank.router.local_intent")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name in ("train", "eval"):
+        p = sub.add_parser(name)
+        p.add_argument("--data", type=Path, default=PROJECT_ROOT / "data" / "conversations")
+        p.add_argument("--labels", type=Path, default=None, help="extra JSONL with {text, intent}")
+    tr = sub.choices["train"]
+    tr.add_argument("--out", type=Path, default=DEFAULT_MODEL_PATH)
+    tr.add_argument("--dim", type=int, default=2 ** 16)
+    tr.add_argument("--epochs", type=int, default=8)
+    tr.add_argument("--holdout", type=float, default=0.2, help="fraction held out for the printed evaluation")
+    sub.choices["eval"].add_argument("--model", type=Path, default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    examples = load_examples(args.data, args.labels)
+    if not examples:
+        raise SystemExit(f"no labelled examples found under {args.data}")
+
+    if args.cmd == "train":
+        order = np.random.default_rng(0).permutation(len(examples))
+        n_test = int(len(examples) * args.holdout) if len(examples) >= 10 else 0
+        test = [examples[i] for i in order[:n_test]]
+        train = [examples[i] for i in order[n_test:]]
+        model = LocalIntentModel.train([t for t, _ in train], [l for _, l in train], dim=args.dim, epochs=args.epochs)
+        if test:
+            print(json.dumps({"holdout": evaluate(model, test)}, indent=2))
+        # final model uses every example
+        model = LocalIntentModel.train([t for t, _ in examples], [l for _, l in examples], dim=args.dim, epochs=args.epochs)
+        model.save(args.out)
+        print(f"trained on {len(examples)} examples -> {args.out}")
+    else:
+        print(json.dumps(evaluate(LocalIntentModel.load(args.model), examples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,32 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Callable
 from pydantic import BaseModel, Field
 from dataclasses import dataclass
-import os, re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from time import perf_counter, monotonic
+import asyncio
+import contextvars
+import hashlib
+import json
+import threading
+import os
 from agentic_bank.core.messages import TurnInput
+from agentic_bank.core.llm.embeddings import turn_embeddings
+from agentic_bank.core.cache import LRUCache
+from agentic_bank.core.utterance import normalize_utterance
 from agentic_bank.core.logging import get_logger
+from agentic_bank.core import metrics
+from agentic_bank.router.keywords import KeywordMatcher, load_keyword_config
 
 log = get_logger("router.core")
 
+SIGNAL_SECONDS = metrics.histogram("router_signal_seconds", "Router signal latency", ["signal", "status"])
+SIGNAL_DEADLINES = metrics.counter("router_signal_deadline_missed_total",
+                                   "Router signals dropped for missing their deadline", ["signal"])
+DECISIONS = metrics.counter("router_decisions_total", "Routing decisions", ["cache"])
+DECIDE_SECONDS = metrics.histogram("router_decide_seconds", "Uncached routing decision latency")
+
 # ---------------- Shared routing types ----------------
 
 class RouteSignal(BaseModel):
@@ -21,42 +40,77 @@ class RouterResult(BaseModel):
     confidence: float = 0.0
     clarify: Optional[Dict[str, Any]] = None  # {"question": "..."} if clarifier needed
     signals: List[RouteSignal] = Field(default_factory=list)
+    skipped: List[str] = Field(default_factory=list)  # stages the cascade did not run ("llm", "super")
 
 # ---------------- Keyword router ----------------
 
+DEFAULT_KEYWORD_PATTERNS: Dict[str, List[str]] = {
+    "agent-card-control-llm": [
+        r"\b(block|freeze|lock)\b",
+        r"\b(card|stolen|lost|fraud)\b",
+        r"\b(replacement|reissue)\b",
+    ],
+    "agent-appointment-llm": [
+        r"\b(appointment|schedule|book|meeting|visit)\b",
+    ],
+    "agent-faq-llm": [
+        r"\b(limit|fees?|cutoff|how (do|to)|where|what)\b",
+    ],
+}
+
 class KeywordRouter:
     """
-    Very fast lexical router. Configure in code or load from YAML if you prefer.
-    matches: { "agent-name": [patterns...] }
+    Very fast lexical router. Configure in code or load from YAML (see router/keywords.py for the format).
+    All patterns and keywords are compiled into one matcher that scans the text in a single pass.
+    With `path`, the file is re-read when its mtime changes (checked at most every `reload_interval` s).
     """
-    def __init__(self, patterns: Dict[str, List[str]] | None = None):
+    def __init__(self, patterns: Dict[str, Any] | None = None, *, path: Path | str | None = None,
+                 reload_interval: float = float(os.getenv("ROUTER_KEYWORDS_RELOAD_SEC", "2"))):
+        self.path = Path(path) if path else None
+        self.reload_interval = reload_interval
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
         # Default patterns (minimal, tune freely)
-        self.patterns = patterns or {
-            "agent-card-control-llm": [
-                r"\b(block|freeze|lock)\b",
-                r"\b(card|stolen|lost|fraud)\b",
-                r"\b(replacement|reissue)\b",
-            ],
-            "agent-appointment-llm": [
-                r"\b(appointment|schedule|book|meeting|visit)\b",
-            ],
-            "agent-faq-llm": [
-                r"\b(limit|fees?|cutoff|how (do|to)|where|what)\b",
-            ],
-        }
-        self._compiled: Dict[str, List[re.Pattern]] = {
-            a: [re.compile(pat, re.I) for pat in pats] for a, pats in self.patterns.items()
-        }
+        self.patterns = patterns or DEFAULT_KEYWORD_PATTERNS
+        self._matcher = KeywordMatcher(self.patterns)
+        if self.path:
+            self._maybe_reload(force=True)
+
+    def _maybe_reload(self, force: bool = False) -> None:
+        now = monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return  # another thread is already checking
+        try:
+            self._checked_at = now
+            try:
+                mtime = self.path.stat().st_mtime
+            except OSError:
+                return  # missing file: keep the current patterns
+            if mtime == self._mtime:
+                return
+            try:
+                config = load_keyword_config(self.path)
+                matcher = KeywordMatcher(config)
+            except Exception as e:
+                log.error(f"keyword config reload failed, keeping previous patterns: {e}",
+                          extra={"stage": "router.kw.reload"})
+            else:
+                self.patterns, self._matcher = config, matcher
+                log.info(f"keyword patterns loaded ({matcher.size})", extra={"stage": "router.kw.reload"})
+            self._mtime = mtime
+        finally:
+            self._reload_lock.release()
 
     def route(self, turn: TurnInput) -> Tuple[Optional[str], float, RouteSignal]:
-        text = (turn.text or "").lower()
+        if self.path:
+            self._maybe_reload()
+        text = " ".join((turn.text or "").lower().split())
         if not text:
             return None, 0.0, RouteSignal(source="keyword", agent=None, confidence=0.0)
-        scores: Dict[str, int] = {}
-        for agent, pats in self._compiled.items():
-            hit = sum(1 for pat in pats if pat.search(text))
-            if hit:
-                scores[agent] = hit
+        scores = self._matcher.scores(text)
         if not scores:
             sig = RouteSignal(source="keyword", agent=None, confidence=0.0, details={"scores": {}})
             return None, 0.0, sig
@@ -68,6 +122,22 @@ class KeywordRouter:
 
 # ---------------- Ensemble arbitration ----------------
 
+# map intents -> agent names (keep centralized here)
+INTENT_AGENTS: Dict[str, str] = {
+    "card_block": "agent-card-control-llm",
+    "card_replacement": "agent-card-control-llm",
+    "appointment_booking": "agent-appointment-llm",
+    "faq": "agent-faq-llm",
+}
+
+# Shared by all routers in the process; signals are mostly waiting on the network
+_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("ROUTER_POOL_SIZE", "32")), thread_name_prefix="router")
+# Signals cheap enough to compute on the calling thread (their deadline does not apply)
+_INLINE_SIGNALS = {"keyword"}
+# Threads that run decide() for async callers; separate from _POOL so callers never wait on their own workers
+_ASYNC_CALLERS = ThreadPoolExecutor(max_workers=int(os.getenv("ROUTER_ASYNC_WORKERS", "64")),
+                                    thread_name_prefix="router-async")
+
 @dataclass
 class EnsembleConfig:
     kw_min: float = float(os.getenv("ROUTER_KW_MIN", "0.35"))
@@ -77,10 +147,28 @@ class EnsembleConfig:
     llm_wins_over_kw_by: float = float(os.getenv("ROUTER_LLM_WIN_DELTA", "0.15"))
     sem_wins_over_kw_by: float = float(os.getenv("ROUTER_SEM_WIN_DELTA", "0.10"))
     prefer_last_topic_window_sec: int = int(os.getenv("ROUTER_LAST_TOPIC_WINDOW", "900"))  # 15min
+    # Per-signal deadlines (ms from the start of decide); a late signal is treated as absent. <=0 waits forever.
+    # The keyword signal runs inline (_INLINE_SIGNALS) and has none.
+    sem_deadline_ms: int = int(os.getenv("ROUTER_SEM_DEADLINE_MS", "1500"))
+    llm_deadline_ms: int = int(os.getenv("ROUTER_LLM_DEADLINE_MS", "4000"))
+    topic_deadline_ms: int = int(os.getenv("ROUTER_TOPIC_DEADLINE_MS", "1500"))
+    # Cascade: run cheap signals first; call the LLM stages only if they disagree or are weak
+    cascade: bool = os.getenv("ROUTER_CASCADE", "false").lower() == "true"
+    cascade_kw_min: float = float(os.getenv("ROUTER_CASCADE_KW_MIN", "0.50"))
+    cascade_sem_min: float = float(os.getenv("ROUTER_CASCADE_SEM_MIN", "0.70"))
+    cascade_sem_margin: float = float(os.getenv("ROUTER_CASCADE_SEM_MARGIN", "0.05"))  # top1 - top2 semantic score
+    # Decision cache keyed on (normalized text, last_topic, session facts); size 0 disables it
+    decision_cache_size: int = int(os.getenv("ROUTER_DECISION_CACHE_SIZE", "4096"))
+    decision_cache_ttl: float = float(os.getenv("ROUTER_DECISION_CACHE_TTL", "300"))
 
 class EnsembleRouter:
     """
     Combines keyword, semantic, LLM-intent, and topic-shift signals into a single decision.
+    - Signals are evaluated concurrently on a shared thread pool, each under its own deadline.
+    - Complete decisions are cached per (normalized text, last_topic, session facts), so
+      repeated utterances skip every remote call.
+    - In cascade mode the LLM classifier (and the API's SuperRouterLLM) only run when the
+      keyword and semantic signals disagree or fall below the cascade margins.
     - If topic shift detector says 'shift', we downweight 'continue' behavior.
     - If last topic is recent and LLM-intent is 'card_replacement', we favor card agent.
     """
@@ -90,60 +178,282 @@ class EnsembleRouter:
         self.llm_intent = llm_intent
         self.topic_shift = topic_shift
         self.cfg = cfg or EnsembleConfig()
+        self.cascade_stats: Dict[str, int] = {"turns": 0, "llm_skipped": 0}
+        self._stats_lock = threading.Lock()  # _decide runs on the async handlers' worker threads
+        self._decisions: Optional[LRUCache] = None
+        if self.cfg.decision_cache_size > 0:
+            self._decisions = LRUCache(self.cfg.decision_cache_size, ttl=self.cfg.decision_cache_ttl or None)
+
+    @staticmethod
+    def _decision_key(text: str, last_topic: Optional[str], session_facts: Dict[str, Any] | None) -> str:
+        facts = json.dumps(session_facts or {}, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha1(facts.encode("utf-8")).hexdigest()
+        return f"{normalize_utterance(text)}|{last_topic or ''}|{digest}"
+
+    def decision_cache_stats(self) -> Dict[str, int]:
+        return self._decisions.stats() if self._decisions else {}
+
+    def cascade_counts(self) -> Dict[str, int]:
+        """Snapshot of cascade_stats."""
+        with self._stats_lock:
+            return dict(self.cascade_stats)
 
     def decide(self, turn: TurnInput, *, last_topic: Optional[str], last_topic_time: Optional[float],
                session_facts: Dict[str, Any] | None) -> RouterResult:
-        signals: List[RouteSignal] = []
+        key, hit = self._cached(turn, last_topic, session_facts)
+        if hit is not None:
+            return hit
+        return self._route(turn, key, last_topic=last_topic, last_topic_time=last_topic_time,
+                           session_facts=session_facts)
 
-        # 1) Keyword
-        try:
-            kw_agent, kw_conf, kw_sig = self.kw.route(turn)
-            signals.append(kw_sig)
-        except Exception as e:
-            log.error(f"keyword route error: {e}")
-            kw_agent, kw_conf, kw_sig = None, 0.0, RouteSignal(source="keyword")
+    async def adecide(self, turn: TurnInput, *, last_topic: Optional[str], last_topic_time: Optional[float],
+                      session_facts: Dict[str, Any] | None) -> RouterResult:
+        """
+        decide() for async handlers. Cached decisions return on the event loop; otherwise
+        routing runs on a router thread in the caller's context (so the turn embedding
+        scope is shared with the agents).
+        """
+        key, hit = self._cached(turn, last_topic, session_facts)
+        if hit is not None:
+            return hit
+        ctx = contextvars.copy_context()
+        call = lambda: ctx.run(self._route, turn, key, last_topic=last_topic, last_topic_time=last_topic_time,
+                               session_facts=session_facts)
+        return await asyncio.get_running_loop().run_in_executor(_ASYNC_CALLERS, call)
 
-        # 2) Semantic
-        try:
-            sem_agent, sem_conf, sem_details = self.sem.route(turn.text or "")
-            sem_sig = RouteSignal(source="semantic", agent=sem_agent, confidence=sem_conf, details=sem_details)
-            signals.append(sem_sig)
-        except Exception as e:
-            log.error(f"semantic route error: {e}")
-            sem_agent, sem_conf, sem_sig = None, 0.0, RouteSignal(source="semantic")
-
-        # 3) LLM intent
-        try:
-            intent, llm_conf, slots = self.llm_intent.classify(
-                user_text=turn.text or "",
-                recent_messages=(turn.metadata or {}).get("recent_messages", []),
-                session_facts=session_facts or {},
-                last_topic=last_topic
-            )
-            # map intents -> agent names (keep centralized here)
-            intent_map = {
-                "card_block": "agent-card-control-llm",
-                "card_replacement": "agent-card-control-llm",
-                "appointment_booking": "agent-appointment-llm",
-                "faq": "agent-faq-llm",
-            }
-            llm_agent = intent_map.get(intent)
-            llm_sig = RouteSignal(source="llm", agent=llm_agent, confidence=llm_conf, details={"intent": intent, "slots": slots})
-            signals.append(llm_sig)
-        except Exception as e:
-            log.error(f"llm intent error: {e}")
-            llm_agent, llm_conf, llm_sig = None, 0.0, RouteSignal(source="llm")
-
-        # 4) Topic shift
-        try:
-            is_shift, suggested_agent, shift_conf = self.topic_shift.detect(turn.text or "", last_topic)
-            topic_sig = RouteSignal(source="topic", agent=suggested_agent if is_shift else None,
-                                    confidence=shift_conf if is_shift else 0.0,
-                                    details={"is_shift": is_shift})
-            signals.append(topic_sig)
-        except Exception as e:
-            log.error(f"topic shift error: {e}")
-            topic_sig = RouteSignal(source="topic", agent=None, confidence=0.0, details={"is_shift": False})
+    def _cached(self, turn: TurnInput, last_topic: Optional[str],
+                session_facts: Dict[str, Any] | None) -> Tuple[Optional[str], Optional[RouterResult]]:
+        """(cache key or None, cached result or None)."""
+        if self._decisions is None or not normalize_utterance(turn.text or ""):
+            return None, None
+        key = self._decision_key(turn.text or "", last_topic, session_facts)
+        hit = self._decisions.get(key)
+        if hit is not None:
+            DECISIONS.inc(cache="hit")
+            log.info("route cached", extra={"stage": "router.cache", "agent": hit.agent, "conf": hit.confidence})
+            return key, hit.model_copy(deep=True)
+        return key, None
+
+    def _route(self, turn: TurnInput, key: Optional[str], *, last_topic: Optional[str],
+               last_topic_time: Optional[float], session_facts: Dict[str, Any] | None) -> RouterResult:
+        DECISIONS.inc(cache="miss")
+        # Signals embedding the turn's text with the same model share one embedding of it
+        with turn_embeddings(), DECIDE_SECONDS.time():
+            result, complete = self._decide(turn, last_topic=last_topic, last_topic_time=last_topic_time,
+                                            session_facts=session_facts)
+        # Only cache decisions made with every signal that was asked for (no timeouts/errors)
+        if key is not None and complete:
+            self._decisions.set(key, result.model_copy(deep=True))
+        return result
+
+    # ---- individual signals ----
+
+    def _kw_signal(self, turn: TurnInput) -> RouteSignal:
+        _, _, sig = self.kw.route(turn)
+        return sig
+
+    def _sem_signal(self, text: str) -> RouteSignal:
+        return self._as_sem_signal(self.sem.route(text))
+
+    @staticmethod
+    def _as_sem_signal(res: Tuple[Optional[str], float, Dict[str, Any]]) -> RouteSignal:
+        sem_agent, sem_conf, sem_details = res
+        return RouteSignal(source="semantic", agent=sem_agent, confidence=sem_conf, details=sem_details)
+
+    @staticmethod
+    def _llm_kwargs(turn: TurnInput, last_topic: Optional[str], session_facts: Dict[str, Any] | None) -> Dict[str, Any]:
+        return {
+            "user_text": turn.text or "",
+            "recent_messages": (turn.metadata or {}).get("recent_messages", []),
+            "session_facts": session_facts or {},
+            "last_topic": last_topic,
+        }
+
+    def _llm_signal(self, turn: TurnInput, last_topic: Optional[str], session_facts: Dict[str, Any] | None) -> RouteSignal:
+        return self._as_llm_signal(self.llm_intent.classify(**self._llm_kwargs(turn, last_topic, session_facts)))
+
+    @staticmethod
+    def _as_llm_signal(res: Tuple[str, float, Dict[str, Any]]) -> RouteSignal:
+        intent, llm_conf, slots = res
+        return RouteSignal(source="llm", agent=INTENT_AGENTS.get(intent), confidence=llm_conf,
+                           details={"intent": intent, "slots": slots})
+
+    def _topic_signal(self, text: str, last_topic: Optional[str]) -> RouteSignal:
+        return self._as_topic_signal(self.topic_shift.detect(text, last_topic))
+
+    @staticmethod
+    def _as_topic_signal(res: Tuple[bool, Optional[str], float]) -> RouteSignal:
+        is_shift, suggested_agent, shift_conf = res
+        return RouteSignal(source="topic", agent=suggested_agent if is_shift else None,
+                           confidence=shift_conf if is_shift else 0.0,
+                           details={"is_shift": is_shift})
+
+    @staticmethod
+    def _timed(name: str, fn: Callable[[], RouteSignal]) -> Callable[[], RouteSignal]:
+        """fn, recording its latency under `name` (late results still count)."""
+        def run() -> RouteSignal:
+            t0, status = perf_counter(), "error"
+            try:
+                sig = fn()
+                status = "ok"
+                return sig
+            finally:
+                SIGNAL_SECONDS.observe(perf_counter() - t0, signal=name, status=status)
+        return run
+
+    def _gather(self, jobs: Dict[str, Tuple[Callable[[], RouteSignal], int]]) -> Dict[str, Optional[RouteSignal]]:
+        """
+        Run signal jobs concurrently and collect them under their deadlines.
+        Missing a deadline or raising makes the signal absent (None); the job keeps running
+        in the background but never blocks the decision.
+        Local CPU-only signals (keyword) run inline so they never queue behind network calls.
+        """
+        t0 = perf_counter()
+        futures = {
+            name: _POOL.submit(contextvars.copy_context().run, self._timed(name, fn))  # keep the turn's embedding scope
+            for name, (fn, _) in jobs.items() if name not in _INLINE_SIGNALS
+        }
+        out: Dict[str, Optional[RouteSignal]] = {}
+        for name in jobs.keys() & _INLINE_SIGNALS:
+            try:
+                out[name] = self._timed(name, jobs[name][0])()
+            except Exception as e:
+                log.error(f"{name} signal error: {e}", extra={"stage": "router.signal.err", "src": name})
+                out[name] = None
+        for name, fut in futures.items():
+            deadline_ms = jobs[name][1]
+            timeout = None if deadline_ms <= 0 else max(0.0, deadline_ms / 1000.0 - (perf_counter() - t0))
+            try:
+                out[name] = fut.result(timeout=timeout)
+            except FutureTimeout:
+                SIGNAL_DEADLINES.inc(signal=name)
+                log.warning(f"{name} signal missed its {deadline_ms}ms deadline",
+                            extra={"stage": "router.deadline", "src": name})
+                out[name] = None
+            except Exception as e:
+                log.error(f"{name} signal error: {e}", extra={"stage": "router.signal.err", "src": name})
+                out[name] = None
+        return out
+
+    def _decide(self, turn: TurnInput, *, last_topic: Optional[str], last_topic_time: Optional[float],
+                session_facts: Dict[str, Any] | None) -> Tuple[RouterResult, bool]:
+        text = turn.text or ""
+        cfg = self.cfg
+        jobs = {
+            "keyword": (lambda: self._kw_signal(turn), 0),
+            "semantic": (lambda: self._sem_signal(text), cfg.sem_deadline_ms),
+            "llm": (lambda: self._llm_signal(turn, last_topic, session_facts), cfg.llm_deadline_ms),
+            "topic": (lambda: self._topic_signal(text, last_topic), cfg.topic_deadline_ms),
+        }
+        if not cfg.cascade:
+            got = self._gather(jobs)
+            complete = all(sig is not None for sig in got.values())
+            return self._pick(got, last_topic=last_topic, last_topic_time=last_topic_time), complete
+
+        llm_job = jobs.pop("llm")
+        got = self._gather(jobs)
+        skipped: List[str] = []
+        if self._cheap_signals_agree(got):
+            skipped = ["llm", "super"]
+        else:
+            got.update(self._gather({"llm": llm_job}))
+
+        with self._stats_lock:
+            self.cascade_stats["turns"] += 1
+            self.cascade_stats["llm_skipped"] += bool(skipped)
+        log.info("cascade", extra={"stage": "router.cascade", "skipped": skipped})
+        result = self._pick(got, last_topic=last_topic, last_topic_time=last_topic_time)
+        result.skipped = skipped
+        return result, all(sig is not None for sig in got.values())
+
+    def _cheap_signals_agree(self, got: Dict[str, Optional[RouteSignal]]) -> bool:
+        """True when keyword and semantic pick the same agent with enough confidence and margin."""
+        kw, sem = got.get("keyword"), got.get("semantic")
+        if not kw or not sem or not kw.agent or kw.agent != sem.agent:
+            return False
+        if kw.confidence < self.cfg.cascade_kw_min or sem.confidence < self.cfg.cascade_sem_min:
+            return False
+        scores = sorted((sem.details.get("scores") or {}).values(), reverse=True)
+        margin = scores[0] - scores[1] if len(scores) > 1 else 1.0
+        return margin >= self.cfg.cascade_sem_margin
+
+    # ---- batch (offline replay / threshold tuning) ----
+
+    def decide_many(self, turns: List[TurnInput], *, last_topics: List[Optional[str]] | None = None,
+                    session_facts: List[Dict[str, Any] | None] | None = None,
+                    llm_concurrency: int = 8) -> List[RouterResult]:
+        """
+        Route many turns at once with the same policy as decide(). Embeddings go through
+        SemanticIntents.route_many / TopicShiftDetector.detect_many (a few batched calls,
+        scored as one matrix) and intents through classify_many with at most
+        `llm_concurrency` requests in flight. No deadlines and no decision cache.
+        """
+        n = len(turns)
+        last_topics = list(last_topics or [None] * n)
+        facts = list(session_facts or [None] * n)
+        texts = [t.text or "" for t in turns]
+        got: List[Dict[str, Optional[RouteSignal]]] = [{} for _ in range(n)]
+
+        def fill(name: str, compute: Callable[[], List[Any]], convert: Callable[[Any], RouteSignal],
+                 idx: List[int] | None = None) -> None:
+            idx = list(range(n)) if idx is None else idx
+            try:
+                results = compute()
+            except Exception as e:
+                log.error(f"{name} batch error: {e}", extra={"stage": "router.batch.err", "src": name})
+                results = [None] * len(idx)
+            for i, res in zip(idx, results):
+                got[i][name] = convert(res) if res is not None else None
+
+        fill("keyword", lambda: [self._kw_signal(t) for t in turns], lambda sig: sig)
+        fill("semantic",
+             lambda: self.sem.route_many(texts) if hasattr(self.sem, "route_many") else [self.sem.route(t) for t in texts],
+             self._as_sem_signal)
+        fill("topic",
+             lambda: (self.topic_shift.detect_many(texts, last_topics) if hasattr(self.topic_shift, "detect_many")
+                      else [self.topic_shift.detect(t, lt) for t, lt in zip(texts, last_topics)]),
+             self._as_topic_signal)
+
+        need_llm = [i for i in range(n) if not (self.cfg.cascade and self._cheap_signals_agree(got[i]))]
+        items = [self._llm_kwargs(turns[i], last_topics[i], facts[i]) for i in need_llm]
+        fill("llm",
+             lambda: (self.llm_intent.classify_many(items, max_concurrency=llm_concurrency)
+                      if hasattr(self.llm_intent, "classify_many") else self._classify_bounded(items, llm_concurrency)),
+             self._as_llm_signal, need_llm)
+
+        results: List[RouterResult] = []
+        llm_set = set(need_llm)
+        for i in range(n):
+            result = self._pick(got[i], last_topic=last_topics[i], last_topic_time=None)
+            if self.cfg.cascade and i not in llm_set:
+                result.skipped = ["llm", "super"]
+            results.append(result)
+        return results
+
+    def _classify_bounded(self, items: List[Dict[str, Any]], max_concurrency: int) -> List[Any]:
+        def one(kwargs: Dict[str, Any]):
+            try:
+                return self.llm_intent.classify(**kwargs)
+            except Exception as e:
+                log.error(f"llm intent error: {e}", extra={"stage": "router.batch.err", "src": "llm"})
+                return None
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="intent") as pool:
+            return list(pool.map(one, items))
+
+    # ---- policy ----
+
+    def _pick(self, got: Dict[str, Optional[RouteSignal]], *, last_topic: Optional[str],
+              last_topic_time: Optional[float]) -> RouterResult:
+        signals: List[RouteSignal] = [
+            sig for name in ("keyword", "semantic", "llm", "topic") if (sig := got.get(name)) is not None
+        ]
+        kw_sig = got.get("keyword") or RouteSignal(source="keyword")
+        sem_sig = got.get("semantic") or RouteSignal(source="semantic")
+        llm_sig = got.get("llm") or RouteSignal(source="llm")
+        topic_sig = got.get("topic") or RouteSignal(source="topic", agent=None, confidence=0.0, details={"is_shift": False})
+        kw_agent, kw_conf = kw_sig.agent, kw_sig.confidence
+        sem_agent, sem_conf = sem_sig.agent, sem_sig.confidence
+        llm_conf = llm_sig.confidence
 
         # --- Policy: pick best among valid signals with simple tie-breakers ---
         picked_agent, picked_conf, picked_src = None, 0.0, None
@@ -1,99 +1,194 @@
 from __future__ import annotations
 from typing import Dict, Any, List, Tuple, Optional
 from dataclasses import dataclass, field
-import math
 import os
-from openai import AzureOpenAI
+import numpy as np
+from agentic_bank.core.llm.embeddings import (EMBED_MODEL, create_embeddings, embed_for_turn, embedding_service,
+                                             l2_normalize, shared_embeddings_client)
 from agentic_bank.core.logging import get_logger
+from agentic_bank.router.exemplars import ExemplarStore
+from agentic_bank.core.llm.quantize import CompactVectors
+from agentic_bank.router.ann import ExactIndex, build_index
 
 log = get_logger("router.semantic")
 
+SEM_EMBED_MODEL = EMBED_MODEL
+
+DEFAULT_INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "agent-card-control-llm": [
+        "my card is lost", "stolen card", "block my card",
+        "freeze my card", "fraud on my card",
+        "order a replacement", "order a new one"
+    ],
+    "agent-appointment-llm": [
+        "book an appointment", "schedule a meeting",
+        "branch visit tomorrow", "set up a visit", "book a slot"
+    ],
+    "agent-faq-llm": [
+        "what is atm limit", "how much can I withdraw",
+        "transfer cutoff time", "fees and limits"
+    ],
+}
+
 
 @dataclass
 class Intent:
     agent: str
     examples: List[str]
-    vecs: List[List[float]] = field(default_factory=list)
+    vecs: Any = field(default_factory=list)  # CompactVectors view into the shared store
 
 
 class SemanticIntents:
     """
-    Simple centroid similarity over few-shot examples per agent.
+    Similarity over few-shot examples per agent.
     Configure your deployment name for embeddings in Azure OpenAI.
+
+    Exemplars live in one pre-normalized matrix with an agent-index array, so
+    scoring a turn is a single matrix-vector product followed by a grouped max
+    ("max" mode) or a product against per-agent centroids ("centroid" mode).
+    The matrix is CompactVectors: `dim`/`dtype` (EMBED_STORE_DIM/EMBED_STORE_DTYPE)
+    truncate and quantize it, and queries are truncated to match.
+
+    Large exemplar sets (ROUTER_ANN_MIN_SIZE+, or index="ivf") are searched with an
+    approximate index instead: the grouped max runs over the `ann_k` nearest
+    exemplars only, and agents with no exemplar among them are scored at the
+    k-th neighbour's similarity.
     """
 
-    def __init__(self, intents: List[Intent] | None = None, threshold: float = 0.55):
+    def __init__(self, intents: List[Intent] | None = None, threshold: float = 0.55,
+                 mode: str | None = None, store: ExemplarStore | None = None, client=None,
+                 index: str | None = None, ann_k: int | None = None,
+                 dim: int | None = None, dtype: str | None = None):
         self.threshold = threshold
+        self.store_dim = dim
+        self.store_dtype = dtype
+        self.index_kind = index
+        self.ann_k = ann_k or int(os.getenv("ROUTER_ANN_K", "32"))
+        self.mode = (mode or os.getenv("ROUTER_SEM_MODE", "max")).lower()
+        if self.mode not in ("max", "centroid"):
+            raise ValueError(f"Unknown semantic scoring mode: {self.mode}")
 
-        # Initialize Azure OpenAI client
-        self.client = AzureOpenAI(
-            api_version="2024-12-01-preview",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_KEY")
-        )
+        # Initialize Azure OpenAI client (or any object exposing .embeddings.create)
+        self.client = client or shared_embeddings_client()
 
         # Replace with your Azure OpenAI embeddings deployment name
-        self.embed_model = os.getenv("AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "text-embedding-3-large")
+        self.embed_model = SEM_EMBED_MODEL
 
         # Default intents if none provided
-        self.intents = intents or [
-            Intent("agent-card-control-llm", [
-                "my card is lost", "stolen card", "block my card",
-                "freeze my card", "fraud on my card",
-                "order a replacement", "order a new one"
-            ]),
-            Intent("agent-appointment-llm", [
-                "book an appointment", "schedule a meeting",
-                "branch visit tomorrow", "set up a visit", "book a slot"
-            ]),
-            Intent("agent-faq-llm", [
-                "what is atm limit", "how much can I withdraw",
-                "transfer cutoff time", "fees and limits"
-            ]),
-        ]
+        self.intents = intents or [Intent(agent, list(examples)) for agent, examples in DEFAULT_INTENT_EXAMPLES.items()]
+
+        # Offline-built exemplar vectors; only exemplars missing from it hit the API
+        self.store = store or ExemplarStore(self.embed_model)
 
         # Precompute embeddings for each intent
         self._initialize_intent_embeddings()
 
     def _initialize_intent_embeddings(self) -> None:
+        texts = [ex for intent in self.intents for ex in intent.examples]
+        mat = self.store.embed(texts, self._batch_embed)
+        start = 0
         for intent in self.intents:
-            intent.vecs = self._batch_embed(intent.examples)
+            intent.vecs = mat[start:start + len(intent.examples)]
+            start += len(intent.examples)
+        self._build_index()
+
+    def _build_index(self) -> None:
+        """Stack exemplar vectors into a normalized compact matrix grouped by agent."""
+        self._agents: List[str] = [intent.agent for intent in self.intents]
+        rows: List[Any] = []
+        counts: List[int] = []
+        for intent in self.intents:
+            vecs = list(intent.vecs)
+            rows.extend(vecs)
+            counts.append(len(vecs))
+
+        mat = np.asarray(rows, dtype=np.float32) if rows else np.zeros((0, 0), np.float32)
+        self._vecs = CompactVectors.from_float(mat, self.store_dim, self.store_dtype)
+        self._agent_idx = np.repeat(np.arange(len(self._agents)), counts)
+
+        # Rows are contiguous per agent; reduceat needs the offsets of non-empty groups only.
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.intp) if counts else np.zeros(0, np.intp)
+        self._nonempty = np.flatnonzero(np.asarray(counts) > 0)
+        self._offsets = starts[self._nonempty]
+
+        # Centroids are few; keep them float32 in the (truncated) stored space
+        dense = self._vecs.dense()
+        centroids = np.zeros((len(self._agents), self._vecs.dim), dtype=np.float32)
+        for a, intent in enumerate(self.intents):
+            start, n = int(starts[a]), counts[a]
+            # Expose per-intent views instead of keeping duplicate Python lists around
+            intent.vecs = self._vecs[start:start + n]
+            if n:
+                centroids[a] = dense[start:start + n].mean(axis=0)
+        self._centroids = l2_normalize(centroids)
+
+        # Exact search keeps the dense grouped-max path below
+        self._index = None
+        if self.mode == "max" and len(self._vecs):
+            index = build_index(self._vecs, self.index_kind)
+            self._index = None if isinstance(index, ExactIndex) else index
 
     def _embed(self, text: str) -> List[float]:
-        """Embed a single string."""
-        response = self.client.embeddings.create(
-            input=text,
-            model=self.embed_model,
-        )
-        return response.data[0].embedding
+        """Embed a single string (shared with other signals within the same turn)."""
+        return embed_for_turn(self.embed_model, text, embedding_service(self.embed_model, self.client).embed)
 
     def _batch_embed(self, texts: List[str]) -> List[List[float]]:
         """Embed a batch of strings."""
-        response = self.client.embeddings.create(
-            input=texts,
-            model=self.embed_model,
-        )
-        return [item.embedding for item in response.data]
-
-    @staticmethod
-    def _cos(u: List[float], v: List[float]) -> float:
-        num = sum(a * b for a, b in zip(u, v))
-        du = math.sqrt(sum(a * a for a in u)) + 1e-9
-        dv = math.sqrt(sum(b * b for b in v)) + 1e-9
-        return max(min(num / (du * dv), 1.0), -1.0)
+        return create_embeddings(self.client, texts, self.embed_model)
+
+    def _score(self, q: np.ndarray) -> np.ndarray:
+        """Per-agent similarity for one normalized query vector."""
+        return self._score_many(q[None, :])[0]
+
+    def _score_many(self, Q: np.ndarray) -> np.ndarray:
+        """(n_queries, n_agents) similarities for a matrix of normalized query vectors."""
+        Q = self._vecs.prepare(Q)
+        if self.mode == "centroid":
+            scores = Q @ self._centroids.T
+        elif self._index is not None:
+            scores = self._score_ann(Q)
+        else:
+            scores = np.zeros((Q.shape[0], len(self._agents)), dtype=np.float32)
+            if len(self._vecs):
+                sims = self._vecs.scores(Q, prepared=True)
+                scores[:, self._nonempty] = np.maximum.reduceat(sims, self._offsets, axis=1)
+        return np.clip(scores, -1.0, 1.0)
+
+    def _score_ann(self, Q: np.ndarray) -> np.ndarray:
+        """Grouped max over the ann_k approximate nearest exemplars of each query."""
+        sims, ids = self._index.search(Q, self.ann_k)
+        found = ids >= 0
+        floor = np.where(found, sims, np.inf).min(axis=1)
+        floor = np.where(np.isfinite(floor), floor, -1.0)
+        scores = np.repeat(floor[:, None], len(self._agents), axis=1).astype(np.float32)
+        rows, cols = np.nonzero(found)
+        np.maximum.at(scores, (rows, self._agent_idx[ids[rows, cols]]), sims[rows, cols])
+        return scores
+
+    def _decision(self, sims: np.ndarray) -> Tuple[Optional[str], float, Dict[str, Any]]:
+        scores = {agent: float(s) for agent, s in zip(self._agents, sims)}
+        agent, conf = max(scores.items(), key=lambda kv: kv[1])
+        if conf < self.threshold:
+            return None, conf, {"scores": scores}
+        return agent, conf, {"scores": scores}
 
     def route(self, text: str) -> Tuple[Optional[str], float, Dict[str, Any]]:
         """Route an input text to the most likely agent intent."""
         if not text:
             return None, 0.0, {"scores": {}}
 
-        q = self._embed(text)
-        scores = {
-            intent.agent: max((self._cos(q, v) for v in intent.vecs), default=0.0)
-            for intent in self.intents
-        }
-
-        agent, conf = max(scores.items(), key=lambda kv: kv[1])
-        if conf < self.threshold:
-            return None, conf, {"scores": scores}
-        return agent, conf, {"scores": scores}
+        q = l2_normalize(self._embed(text))
+        return self._decision(self._score(q))
+
+    def route_many(self, texts: List[str], batch_size: int = 512) -> List[Tuple[Optional[str], float, Dict[str, Any]]]:
+        """
+        Batch counterpart of route() for offline replay: distinct texts are embedded in
+        chunks of `batch_size` per embeddings call and scored as one matrix.
+        """
+        uniq = list(dict.fromkeys(t for t in texts if t))
+        scored: Dict[str, np.ndarray] = {}
+        for i in range(0, len(uniq), batch_size):
+            chunk = uniq[i:i + batch_size]
+            Q = l2_normalize(np.asarray(self._batch_embed(chunk), dtype=np.float32))
+            scored.update(zip(chunk, self._score_many(Q)))
+        return [self._decision(scored[t]) if t else (None, 0.0, {"scores": {}}) for t in texts]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Dict, Any, Optional, Tuple, List
 import json
-from agentic_bank.core.llm.azure import AzureLLM
+from agentic_bank.core.llm.azure import AzureLLM, AsyncAzureLLM
 from agentic_bank.core.logging import get_logger
 
 log = get_logger("router.super")
@@ -19,9 +19,21 @@ SYSTEM = (
 class SuperRouterLLM:
     def __init__(self):
         self.llm = AzureLLM()
+        self.allm = AsyncAzureLLM()
 
     def route(self, turn, *, active_agent: Optional[str], active_topic: Optional[str], sem_suggestion: Dict[str, Any] | None = None
              ) -> Tuple[str, float, Optional[Dict[str, Any]]]:
+        raw = self.llm.chat(**self._request(turn, active_agent, active_topic, sem_suggestion))
+        return self._decision(raw, active_agent)
+
+    async def aroute(self, turn, *, active_agent: Optional[str], active_topic: Optional[str], sem_suggestion: Dict[str, Any] | None = None
+                    ) -> Tuple[str, float, Optional[Dict[str, Any]]]:
+        raw = await self.allm.chat(**self._request(turn, active_agent, active_topic, sem_suggestion))
+        return self._decision(raw, active_agent)
+
+    @staticmethod
+    def _request(turn, active_agent: Optional[str], active_topic: Optional[str],
+                 sem_suggestion: Dict[str, Any] | None) -> Dict[str, Any]:
         ctx = {
             "TEXT": turn.text or "",
             "ACTIVE_AGENT": active_agent,
@@ -29,11 +41,14 @@ class SuperRouterLLM:
             "SEM_SUGGESTION": sem_suggestion or {}
         }
         prompt = "Decide routing for this message based on context and rules:\n" + json.dumps(ctx, ensure_ascii=False)
-        raw = self.llm.chat(
-            messages=[{"role":"user","content": prompt}],
-            system=SYSTEM,
-            json_mode=True
-        )
+        return {
+            "messages": [{"role":"user","content": prompt}],
+            "system": SYSTEM,
+            "json_mode": True,
+        }
+
+    @staticmethod
+    def _decision(raw: str, active_agent: Optional[str]) -> Tuple[str, float, Optional[Dict[str, Any]]]:
         try:
             data = json.loads(raw or "{}")
         except Exception:
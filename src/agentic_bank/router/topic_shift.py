@@ -1,12 +1,36 @@
 from __future__ import annotations
 from typing import Tuple, Optional, Dict, List
-import math
 import os
-from agentic_bank.core.llm.azure import AzureOpenAI
+import numpy as np
+from agentic_bank.core.llm.embeddings import (create_embeddings, embed_for_turn, embedding_service,
+                                             shared_embeddings_client)
+from agentic_bank.core.llm.quantize import CompactVectors
+from agentic_bank.core.cache import LRUCache
+from agentic_bank.core.utterance import normalize_utterance
 from agentic_bank.core.logging import get_logger
+from agentic_bank.router.exemplars import ExemplarStore
 
 log = get_logger("router.topic")
 
+# The shift threshold is calibrated for ada's narrow, high cosine range; other models (e.g. the
+# semantic router's EMBED_MODEL, which would share the turn's embedding) need their own threshold
+TOPIC_CALIBRATED_MODEL = "text-embedding-ada-002"
+TOPIC_EMBED_MODEL = os.getenv("ROUTER_TOPIC_EMBED_MODEL", TOPIC_CALIBRATED_MODEL)
+TOPIC_SHIFT_THRESHOLD = float(os.getenv("ROUTER_TOPIC_SHIFT_THRESHOLD", "0.50"))
+
+# Naive exemplars; adjust to your topics
+TOPIC_EXEMPLARS: Dict[str, str] = {
+    "card_block": "block or freeze a payment card due to lost stolen or fraud",
+    "appointment": "book or schedule a branch appointment",
+    "faq": "ask general banking information limits fees rates",
+}
+
+TOPIC_AGENTS: Dict[str, str] = {
+    "card_block": "agent-card-control-llm",
+    "appointment": "agent-appointment-llm",
+    "faq": "agent-faq-llm",
+}
+
 
 class TopicShiftDetector:
     """
@@ -14,76 +38,100 @@ class TopicShiftDetector:
     with a centroid (embedding) for the last_topic label.
     """
 
-    def __init__(self, threshold: float = 0.50):
-        self.client = AzureOpenAI(
-            api_version="2024-12-01-preview",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        )
+    def __init__(self, threshold: float = TOPIC_SHIFT_THRESHOLD, store: ExemplarStore | None = None,
+                 cache_size: int | None = None, client=None,
+                 dim: int | None = None, dtype: str | None = None):
+        self.client = client or shared_embeddings_client()
         self.threshold = threshold
+        self.embed_model = TOPIC_EMBED_MODEL
+        if self.embed_model != TOPIC_CALIBRATED_MODEL and "ROUTER_TOPIC_SHIFT_THRESHOLD" not in os.environ:
+            log.warning(f"topic shift threshold {threshold} was tuned for {TOPIC_CALIBRATED_MODEL}, not "
+                        f"{self.embed_model}; set ROUTER_TOPIC_SHIFT_THRESHOLD", extra={"stage": "router.topic"})
+        self.topic_exemplars: Dict[str, str] = dict(TOPIC_EXEMPLARS)
+
+        # Precompute all exemplar embeddings (from the offline artifact when available)
+        # into a fixed, normalized (n_topics, dim) matrix, truncated/quantized per dim/dtype
+        self.store = store or ExemplarStore(self.embed_model)
+        self._topics: List[str] = list(self.topic_exemplars)
+        self._topic_row: Dict[str, int] = {t: i for i, t in enumerate(self._topics)}
+        self._exemplars = CompactVectors.from_float(
+            self.store.embed([self.topic_exemplars[t] for t in self._topics], self._embed_batch), dim, dtype
+        )
 
-        # Naive exemplars; adjust to your topics
-        self.topic_exemplars: Dict[str, str] = {
-            "card_block": "block or freeze a payment card due to lost stolen or fraud",
-            "appointment": "book or schedule a branch appointment",
-            "faq": "ask general banking information limits fees rates",
-        }
-
-        # Cache for exemplar embeddings and runtime embeddings
-        self._cache: Dict[str, List[float]] = {}
+        # Bounded cache of user-text vectors (normalized, truncated to the exemplar dim),
+        # keyed by normalized text
+        size = cache_size or int(os.getenv("ROUTER_TOPIC_CACHE_SIZE", "2048"))
+        self._runtime = LRUCache(maxsize=size)
 
-        # Precompute all exemplar embeddings
-        for topic, exemplar in self.topic_exemplars.items():
-            self._cache[topic] = self._embed_text(exemplar)
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts in one Azure OpenAI embeddings call."""
+        return create_embeddings(self.client, texts, self.embed_model)
 
     def _embed_text(self, text: str) -> List[float]:
-        """Embed a single text via Azure OpenAI embeddings."""
-        response = self.client.embeddings.create(
-            model="text-embedding-ada-002",  # replace with your deployment name
-            input=[text],
-        )
-        return response.data[0].embedding
+        """Embed a single text via Azure OpenAI embeddings (shared within the turn)."""
+        return embed_for_turn(self.embed_model, text, embedding_service(self.embed_model, self.client).embed)
 
-    @staticmethod
-    def _cos(u: List[float], v: List[float]) -> float:
-        """Cosine similarity between two vectors."""
-        num = sum(a * b for a, b in zip(u, v))
-        du = math.sqrt(sum(a * a for a in u)) + 1e-9
-        dv = math.sqrt(sum(b * b for b in v)) + 1e-9
-        return max(min(num / (du * dv), 1.0), -1.0)
+    def cache_stats(self) -> Dict[str, int]:
+        return self._runtime.stats()
+
+    def _text_vec(self, text: str) -> np.ndarray:
+        key = normalize_utterance(text) or text
+        vec = self._runtime.get(key)
+        if vec is None:
+            vec = self._exemplars.prepare(self._embed_text(text))[0]
+            self._runtime.set(key, vec)
+        return vec
 
     def detect(self, text: str, last_topic: Optional[str]) -> Tuple[bool, Optional[str], float]:
         if not last_topic or not text:
             return False, None, 0.0
 
-        # Get exemplar vector for last_topic
-        ex_vec = self._cache.get(last_topic)
-        if not ex_vec:
+        # Row of the exemplar for last_topic
+        row = self._topic_row.get(last_topic)
+        if row is None:
             return False, None, 0.0
 
-        # Embed current text (cache if repeated text seen)
-        if text not in self._cache:
-            self._cache[text] = self._embed_text(text)
-        cur_vec = self._cache[text]
+        return self._detect_vec(self._text_vec(text), row, last_topic)
+
+    def detect_many(self, texts: List[str], last_topics: List[Optional[str]],
+                    batch_size: int = 512) -> List[Tuple[bool, Optional[str], float]]:
+        """Batch counterpart of detect(): texts not in the LRU are embedded in chunked calls."""
+        vecs: Dict[str, Optional[np.ndarray]] = {}
+        for t, lt in zip(texts, last_topics):
+            if t and lt in self._topic_row and t not in vecs:
+                vecs[t] = self._runtime.get(normalize_utterance(t) or t)
+        todo = [t for t, v in vecs.items() if v is None]
+        for i in range(0, len(todo), batch_size):
+            chunk = todo[i:i + batch_size]
+            for t, v in zip(chunk, self._exemplars.prepare(np.asarray(self._embed_batch(chunk), dtype=np.float32))):
+                vecs[t] = v
+                self._runtime.set(normalize_utterance(t) or t, v)
+
+        out: List[Tuple[bool, Optional[str], float]] = []
+        for t, lt in zip(texts, last_topics):
+            if t in vecs and lt in self._topic_row:
+                out.append(self._detect_vec(vecs[t], self._topic_row[lt], lt))
+            else:
+                out.append((False, None, 0.0))
+        return out
+
+    def _detect_vec(self, cur_vec: np.ndarray, row: int, last_topic: str) -> Tuple[bool, Optional[str], float]:
+        # Similarity of the current text to every topic exemplar at once
+        sims = np.clip(self._exemplars.scores(cur_vec[None, :], prepared=True)[0], -1.0, 1.0)
 
         # Check similarity to last topic
-        sim = self._cos(ex_vec, cur_vec)
+        sim = float(sims[row])
         is_shift = sim < self.threshold
 
-        # Optional suggestion: find closest other topic exemplar
+        # Optional suggestion: closest other topic exemplar
         best_topic, best_sim = None, -1.0
-        for topic, exemplar_vec in self._cache.items():
-            if topic == last_topic or topic not in self.topic_exemplars:
-                continue
-            s = self._cos(exemplar_vec, cur_vec)
-            if s > best_sim:
-                best_topic, best_sim = topic, s
-
-        suggested_agent = {
-            "card_block": "agent-card-control-llm",
-            "appointment": "agent-appointment-llm",
-            "faq": "agent-faq-llm",
-        }.get(best_topic)
+        if len(self._topics) > 1:
+            others = sims.copy()
+            others[row] = -np.inf
+            best = int(np.argmax(others))
+            best_topic, best_sim = self._topics[best], float(others[best])
+
+        suggested_agent = TOPIC_AGENTS.get(best_topic)
 
         log.info(
             "topic",
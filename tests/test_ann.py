@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from agentic_bank.core.llm.embeddings import l2_normalize
+from agentic_bank.router.ann import ExactIndex, IVFIndex, build_index
+
+
+def _clustered(n=3000, dim=64, centers=40, queries=100, seed=0):
+    rng = np.random.default_rng(seed)
+    C = rng.standard_normal((centers, dim))
+    X = l2_normalize(C[rng.integers(0, centers, n)] + 1.2 * rng.standard_normal((n, dim)))
+    Q = l2_normalize(X[rng.integers(0, n, queries)] + 0.1 * rng.standard_normal((queries, dim)))
+    return X, Q
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def test_exact_index_matches_brute_force():
+    X, Q = _clustered(n=500)
+    sims, ids = ExactIndex(X).search(Q, k=5)
+    S = Q @ X.T
+    assert np.array_equal(ids, np.argsort(-S, axis=1, kind="stable")[:, :5])
+    assert np.allclose(sims, np.take_along_axis(S, ids, axis=1), atol=1e-5)
+
+
+def test_ivf_recall_grows_with_nprobe():
+    X, Q = _clustered()
+    _, truth = ExactIndex(X).search(Q, k=10)
+    index = IVFIndex(X, nlist=32, seed=1)
+    recalls = [_recall(index.search(Q, k=10, nprobe=p)[1], truth) for p in (1, 4, 16)]
+    assert recalls == sorted(recalls)
+    assert recalls[0] < 0.95 <= recalls[-1]
+
+
+def test_ivf_probing_every_list_is_exact():
+    X, Q = _clustered(n=800)
+    index = IVFIndex(X, nlist=16)
+    sims, ids = index.search(Q, k=10, nprobe=16)
+    exact_sims, _ = ExactIndex(X).search(Q, k=10)
+    assert np.allclose(sims, exact_sims, atol=1e-5)
+    assert sorted(index.ids.tolist()) == list(range(len(X)))
+
+
+def test_ivf_pads_missing_neighbours():
+    X, Q = _clustered(n=12, queries=2)
+    sims, ids = IVFIndex(X, nlist=4).search(Q, k=20, nprobe=1)
+    assert ids.shape == (2, 20)
+    assert (ids[:, -1] == -1).all() and np.isneginf(sims[:, -1]).all()
+
+
+def test_build_index_choice():
+    X, _ = _clustered(n=200)
+    assert build_index(X, "exact").kind == "exact"
+    assert build_index(X, "ivf", nlist=8).kind == "ivf"
+    with pytest.raises(ValueError):
+        build_index(X, "hnsw")
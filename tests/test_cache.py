@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from agentic_bank.core.cache import InMemoryCache, approx_size
+
+
+def _cache(**kw):
+    return InMemoryCache(**{"sweep_seconds": 0, **kw})
+
+
+def test_lru_evicts_least_recently_used():
+    c = _cache(max_entries=3)
+    for k in "abc":
+        c.set(k, k)
+    c.get("a")
+    c.set("d", "d")
+    assert c.get("b") is None
+    assert [c.get(k) for k in "acd"] == ["a", "c", "d"]
+    assert c.stats()["evictions"] == 1
+
+
+def test_lfu_evicts_least_frequently_used_then_oldest():
+    c = _cache(max_entries=3, eviction="lfu")
+    for k in "abc":
+        c.set(k, k)
+    for _ in range(3):
+        c.get("a")
+    c.get("c")
+    c.set("d", "d")          # b: freq 1 and oldest
+    assert c.get("b") is None
+    c.set("e", "e")          # d: freq 1, e must not evict itself
+    assert c.get("d") is None and c.get("e") == "e"
+    c.delete("c")
+    c.set("f", "f")
+    assert len(c) == 3
+
+
+def test_byte_bound_and_oversized_values():
+    value = "x" * 1000
+    per_entry = approx_size("k0") + approx_size(value)
+    c = _cache(max_entries=100, max_bytes=per_entry * 3)
+    for i in range(5):
+        c.set(f"k{i}", value)
+    assert len(c) == 3 and c.bytes <= c.max_bytes
+    c.set("huge", "y" * (per_entry * 4))
+    assert c.get("huge") is None and c.stats()["rejected"] == 1
+
+
+def test_ttl_expires_on_read():
+    c = _cache()
+    c.set("a", 1, ttl=0.05)
+    c.set("b", 2)
+    assert c.get("a") == 1
+    time.sleep(0.06)
+    assert c.get("a") is None and c.get("b") == 2
+    assert c.stats()["expired"] == 1
+
+
+def test_due_expiry_slots_are_cleared_without_a_sweep():
+    c = _cache(max_entries=100)
+    for i in range(50):
+        c.set(f"k{i}", i, ttl=0.01)
+    time.sleep(1.1)  # slots are whole seconds
+    c.set("live", 1)
+    assert len(c) == 1 and not c._expiry
+    for i in range(99):
+        c.set(f"n{i}", i, ttl=60)
+    assert len(c) == 100 and c.stats()["evictions"] == 0
+
+
+def test_sweep_and_overwrite():
+    c = _cache()
+    c.set("a", 1, ttl=0.01)
+    c.set("a", 2, ttl=60)    # the old slot no longer applies
+    c.set("b", 1, ttl=0.01)
+    time.sleep(1.1)
+    assert c.sweep() == 1
+    assert c.get("a") == 2 and len(c) == 1
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        InMemoryCache(eviction="fifo")
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from agentic_bank.core.llm.embeddings import EmbeddingBatcher
+from agentic_bank.devtools.stubs import LatencyModel, StubEmbeddingsClient, hash_embedding
+
+
+def _batcher(latency_ms=0.0, wait_ms=200):
+    client = StubEmbeddingsClient(LatencyModel(p50_ms=latency_ms, dist="fixed"), dim=8)
+    return client, EmbeddingBatcher(client, "stub", max_batch=16, max_wait_ms=wait_ms)
+
+
+def test_lone_request_skips_the_collection_window():
+    client, b = _batcher(wait_ms=200)
+    t0 = time.monotonic()
+    assert b.embed(["hello"]) == [hash_embedding("hello", 8)]
+    assert time.monotonic() - t0 < 0.1
+    assert b.stats()["immediate"] == 1 and client.calls == 1
+    b.close()
+
+
+def test_requests_behind_one_in_flight_are_batched():
+    client, b = _batcher(latency_ms=50, wait_ms=20)
+    results = {}
+
+    def ask(text):
+        results[text] = b.embed([text, "shared"])
+
+    first = threading.Thread(target=ask, args=("t0",))
+    first.start()
+    time.sleep(0.01)  # t0 is in flight; the rest queue behind it
+    others = [threading.Thread(target=ask, args=(f"t{i}",)) for i in range(1, 6)]
+    for t in others:
+        t.start()
+    for t in [first, *others]:
+        t.join()
+    assert results == {f"t{i}": [hash_embedding(f"t{i}", 8), hash_embedding("shared", 8)] for i in range(6)}
+    stats = b.stats()
+    assert client.calls == 2 and stats["immediate"] == 1
+    assert stats["sent_inputs"] == 2 + 6  # the batch sends "shared" once
+    b.close()
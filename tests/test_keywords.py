@@ -0,0 +1,96 @@
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from agentic_bank.core.messages import TurnInput, UserIdentity
+from agentic_bank.devtools.router_bench import DEFAULT_CORPUS, load_corpus
+from agentic_bank.router.keywords import KeywordMatcher
+from agentic_bank.router.router import DEFAULT_KEYWORD_PATTERNS, KeywordRouter
+
+KEYWORDS_FILE = Path(__file__).resolve().parents[1] / "data" / "router" / "keywords.yaml"
+
+
+def _turn(text: str) -> TurnInput:
+    return TurnInput(turnId="t", sessionId="s", channel="web", user=UserIdentity(userId="u"), text=text)
+
+
+def _old_scores(patterns: Dict[str, List[str]], text: str) -> Dict[str, float]:
+    """The scorer KeywordMatcher replaced: one search per pattern, one point per matching pattern."""
+    scores = {}
+    for agent, pats in patterns.items():
+        hit = sum(1 for pat in pats if re.compile(pat, re.I).search(text))
+        if hit:
+            scores[agent] = float(hit)
+    return scores
+
+
+TEXTS = [row["text"] for row in load_corpus(DEFAULT_CORPUS)] + [
+    "",
+    "BLOCK my Card, it was STOLEN",
+    "how do i book an appointment to replace my lost card?",
+    "what are the fees and where is the cutoff",
+    "blockade cardboard unlocked",       # no whole-word hits
+    "block block block",                 # a pattern counts once
+    "schedule a visit; reissue; freeze; limit",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_matcher_matches_old_scorer(text):
+    text = " ".join(text.lower().split())
+    assert KeywordMatcher(DEFAULT_KEYWORD_PATTERNS).scores(text) == _old_scores(DEFAULT_KEYWORD_PATTERNS, text)
+
+
+def test_keywords_prefer_longest_and_count_once():
+    m = KeywordMatcher({
+        "cards": {"keywords": {"card": 0.25, "debit card": 0.5}},
+        "faq": {"keywords": ["atm"], "weight": 2.0},
+    })
+    assert m.scores("my debit card and my other debit card") == {"cards": 0.5}
+    assert m.scores("a card at the ATM") == {"cards": 0.25, "faq": 2.0}
+    assert m.scores("cardiff atmosphere") == {}
+    assert m.size == 3
+
+
+def test_overlapping_patterns_and_keywords_all_count():
+    m = KeywordMatcher({"a": [r"\bcard\b"], "b": [r"\blost card\b"]})
+    assert m.scores("lost card") == {"a": 1.0, "b": 1.0}
+    m = KeywordMatcher({
+        "cards": {"patterns": [r"\b(card|lost)\b"], "keywords": {"debit card": 0.5, "credit card": 0.5}},
+        "faq": {"patterns": [r"\b(limit|where)\b"]},
+    })
+    assert m.scores("credit card limit") == {"cards": 1.5, "faq": 1.0}
+    assert m.scores("where is my debit card") == {"cards": 1.5, "faq": 1.0}
+
+
+def test_default_keyword_file_routes_card_phrases_to_cards():
+    router = KeywordRouter(path=KEYWORDS_FILE, reload_interval=0)
+    assert router.route(_turn("credit card limit"))[0] == "agent-card-control-llm"
+    assert router.route(_turn("where is my debit card"))[0] == "agent-card-control-llm"
+    assert router.route(_turn("my credit card was stolen, what now"))[0] == "agent-card-control-llm"
+
+
+def test_legacy_list_config_and_bad_pattern():
+    assert KeywordMatcher({"a": [r"\bfoo\b"]}).scores("foo bar") == {"a": 1.0}
+    with pytest.raises(re.error):
+        KeywordMatcher({"a": ["(unclosed"]})
+
+
+def test_router_reloads_changed_file_and_keeps_patterns_on_error(tmp_path):
+    path = tmp_path / "keywords.yaml"
+    path.write_text("cards:\n  patterns: ['\\bblock\\b']\n", encoding="utf-8")
+    router = KeywordRouter(path=path, reload_interval=0)
+    assert router.route(_turn("block it"))[0] == "cards"
+
+    path.write_text("faq:\n  keywords: [block]\n", encoding="utf-8")
+    later = time.time() + 5
+    os.utime(path, (later, later))
+    assert router.route(_turn("block it"))[0] == "faq"
+
+    path.write_text("faq: [\n", encoding="utf-8")
+    os.utime(path, (later + 5, later + 5))
+    assert router.route(_turn("block it"))[0] == "faq"
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace as NS
+
+import pytest
+
+from agentic_bank.core.cache import InMemoryCache, request_key
+from agentic_bank.core.llm import azure
+from agentic_bank.core.llm.azure import AsyncAzureLLM, AzureLLM
+
+TOOLS = [{"type": "function", "function": {"name": "cards_block", "parameters": {"type": "object"}}}]
+FAQ_TOOLS = [{"type": "function", "function": {"name": "knowledge_retrieve", "parameters": {"type": "object"}}}]
+SYSTEM = "You are the card agent."
+
+
+def _reply(messages):
+    """Fake model: calls cards_block on "block" and knowledge_retrieve on "fees", answers from the tool result."""
+    if messages[-1]["role"] == "tool":
+        answer = "Your card is blocked." if messages[-1]["name"] == "cards_block" else "No fees."
+        msg = NS(content=answer, tool_calls=None)
+    elif "block" in messages[-1]["content"]:
+        call = NS(id="call_1", function=NS(name="cards_block", arguments=json.dumps({"last4": "1234"})))
+        msg = NS(content=None, tool_calls=[call])
+    elif "fees" in messages[-1]["content"]:
+        call = NS(id="call_1", function=NS(name="knowledge_retrieve", arguments=json.dumps({"query": "fees"})))
+        msg = NS(content=None, tool_calls=[call])
+    else:
+        msg = NS(content="Hello!", tool_calls=None)
+    return NS(choices=[NS(message=msg)], usage=None)
+
+
+class FakeCompletions:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, timeout=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return _reply(kwargs["messages"])
+
+
+class AsyncFakeCompletions(FakeCompletions):
+    async def create(self, timeout=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return _reply(kwargs["messages"])
+
+
+class RecordingTools:
+    def __init__(self, status="ok"):
+        self.calls = []
+        self.status = status
+        self._lock = threading.Lock()
+
+    def read_only(self, tool_id):
+        return tool_id == "knowledge.retrieve"
+
+    def call_many(self, jobs):
+        with self._lock:
+            self.calls.extend(jobs)
+        return [(self.status, {"done": True}) for _ in jobs]
+
+    async def acall_many(self, jobs):
+        return self.call_many(jobs)
+
+
+def _llm(cls, completions):
+    llm = cls.__new__(cls)  # skip the Azure env lookup
+    llm.cache = InMemoryCache(sweep_seconds=0)
+    llm.cache_ttl = 60
+    llm.deployment = "gpt-test"
+    llm.client = NS(chat=NS(completions=completions))
+    return llm
+
+
+def _ask(llm, text, tools, schema=TOOLS, **extra):
+    messages = [{"role": "user", "content": text, **extra}]
+    return llm.chat_with_tools(messages, tools=schema, system=SYSTEM, tool_executor=tools)
+
+
+def test_reply_without_tools_is_cached():
+    upstream, tools = FakeCompletions(), RecordingTools()
+    llm = _llm(AzureLLM, upstream)
+    assert _ask(llm, "hi", tools) == ("Hello!", [])
+    assert _ask(llm, "hi", tools) == ("Hello!", [])
+    assert upstream.calls == 1
+
+
+def test_reply_that_ran_tools_is_never_replayed():
+    upstream, tools = FakeCompletions(), RecordingTools()
+    llm = _llm(AzureLLM, upstream)
+    for _ in range(2):
+        text, summaries = _ask(llm, "block my card", tools)
+        assert text == "Your card is blocked."
+        assert [s["name"] for s in summaries] == ["cards_block"]
+    assert tools.calls == [("cards.block", {"last4": "1234"})] * 2
+    assert len(llm.cache) == 0
+
+
+def test_reply_built_on_read_only_tools_is_cached_unless_a_tool_failed():
+    upstream, tools = FakeCompletions(), RecordingTools()
+    llm = _llm(AzureLLM, upstream)
+    first = _ask(llm, "what are the fees", tools, FAQ_TOOLS)
+    assert first[0] == "No fees." and [s["name"] for s in first[1]] == ["knowledge_retrieve"]
+    assert _ask(llm, "what are the fees", tools, FAQ_TOOLS) == first
+    assert upstream.calls == 2 and len(tools.calls) == 1
+
+    upstream, tools = FakeCompletions(), RecordingTools(status="error")
+    llm = _llm(AzureLLM, upstream)
+    for _ in range(2):
+        _ask(llm, "what are the fees", tools, FAQ_TOOLS)
+    assert len(tools.calls) == 2 and len(llm.cache) == 0
+
+
+def test_volatile_message_fields_do_not_split_the_cache():
+    upstream, tools = FakeCompletions(), RecordingTools()
+    llm = _llm(AzureLLM, upstream)
+    _ask(llm, "hi", tools, ts=1.0)
+    _ask(llm, "hi", tools, ts=2.0, meta={"turnId": "t2"})
+    assert upstream.calls == 1
+
+
+@pytest.mark.parametrize("text,schema,upstream_calls,tool_calls", [
+    ("hi", FAQ_TOOLS, 1, 0),
+    ("what are the fees", FAQ_TOOLS, 2, 1),
+    ("block my card", TOOLS, 8, 4),       # side effects: every caller runs its own loop, without waiting
+])
+def test_coalescing_only_with_read_only_tools(monkeypatch, text, schema, upstream_calls, tool_calls):
+    monkeypatch.setattr(azure, "LLM_SINGLE_FLIGHT", True)
+    upstream, tools = FakeCompletions(delay=0.05), RecordingTools()
+    llm = _llm(AzureLLM, upstream)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(_ask(llm, text, tools, schema))) for _ in range(4)]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - t0 < 0.18  # one tool loop (2 x 50ms), not wait-then-rerun
+    assert len(set(r[0] for r in results)) == 1 and len(results) == 4
+    assert upstream.calls == upstream_calls
+    assert len(tools.calls) == tool_calls
+
+
+def test_async_tool_loop_coalesces_and_caches_only_read_only_requests(monkeypatch):
+    monkeypatch.setattr(azure, "LLM_SINGLE_FLIGHT", True)
+    upstream, tools = AsyncFakeCompletions(delay=0.01), RecordingTools()
+    llm = _llm(AsyncAzureLLM, upstream)
+
+    async def main():
+        hi = await asyncio.gather(*(_ask(llm, "hi", tools, FAQ_TOOLS) for _ in range(3)))
+        hi.append(await _ask(llm, "hi", tools, FAQ_TOOLS))
+        blocked = await asyncio.gather(*(_ask(llm, "block my card", tools) for _ in range(3)))
+        return hi, blocked
+
+    hi, blocked = asyncio.run(main())
+    assert hi == [("Hello!", [])] * 4
+    assert all(text == "Your card is blocked." for text, _ in blocked)
+    assert len(tools.calls) == 3
+    assert upstream.calls == 1 + 2 * 3
+
+
+def test_request_key_is_stable_and_covers_static_parts():
+    msgs = [{"role": "user", "content": "hi"}]
+    key = request_key("chat", msgs, static={"system": SYSTEM, "tools": TOOLS}, deployment="d")
+    reordered = [{"content": "hi", "role": "user", "ts": 1700000000.5}]
+    assert request_key("chat", reordered, static={"tools": TOOLS, "system": SYSTEM}, deployment="d") == key
+    assert request_key("chat", [{"role": "user", "content": "hi!"}], static={"system": SYSTEM, "tools": TOOLS},
+                       deployment="d") != key
+    assert request_key("chat", msgs, static={"system": "other", "tools": TOOLS}, deployment="d") != key
+    assert request_key("chat", msgs, static={"system": SYSTEM, "tools": TOOLS}, deployment="e") != key
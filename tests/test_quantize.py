@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from agentic_bank.core.llm.embeddings import l2_normalize
+from agentic_bank.core.llm.quantize import CompactVectors, truncate
+from agentic_bank.router.ann import ExactIndex, IVFIndex
+
+
+def _vectors(n=400, dim=256, seed=0):
+    rng = np.random.default_rng(seed)
+    return l2_normalize(rng.standard_normal((n, dim))), l2_normalize(rng.standard_normal((20, dim)))
+
+
+def test_truncate_renormalizes():
+    x = truncate(np.arange(1, 9, dtype=np.float32), 4)
+    assert x.shape == (4,)
+    assert np.isclose(np.linalg.norm(x), 1.0)
+
+
+@pytest.mark.parametrize("dtype,tol", [("float32", 1e-6), ("float16", 2e-3), ("int8", 2e-2)])
+def test_scores_close_to_float(dtype, tol):
+    X, Q = _vectors()
+    cv = CompactVectors.from_float(X, dim=0, dtype=dtype)
+    assert np.abs(cv.scores(Q) - Q @ X.T).max() < tol
+    assert np.abs(cv.dense() - X).max() < tol
+
+
+def test_int8_is_a_quarter_of_float32():
+    X, _ = _vectors()
+    f32 = CompactVectors.from_float(X, dim=0, dtype="float32")
+    i8 = CompactVectors.from_float(X, dim=0, dtype="int8")
+    assert i8.nbytes == f32.nbytes // 4 + 4 * len(X)  # codes + one float32 scale per row
+
+
+def test_truncated_storage_takes_full_size_queries():
+    X, Q = _vectors()
+    cv = CompactVectors.from_float(X, dim=64, dtype="int8")
+    assert cv.shape == (len(X), 64)
+    expected = truncate(Q, 64) @ truncate(X, 64).T
+    assert np.abs(cv.scores(Q) - expected).max() < 2e-2
+
+
+def test_row_subsets_and_empty_input():
+    X, Q = _vectors(n=10)
+    cv = CompactVectors.from_float(X, dim=0, dtype="int8")
+    assert np.allclose(cv[2:5].scores(Q), cv.scores(Q)[:, 2:5])
+    assert CompactVectors.from_float(np.zeros((0, 8)), dim=0, dtype="int8").shape == (0, 8)
+    with pytest.raises(ValueError):
+        CompactVectors.from_float(X, dtype="bfloat16")
+
+
+def test_int8_index_keeps_top1():
+    X, Q = _vectors(n=2000, dim=128)
+    Q = l2_normalize(X[:50] + 0.05 * np.random.default_rng(1).standard_normal((50, 128)))
+    cv = CompactVectors.from_float(X, dim=0, dtype="int8")
+    _, exact = ExactIndex(X).search(Q, k=1)
+    _, flat = ExactIndex(cv).search(Q, k=1)
+    _, ivf = IVFIndex(cv, nlist=16).search(Q, k=1, nprobe=16)
+    assert (flat == exact).all() and (ivf == exact).all()
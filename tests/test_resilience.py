@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from agentic_bank.core.llm import resilience
+from agentic_bank.core.llm.resilience import CircuitOpenError, DeadlineExceeded, Policy, upstream_failed
+
+
+def _status_error(cls, code, headers=None):
+    request = httpx.Request("POST", "https://example.invalid/chat")
+    return cls("upstream", response=httpx.Response(code, request=request, headers=headers), body=None)
+
+
+def _policy(**kw):
+    kw = {"backoff_base_s": 0.001, "backoff_max_s": 0.002, "hedge_quantile": 0, **kw}
+    return Policy("test", **kw)
+
+
+def _failing(errors, result="ok"):
+    """fn(timeout) that raises `errors` in turn, then returns `result`."""
+    errors = list(errors)
+
+    def fn(timeout):
+        if errors:
+            raise errors.pop(0)
+        return result
+    return fn
+
+
+def test_retries_429_and_5xx_then_succeeds():
+    p = _policy(retries=2)
+    fn = _failing([_status_error(openai.RateLimitError, 429), _status_error(openai.InternalServerError, 503)])
+    assert p.call(fn) == "ok"
+    assert p.counters["retries"] == 2 and p.counters["failed"] == 0
+
+
+def test_gives_up_after_retries_and_does_not_retry_client_errors():
+    p = _policy(retries=1)
+    with pytest.raises(openai.RateLimitError) as e:
+        p.call(_failing([_status_error(openai.RateLimitError, 429)] * 3))
+    assert upstream_failed(e.value)
+    assert p.counters["failed"] == 1
+
+    bad = _status_error(openai.BadRequestError, 400)
+    with pytest.raises(openai.BadRequestError):
+        p.call(_failing([bad]))
+    assert not upstream_failed(bad)
+
+
+def test_retry_after_header_is_honoured_within_the_deadline():
+    p = _policy(retries=3, deadline_s=0.2)
+    slow = _status_error(openai.RateLimitError, 429, headers={"retry-after": "5"})
+    t0 = time.monotonic()
+    with pytest.raises(openai.RateLimitError):
+        p.call(_failing([slow]))
+    assert time.monotonic() - t0 < 0.1  # gives up instead of sleeping past the deadline
+
+
+def test_deadline_passes_remaining_budget_and_raises():
+    p = _policy(deadline_s=0.05)
+    seen = []
+    assert p.call(lambda timeout: seen.append(timeout) or "ok") == "ok"
+    assert 0 < seen[0] <= 0.05
+
+    # Attempts that outlive the deadline (here both the primary and its hedge)
+    p = _policy(deadline_s=0.05, hedge_quantile=0.95, hedge_initial_s=0.01, hedge_max_share=1.0)
+    with pytest.raises(DeadlineExceeded) as e:
+        p.call(lambda timeout: time.sleep(0.2))
+    assert upstream_failed(e.value)
+    assert p.counters["deadline"] == 1
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_success():
+    p = _policy(retries=0, breaker_failures=2, breaker_reset_s=0.05)
+    err = _status_error(openai.InternalServerError, 500)
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            p.call(_failing([err]))
+    assert p.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        p.call(lambda timeout: "never sent")
+    assert p.counters["rejected"] == 1
+
+    time.sleep(0.06)
+    assert p.breaker.state == "half_open"
+    assert p.call(lambda timeout: "ok") == "ok"
+    assert p.breaker.state == "closed"
+
+
+def _slow_then_fast(primary_s=0.5):
+    n = [0]
+    lock = threading.Lock()
+
+    def fn(timeout):
+        with lock:
+            n[0] += 1
+            first = n[0] == 1
+        time.sleep(primary_s if first else 0.01)
+        return "primary" if first else "backup"
+    return fn
+
+
+def test_sync_hedge_wins_over_a_slow_primary():
+    p = _policy(hedge_quantile=0.95, hedge_initial_s=0.03, hedge_max_share=1.0)
+    t0 = time.monotonic()
+    assert p.call(_slow_then_fast()) == "backup"
+    assert time.monotonic() - t0 < 0.3
+    assert p.counters["hedges"] == 1 and p.counters["hedge_wins"] == 1
+
+
+def test_hedges_respect_the_budget_and_a_busy_pool(monkeypatch):
+    p = _policy(hedge_quantile=0.95, hedge_initial_s=0.02, hedge_max_share=0.0)
+    assert p.call(_slow_then_fast(0.05)) == "primary"
+    assert p.counters["hedges"] == 0
+
+    # No idle hedge worker: the attempt runs on the calling thread and is not hedged
+    p = _policy(hedge_quantile=0.95, hedge_initial_s=0.02, hedge_max_share=1.0)
+    monkeypatch.setattr(resilience._HEDGE_POOL, "idle", lambda: 0)
+    assert p.call(lambda timeout: threading.current_thread().name) == threading.current_thread().name
+    assert p.counters["hedges"] == 0
+
+
+def test_async_hedge_wins_and_cancels_the_loser():
+    p = _policy(hedge_quantile=0.95, hedge_initial_s=0.03, hedge_max_share=1.0)
+    started, cancelled = [], []
+
+    async def fn(timeout):
+        started.append(timeout)
+        if len(started) > 1:
+            return "backup"
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "primary"
+
+    assert asyncio.run(p.acall(fn)) == "backup"
+    assert cancelled == [True]
+    assert p.counters["hedge_wins"] == 1
+
+
+def _afailing(errors, result="ok"):
+    sync = _failing(errors, result)
+
+    async def fn(timeout):
+        return sync(timeout)
+    return fn
+
+
+def test_async_retries_and_breaker():
+    p = _policy(retries=1)
+    assert asyncio.run(p.acall(_afailing([_status_error(openai.InternalServerError, 502)]))) == "ok"
+    assert p.counters["retries"] == 1
+
+    p = _policy(retries=0, breaker_failures=1, breaker_reset_s=10)
+    with pytest.raises(openai.APIConnectionError):
+        asyncio.run(p.acall(_afailing([openai.APIConnectionError(request=httpx.Request("POST", "https://x"))])))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(p.acall(_afailing([])))
+
+
+def test_counters_stay_exact_under_concurrent_calls():
+    p = _policy(retries=1, breaker_failures=10**6)
+    err = _status_error(openai.InternalServerError, 503)
+
+    def worker():
+        for _ in range(200):
+            p.call(_failing([err]))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = p.stats()
+    assert stats["calls"] == 1600 and stats["retries"] == 1600
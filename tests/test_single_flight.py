@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agentic_bank.core.cache import SingleFlight
+
+
+def test_do_runs_once_for_concurrent_callers():
+    sf = SingleFlight()
+    calls, gate = [], threading.Event()
+
+    def work():
+        calls.append(1)
+        gate.wait(2)
+        return {"text": "hi"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sf.do("k", work))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"text": "hi"}] * 8
+    assert sf.stats() == {"leaders": 1, "coalesced": 7, "inflight": 0}
+
+
+def test_do_raises_and_forgets_the_key():
+    sf = SingleFlight()
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        sf.do("k", boom)
+    assert sf.do("k", lambda: 2) == 2  # a later call runs again
+    assert sf.stats()["leaders"] == 2
+
+
+def test_do_keeps_distinct_keys_apart():
+    sf = SingleFlight()
+    assert [sf.do(k, lambda k=k: k * 2) for k in ("a", "b")] == ["aa", "bb"]
+
+
+def test_ado_coalesces_and_survives_a_cancelled_caller():
+    sf = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        first = asyncio.ensure_future(sf.ado("k", work))
+        others = [asyncio.ensure_future(sf.ado("k", work)) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await asyncio.gather(*others), sf.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == [42] * 4
+    assert len(calls) == 1
+    assert stats == {"leaders": 1, "coalesced": 4, "inflight": 0}
+
+
+def test_ado_from_several_event_loops_keeps_consistent_counts():
+    sf = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return 1
+
+    async def burst():
+        return await asyncio.gather(*(sf.ado("k", work) for _ in range(50)))
+
+    threads = [threading.Thread(target=lambda: asyncio.run(burst())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = sf.stats()
+    assert stats["leaders"] + stats["coalesced"] == 200
+    assert stats["inflight"] == 0
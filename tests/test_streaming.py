@@ -0,0 +1,71 @@
+import json
+import random
+from types import SimpleNamespace as NS
+
+import pytest
+
+from agentic_bank.core.llm.streaming import ReplyTextExtractor, StreamAccumulator
+
+
+def _chunk(content=None, tool_calls=None):
+    return NS(choices=[NS(delta=NS(content=content, tool_calls=tool_calls))])
+
+
+def _tc(index, id=None, name=None, arguments=None):
+    return NS(index=index, id=id, function=NS(name=name, arguments=arguments))
+
+
+def test_accumulator_joins_text_and_tool_call_pieces():
+    acc = StreamAccumulator()
+    chunks = [
+        NS(choices=[]),  # content-filter preamble
+        _chunk("Let me "),
+        _chunk("check."),
+        _chunk(tool_calls=[_tc(1, "call_b", "appointment_book", '{"day":'), _tc(0, "call_a", "cards_", "")]),
+        _chunk(tool_calls=[_tc(0, None, "block", '{"last4": "1234"}'), _tc(1, None, None, ' "mon"}')]),
+    ]
+    deltas = [acc.add(c) for c in chunks]
+    assert deltas == [None, "Let me ", "check.", None, None]
+    assert acc.text == "Let me check."
+    calls = [(c.id, c.function.name, json.loads(c.function.arguments)) for c in acc.tool_calls]
+    assert calls == [("call_a", "cards_block", {"last4": "1234"}), ("call_b", "appointment_book", {"day": "mon"})]
+
+
+REPLIES = [
+    "Your card ending 1234 is blocked.",
+    'Quotes "inside", a back\\slash, a /slash/ and\nnew lines\ttabbed.',
+    "Unicode: café, 東京, and an emoji 🎉 (a surrogate pair).",
+    "",
+]
+
+
+def _split(s: str, rng: random.Random):
+    i = 0
+    while i < len(s):
+        n = rng.randint(1, 4)
+        yield s[i:i + n]
+        i += n
+
+
+@pytest.mark.parametrize("reply", REPLIES)
+@pytest.mark.parametrize("fenced", [False, True])
+def test_extractor_yields_reply_text_for_any_split(reply, fenced):
+    doc = json.dumps({"isTerminal": False, "replyText": reply, "actions": [{"x": "\"replyText\": no"}]})
+    if fenced:
+        doc = "```json\n" + doc + "\n```"
+    for seed in range(20):
+        ex = ReplyTextExtractor()
+        assert "".join(ex.feed(d) for d in _split(doc, random.Random(seed))) == reply
+    ex = ReplyTextExtractor()
+    assert "".join(ex.feed(ch) for ch in doc) == reply
+
+
+def test_extractor_passes_plain_text_through():
+    ex = ReplyTextExtractor()
+    assert [ex.feed(d) for d in ["  ", "Hello", " there"]] == ["", "Hello", " there"]
+
+
+def test_extractor_decodes_unicode_escapes_and_stops_after_the_field():
+    ex = ReplyTextExtractor()
+    out = ex.feed('{"meta": {"a": 1}, "replyText": "done\\u00e9"') + ex.feed(', "replyText": "again"}')
+    assert out == "doneé"